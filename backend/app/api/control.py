@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
 from ..db.session import SessionLocal
-from ..db.models import SystemState, UsageLog, Settings
-from ..services.engine import engine as hottub_engine
-
-from datetime import datetime, timedelta
+from ..db.models import SystemState, UsageLog, Settings, Schedule
+from ..services.engine_commands import (
+    AdjustTimer, Batch, CancelScheduledSession, CancelSoak, SetPoint, SetRelays, StartSoak, TriggerSchedule,
+)
+from ..services.engine_link import engine as hottub_engine
+from ..services.update_jobs import JobAlreadyRunning, update_jobs
 
 router = APIRouter()
 
@@ -23,6 +26,38 @@ class SoakStart(BaseModel):
 class TimerAdjustment(BaseModel):
     minutes: int
 
+BATCH_OPS = {
+    "set_relays": "relays",
+    "set_point": "set_point",
+    "start_soak": "soak",
+    "extend_soak": "minutes",
+    "cancel_soak": None,
+    "cancel_scheduled_session": None,
+    "trigger_schedule": "schedule_id",
+}
+
+class BatchOperation(BaseModel):
+    op: str
+    relays: Optional[ControlUpdate] = None
+    set_point: Optional[float] = None
+    soak: Optional[SoakStart] = None
+    minutes: Optional[int] = None
+    schedule_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def validate_op(self):
+        if self.op not in BATCH_OPS:
+            raise ValueError(f"Unknown operation '{self.op}'")
+        field = BATCH_OPS[self.op]
+        if field and getattr(self, field) is None:
+            raise ValueError(f"Operation '{self.op}' requires '{field}'")
+        if self.op == "set_point" and self.set_point > 108: # Same hard cap as /api/settings
+            raise ValueError("Set point too high")
+        return self
+
+class ControlBatch(BaseModel):
+    operations: List[BatchOperation]
+
 def get_db():
     db = SessionLocal()
     try:
@@ -30,137 +65,66 @@ def get_db():
     finally:
         db.close()
 
+def _batch_command(operation: BatchOperation):
+    if operation.op == "set_relays":
+        return SetRelays(**operation.relays.model_dump())
+    if operation.op == "set_point":
+        return SetPoint(operation.set_point)
+    if operation.op == "start_soak":
+        return StartSoak(operation.soak.target_temp, operation.soak.duration_minutes)
+    if operation.op == "extend_soak":
+        return AdjustTimer(operation.minutes)
+    if operation.op == "cancel_soak":
+        return CancelSoak()
+    if operation.op == "cancel_scheduled_session":
+        return CancelScheduledSession()
+    return TriggerSchedule(operation.schedule_id)
+
+# Control writes go through the engine's command queue; routers only read back the result.
+
 @router.post("/")
 def update_control(update: ControlUpdate, db: Session = Depends(get_db)):
-    state = db.query(SystemState).first()
-    if not state:
-        state = SystemState()
-        db.add(state)
-    
-    if update.circ_pump is not None: state.circ_pump = update.circ_pump
-    if update.heater is not None: state.heater = update.heater
-    if update.jet_pump is not None: state.jet_pump = update.jet_pump
-    if update.light is not None: state.light = update.light
-    if update.ozone is not None: state.ozone = update.ozone
-    
-    db.commit()
-    db.refresh(state)
-    return state
+    hottub_engine.submit(SetRelays(**update.model_dump()))
+    return db.query(SystemState).first()
 
 @router.post("/start-soak")
-def start_soak(soak: SoakStart, db: Session = Depends(get_db)):
-    state = db.query(SystemState).first()
-    settings = db.query(Settings).first()
-    
-    if not state or not settings:
-        raise HTTPException(status_code=500, detail="System configuration missing")
-
-    duration = soak.duration_minutes if soak.duration_minutes else settings.default_soak_duration
-
-    # Update state
-    state.manual_soak_active = True
-    state.manual_soak_expires = datetime.now() + timedelta(minutes=duration)
-    state.heater = True
-    
-    # Update target temp
-    settings.set_point = soak.target_temp
-    
-    log = UsageLog(event="Manual Soak Started", details=f"Target: {soak.target_temp}F, Duration: {duration}m")
-    db.add(log)
-    db.commit()
-    
-    return {"status": "soak started", "expires": state.manual_soak_expires}
+def start_soak(soak: SoakStart):
+    return hottub_engine.submit(StartSoak(soak.target_temp, soak.duration_minutes))
 
 @router.post("/cancel-soak")
-def cancel_soak(db: Session = Depends(get_db)):
-    state = db.query(SystemState).first()
-    settings = db.query(Settings).first()
-    
-    if not state or not settings:
-        raise HTTPException(status_code=500, detail="System configuration missing")
-
-    state.manual_soak_active = False
-    state.manual_soak_expires = None
-    state.jet_pump = False
-    state.light = False
-    
-    settings.set_point = settings.default_rest_temp
-    
-    log = UsageLog(event="Manual Soak Cancelled", details="User terminated soak session")
-    db.add(log)
-    db.commit()
-    
-    return {"status": "soak cancelled", "reverted_to": settings.default_rest_temp}
+def cancel_soak():
+    return hottub_engine.submit(CancelSoak())
 
 @router.post("/cancel-scheduled-session")
-def cancel_scheduled_session(db: Session = Depends(get_db)):
-    state = db.query(SystemState).first()
-    settings = db.query(Settings).first()
-    
-    if not state or not settings:
-        raise HTTPException(status_code=500, detail="System configuration missing")
-
-    state.scheduled_session_active = False
-    state.scheduled_session_expires = None
-    state.jet_pump = False
-    state.light = False
-    state.ozone = False
-    
-    settings.set_point = settings.default_rest_temp
-    
-    log = UsageLog(event="Scheduled Session Cancelled", details="User manually stopped the active schedule.")
-    db.add(log)
-    db.commit()
-    
-    return {"status": "scheduled session cancelled", "reverted_to": settings.default_rest_temp}
+def cancel_scheduled_session():
+    return hottub_engine.submit(CancelScheduledSession())
 
 @router.post("/trigger-schedule/{schedule_id}")
 def trigger_schedule(schedule_id: int, db: Session = Depends(get_db)):
-    from ..db.models import Schedule
-    from ..services.scheduler import scheduler as hottub_scheduler
-    
-    sched = db.query(Schedule).filter(Schedule.id == schedule_id).first()
-    if not sched:
+    if not db.query(Schedule).filter(Schedule.id == schedule_id).first():
         raise HTTPException(status_code=404, detail="Schedule not found")
-    
-    hottub_scheduler.activate_schedule(sched, db)
-    return {"status": "schedule triggered", "name": sched.name}
+    return hottub_engine.submit(TriggerSchedule(schedule_id))
 
 @router.post("/adjust-soak-timer")
-def adjust_soak_timer(adj: TimerAdjustment, db: Session = Depends(get_db)):
+def adjust_soak_timer(adj: TimerAdjustment):
+    return hottub_engine.submit(AdjustTimer(adj.minutes))
+
+@router.post("/batch")
+def apply_batch(batch: ControlBatch, db: Session = Depends(get_db)):
+    """Apply an ordered list of control operations in one transaction.
+
+    Every operation is validated before anything is queued; the engine applies the
+    batch as a single command, so if any step fails none of them take effect.
+    """
+    for schedule_id in {op.schedule_id for op in batch.operations if op.op == "trigger_schedule"}:
+        if not db.query(Schedule).filter(Schedule.id == schedule_id).first():
+            raise HTTPException(status_code=404, detail=f"Schedule {schedule_id} not found")
+
+    result = hottub_engine.submit(Batch([_batch_command(operation) for operation in batch.operations]))
+
     state = db.query(SystemState).first()
-    if not state:
-        raise HTTPException(status_code=400, detail="System state not found")
-
-    # Determine which expiry to adjust
-    target_field = None
-    if state.manual_soak_active and state.manual_soak_expires:
-        target_field = "manual_soak_expires"
-    elif state.scheduled_session_active and state.scheduled_session_expires:
-        target_field = "scheduled_session_expires"
-
-    if not target_field:
-        raise HTTPException(status_code=400, detail="No active soak session to adjust")
-
-    current_expiry = getattr(state, target_field)
-    new_expiry = current_expiry + timedelta(minutes=adj.minutes)
-    
-    # Don't allow timer to go below now
-    if new_expiry < datetime.now():
-        if target_field == "manual_soak_expires":
-            return cancel_soak(db)
-        else:
-            return cancel_scheduled_session(db)
-
-    setattr(state, target_field, new_expiry)
-    db.commit()
-    
-    event_type = "Time Added" if adj.minutes > 0 else "Time Removed"
-    log = UsageLog(event=f"Soak {event_type}", details=f"{abs(adj.minutes)} minutes adjusted. New expiry: {new_expiry.strftime('%H:%M:%S')}")
-    db.add(log)
-    db.commit()
-    
-    return {"status": "timer adjusted", "expires": new_expiry}
+    settings = db.query(Settings).first()
+    return {"results": result["results"], "desired_state": state, "set_point": settings.set_point}
 
 @router.post("/reset-faults")
 def reset_faults(db: Session = Depends(get_db)):
@@ -171,34 +135,31 @@ def reset_faults(db: Session = Depends(get_db)):
     return {"status": "faults reset"}
 
 @router.post("/master-shutdown")
-def master_shutdown(db: Session = Depends(get_db)):
-    state = db.query(SystemState).first()
-    if state:
-        state.circ_pump = False
-        state.heater = False
-        state.jet_pump = False
-        state.light = False
-        state.ozone = False
-        db.commit()
-    
-    hottub_engine.controller.emergency_shutdown()
-    hottub_engine.system_locked = True
-    hottub_engine.safety_status = "STOP: MASTER SHUTDOWN"
-    
-    log = UsageLog(event="Master Shutdown", details="System emergency stop executed by admin")
-    db.add(log)
-    db.commit()
-    
-    return {"status": "all systems off and locked"}
+def master_shutdown():
+    # Relays are cut immediately; the engine persists the all-off state and log entry
+    return hottub_engine.master_shutdown()
 
 @router.post("/update-system")
 def update_system():
-    import subprocess
     try:
-        # Pull latest code
-        subprocess.check_call(["git", "pull", "origin", "main"])
-        # In a real systemd environment, we would restart the service
-        # subprocess.Popen(["sudo", "systemctl", "restart", "opensoak"])
-        return {"status": "update pulled", "message": "Code updated. Please restart service manually if not running via systemd."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Update failed: {str(e)}")
+        job = update_jobs.start()
+    except JobAlreadyRunning:
+        raise HTTPException(status_code=409, detail="An update is already running")
+    # In a real systemd environment, we would restart the service once the job succeeds
+    # subprocess.Popen(["sudo", "systemctl", "restart", "opensoak"])
+    return {"status": "update started", "job_id": job.id, "message": "Poll /api/control/update-system/{job_id} for progress. Restart the service manually if not running via systemd."}
+
+@router.get("/update-system/{job_id}")
+def get_update_status(job_id: str, offset: int = 0):
+    """Job status plus output lines from `offset` on; pass back `next_offset` to stream."""
+    job = update_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Update job not found")
+    return job.to_dict(offset)
+
+@router.post("/update-system/{job_id}/cancel")
+def cancel_update(job_id: str):
+    job = update_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Update job not found")
+    return job.to_dict()
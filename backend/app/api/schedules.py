@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
-from ..db.session import SessionLocal
+from ..db.session import AsyncSessionLocal, SessionLocal
 from ..db.models import Schedule
 
 router = APIRouter()
@@ -33,9 +35,13 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @router.get("/", response_model=List[ScheduleResponse])
-def get_schedules(db: Session = Depends(get_db)):
-    return db.query(Schedule).all()
+async def get_schedules(db: AsyncSession = Depends(get_async_db)):
+    return (await db.execute(select(Schedule))).scalars().all()
 
 @router.post("/", response_model=ScheduleResponse)
 def create_schedule(sched: ScheduleCreate, db: Session = Depends(get_db)):
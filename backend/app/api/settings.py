@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 import os
 
-from ..db.session import SessionLocal
+from ..db.session import AsyncSessionLocal, SessionLocal
 from ..db.models import Settings
+from ..services.engine_commands import MAX_SET_POINT, SetPoint
+from ..services.engine_link import engine as hottub_engine
 
 router = APIRouter()
 
@@ -33,6 +37,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 async def get_admin_status(x_admin_key: Optional[str] = Header(None)) -> bool:
     admin_key_env = os.getenv("ADMIN_API_KEY")
     
@@ -48,22 +56,16 @@ async def get_admin_status(x_admin_key: Optional[str] = Header(None)) -> bool:
         raise HTTPException(status_code=403, detail="Unauthorized: Admin privileges required")
 
 @router.get("/")
-def get_settings(db: Session = Depends(get_db)):
-    settings = db.query(Settings).first()
+async def get_settings(db: AsyncSession = Depends(get_async_db)):
+    settings = (await db.execute(select(Settings).limit(1))).scalars().first()
     return settings
 
 @router.post("/")
 def update_settings(update: SettingsUpdate, db: Session = Depends(get_db), is_admin: bool = Depends(get_admin_status)):
-    settings = db.query(Settings).first()
-    if not settings:
-        settings = Settings()
-        db.add(settings)
-    
     # Fields that can be updated by any authenticated request (not strictly admin-only)
     if update.set_point is not None:
-        if update.set_point > 108: # Hard safety cap for set point
+        if update.set_point > MAX_SET_POINT: # Hard safety cap for set point
              raise HTTPException(status_code=400, detail="Set point too high")
-        settings.set_point = update.set_point
     
     # Fields that require `is_admin` to be True
     if not is_admin:
@@ -77,6 +79,16 @@ def update_settings(update: SettingsUpdate, db: Session = Depends(get_db), is_ad
             if getattr(update, field) is not None:
                 raise HTTPException(status_code=403, detail=f"Unauthorized: Changing '{field}' requires admin privileges.")
 
+    # The set point is control state; the engine applies it on its own thread. It goes
+    # first, so a rejected or unreachable engine fails the request before anything is written.
+    if update.set_point is not None:
+        hottub_engine.submit(SetPoint(update.set_point))
+
+    settings = db.query(Settings).first()
+    if not settings:
+        settings = Settings()
+        db.add(settings)
+
     # Apply admin-only changes (will only be reached if is_admin is True or check bypassed)
     if update.default_rest_temp is not None: settings.default_rest_temp = update.default_rest_temp
     if update.hysteresis_upper is not None: settings.hysteresis_upper = update.hysteresis_upper
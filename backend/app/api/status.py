@@ -1,18 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import os
-import threading
-import time
-from ..db.session import SessionLocal, get_pool_diagnostics
-import httpx
+from datetime import datetime, timezone
+from typing import Optional
+from ..db.session import AsyncSessionLocal, SessionLocal, get_pool_diagnostics
 from ..db.models import SystemState, TemperatureLog, Settings
-from ..services.engine import engine as hottub_engine
-from ..services.scheduler import scheduler as hottub_scheduler
+from ..core.json_response import FastJSONResponse
+from ..core.response_cache import response_cache
+from ..core.columnar import columnar_response, epoch_seconds, float_column, split_columns
+from ..services.engine_link import engine as hottub_engine
+from ..services.cost_projection import PROJECTION_DEFAULT_OUTSIDE_F, cost_projector
+from ..services.thermal_model import load_thermal_model
+from ..services.weather import LocationNotFound, weather_service
 
 router = APIRouter()
-WEATHER_CACHE_TTL_SEC = int(os.getenv("WEATHER_CACHE_TTL_SEC", "60"))
-_weather_cache_lock = threading.Lock()
-_weather_cache = {"location": None, "expires_at": 0.0, "payload": None}
 
 def get_db():
     db = SessionLocal()
@@ -21,70 +24,35 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @router.get("/")
-def get_status(db: Session = Depends(get_db)):
-    state = db.query(SystemState).first()
-    current_temp = hottub_engine.controller.get_temperature()
-    relay_states = hottub_engine.controller.get_all_states()
+async def get_status(db: AsyncSession = Depends(get_async_db)):
+    state = (await db.execute(select(SystemState).limit(1))).scalars().first()
+    # The ADC read (or engine IPC round trip) blocks; keep it off the event loop
+    snapshot = await run_in_threadpool(hottub_engine.snapshot)
     
-    return {
-        "current_temp": current_temp,
+    return FastJSONResponse({
+        "current_temp": snapshot["current_temp"],
         "desired_state": state,
-        "actual_relay_state": relay_states,
-        "safety_status": hottub_engine.safety_status,
-        "system_locked": hottub_engine.system_locked
-    }
+        "actual_relay_state": snapshot["relay_states"],
+        "safety_status": snapshot["safety_status"],
+        "system_locked": snapshot["system_locked"]
+    })
 
 @router.get("/weather")
-async def get_weather():
-    db = SessionLocal()
-    try:
-        settings = db.query(Settings).first()
-    finally:
-        db.close()
+async def get_weather(db: AsyncSession = Depends(get_async_db)):
+    settings = (await db.execute(select(Settings).limit(1))).scalars().first()
 
     if not settings or not settings.location:
         return {"error": "Location not set"}
 
-    now = time.time()
-    with _weather_cache_lock:
-        if (
-            _weather_cache["payload"] is not None
-            and _weather_cache["location"] == settings.location
-            and _weather_cache["expires_at"] > now
-        ):
-            return _weather_cache["payload"]
-    
     try:
-        # 1. Geocode Location
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={settings.location}&count=1&language=en&format=json"
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            geo_res = await client.get(geo_url)
-            geo_data = geo_res.json()
-            
-            if not geo_data.get("results"):
-                return {"error": "Location not found"}
-            
-            lat = geo_data["results"][0]["latitude"]
-            lon = geo_data["results"][0]["longitude"]
-            city = geo_data["results"][0]["name"]
-
-            # 2. Get Weather
-            weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,is_day,weather_code&hourly=temperature_2m,weather_code,precipitation_probability,wind_speed_10m,wind_direction_10m&daily=weather_code,temperature_2m_max,temperature_2m_min&temperature_unit=fahrenheit&wind_speed_unit=mph&timezone=auto&forecast_days=7"
-            weather_res = await client.get(weather_url)
-            weather_data = weather_res.json()
-            
-            payload = {
-                "city": city,
-                "current": weather_data["current"],
-                "hourly": weather_data["hourly"],
-                "daily": weather_data["daily"]
-            }
-            with _weather_cache_lock:
-                _weather_cache["location"] = settings.location
-                _weather_cache["payload"] = payload
-                _weather_cache["expires_at"] = time.time() + WEATHER_CACHE_TTL_SEC
-            return payload
+        return await weather_service.get(settings.location)
+    except LocationNotFound:
+        return {"error": "Location not found"}
     except Exception as e:
         return {"error": str(e)}
 
@@ -92,82 +60,195 @@ async def get_weather():
 def get_db_pool_stats():
     return get_pool_diagnostics()
 
+@router.get("/sensors")
+def get_sensor_readings():
+    """Latest filtered reading of every probe in the sensor table, keyed by role."""
+    return hottub_engine.sensor_readings()
+
+@router.get("/sensor-quality")
+def get_sensor_quality():
+    """Per-probe read errors, outlier rejections, filter lag and stuck detection."""
+    return hottub_engine.sensor_quality()
+
+@router.get("/flow")
+def get_flow_status():
+    """Debounced flow switch state plus its timestamped transition history."""
+    return hottub_engine.flow_status()
+
+@router.get("/engine-loop")
+def get_engine_loop_stats():
+    return hottub_engine.loop_stats()
+
+@router.get("/response-cache")
+def get_response_cache_stats():
+    return response_cache.stats()
+
+def _parse_history_cursor(since: str):
+    """A cursor is either a TemperatureLog id or an ISO-8601 timestamp."""
+    if since.isdigit():
+        return int(since)
+    try:
+        return datetime.fromisoformat(since.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
+
+def _apply_history_cursor(query, since: str):
+    cursor = _parse_history_cursor(since)
+    if isinstance(cursor, int):
+        return query.filter(TemperatureLog.id > cursor)
+    return query.filter(TemperatureLog.timestamp > cursor)
+
 @router.get("/history")
-def get_history(limit: int = 1440, db: Session = Depends(get_db)):
-    logs = db.query(TemperatureLog).order_by(TemperatureLog.timestamp.desc()).limit(limit).all()
-    return logs
+async def get_history(request: Request, limit: int = 1440, since: Optional[str] = None, format: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    if format == "columnar":
+        return await _get_history_columnar(request, limit, since, db)
+
+    if since is None:
+        stmt = select(TemperatureLog).order_by(TemperatureLog.timestamp.desc()).limit(limit)
+        logs = (await db.execute(stmt)).scalars().all()
+        return FastJSONResponse(logs)
+
+    # Keyset pagination: only rows newer than the client's cursor, newest `limit` of them,
+    # returned oldest-first so the client can append them to its chart.
+    stmt = _apply_history_cursor(select(TemperatureLog), since)
+    logs = list((await db.execute(stmt.order_by(TemperatureLog.id.desc()).limit(limit))).scalars().all())
+    logs.reverse()
+
+    next_cursor = logs[-1].id if logs else since
+    return FastJSONResponse({"items": logs, "next_cursor": str(next_cursor)})
+
+async def _get_history_columnar(request: Request, limit: int, since: Optional[str], db: AsyncSession):
+    """Oldest-first parallel arrays: `t` epoch seconds, `v` temperatures."""
+    stmt = select(TemperatureLog.id, TemperatureLog.timestamp, TemperatureLog.value)
+    if since is not None:
+        stmt = _apply_history_cursor(stmt, since)
+    rows = list((await db.execute(stmt.order_by(TemperatureLog.id.desc()).limit(limit))).all())
+    rows.reverse()
+
+    ids, timestamps, values = split_columns(rows, 3)
+    payload = {"t": epoch_seconds(timestamps), "v": float_column(values)}
+    if since is not None:
+        payload["next_cursor"] = str(ids[-1]) if ids else since
+    return columnar_response(request, payload)
 
 @router.get("/heating-stats")
-def get_heating_stats(db: Session = Depends(get_db)):
-    from ..db.models import HeatingEvent, Schedule
+def get_heating_stats(request: Request, format: Optional[str] = None, db: Session = Depends(get_db)):
+    from ..db.models import EnergyLog, HeatingEvent, Schedule, VacationEvent
     from sqlalchemy import func
-    from datetime import datetime, timedelta
     
     # 1. Avg Thermal Rates
     avg_heat_rate = db.query(func.avg(HeatingEvent.efficiency_score)).filter(HeatingEvent.event_type == 'heat').scalar() or 4.0
     avg_cool_rate = db.query(func.avg(HeatingEvent.efficiency_score)).filter(HeatingEvent.event_type == 'cool').scalar() or -1.5
     
-    # 2. Histogram Data (Last 10 events)
-    events = db.query(HeatingEvent).order_by(HeatingEvent.timestamp.desc()).limit(15).all()
-    histogram = [{
-        "time": e.timestamp.strftime("%m/%d %H:%M"),
-        "rate": round(abs(e.efficiency_score), 2),
-        "type": e.event_type,
-        "outside": e.outside_temp
-    } for e in reversed(events)]
-
-    # 3. Monthly Forecast Calculation
+    # 2. Histogram Data (Last 15 events)
+    events = db.execute(
+        select(HeatingEvent.timestamp, HeatingEvent.efficiency_score, HeatingEvent.event_type, HeatingEvent.outside_temp)
+        .order_by(HeatingEvent.timestamp.desc())
+        .limit(15)
+    ).all()
+    events.reverse()
+    if format == "columnar":
+        timestamps, scores, types, outside = split_columns(events, 4)
+        histogram = {
+            "t": epoch_seconds(timestamps),
+            "rate": float_column(abs(score) for score in scores),
+            "type": list(types),
+            "outside": float_column(outside),
+        }
+    else:
+        histogram = [{
+            "time": timestamp.strftime("%m/%d %H:%M"),
+            "rate": round(abs(score), 2),
+            "type": event_type,
+            "outside": outside
+        } for timestamp, score, event_type, outside in events]
+
+    # 3. ETA and standing loss from the fitted heat-loss model (refit in the background)
     settings = db.query(Settings).first()
-    all_schedules = db.query(Schedule).filter(Schedule.active == True).all()
-    now = datetime.now()
-    active_vacations = hottub_scheduler.get_active_vacations(db, now)
-    schedules = [sched for sched in all_schedules if not hottub_scheduler.schedule_disabled_by_vacation(sched, now=now, active_vacations=active_vacations)]
-    
+    current_temp = hottub_engine.snapshot()["current_temp"]
+    time_to_104 = round((104.0 - current_temp) / avg_heat_rate, 1) if avg_heat_rate > 0 else 0
+    hourly_loss = abs(avg_cool_rate)
+    model, fit = load_thermal_model(db)
+    outside_now = db.execute(
+        select(TemperatureLog.outside_temp)
+        .where(TemperatureLog.outside_temp.isnot(None))
+        .order_by(TemperatureLog.id.desc())
+        .limit(1)
+    ).scalar()
+    if model and outside_now is not None:
+        hours = model.hours_to_reach(current_temp, 104.0, outside_now)
+        time_to_104 = round(hours, 1) if hours is not None else None
+        hourly_loss = model.loss_rate(settings.default_rest_temp if settings else current_temp, outside_now)
+
+    # 4. Monthly Forecast: month-to-date actuals plus a simulation of the remaining hours
     forecast_total = 0.0
+    projection = None
     if settings:
         now = datetime.now()
-        days_in_month = 28 # Simplified for Feb or use calendar.monthrange
-        days_left = days_in_month - now.day
-        
-        # Power per hour
-        circ_cost_hr = (settings.circ_pump_watts / 1000) * settings.kwh_cost
-        heater_cost_hr = (settings.heater_watts / 1000) * settings.kwh_cost
-        
-        # Fixed Daily (Circ runs 24/7)
-        daily_fixed = circ_cost_hr * 24
-        
-        # Schedule Impact (Heater burner time estimate)
-        daily_soak_heater_hrs = 0
-        for s in schedules:
-            if s.type == "soak":
-                start_h = int(s.start_time.split(':')[0])
-                end_h = int(s.end_time.split(':')[0])
-                duration = end_h - start_h if end_h > start_h else (24 - start_h + end_h)
-                # Estimate: Heater runs 40% of the time during soak sessions to fight loss
-                daily_soak_heater_hrs += duration * 0.4
-        
-        # Maintenance Impact (Heater fighting natural cooling)
-        # Fighting avg_cool_rate loss 24/7 (minus soak time)
-        # burner_hrs_needed = abs(avg_cool_rate) / avg_heat_rate
-        maintenance_duty_cycle = abs(avg_cool_rate) / avg_heat_rate
-        daily_maint_heater_hrs = (24 - daily_soak_heater_hrs) * maintenance_duty_cycle
-        
-        total_daily_est = daily_fixed + ((daily_soak_heater_hrs + daily_maint_heater_hrs) * heater_cost_hr)
-        forecast_total = total_daily_est * days_in_month
+        schedules = db.query(Schedule).filter(Schedule.active == True).all()
+        vacations = tuple(
+            (v.start_at, v.end_at)
+            for v in db.query(VacationEvent).filter(VacationEvent.active == True).all()
+            if v.start_at and v.end_at
+        )
+        # Cached forecast only; a request never waits on the weather API
+        forecast, forecast_version = None, None
+        if weather_service.payload is not None and weather_service.location == settings.location:
+            forecast, forecast_version = weather_service.payload.get("hourly"), weather_service.fetched_at
+        fallback_outside = outside_now if outside_now is not None else PROJECTION_DEFAULT_OUTSIDE_F
+        projection = cost_projector.project(now, settings, schedules, vacations, model, current_temp,
+                                            forecast, forecast_version, fallback_outside)
 
-    return {
+        # EnergyLog.timestamp is the database's CURRENT_TIMESTAMP: naive UTC
+        month_start = datetime(now.year, now.month, 1).astimezone(timezone.utc).replace(tzinfo=None)
+        month_to_date = db.query(func.sum(EnergyLog.estimated_cost)).filter(EnergyLog.timestamp >= month_start).scalar() or 0.0
+        # Runtimes not yet flushed to the energy log
+        power_map = {
+            "heater": settings.heater_watts,
+            "circ_pump": settings.circ_pump_watts,
+            "jet_pump": settings.jet_pump_watts,
+            "light": settings.light_watts,
+            "ozone": settings.ozone_watts
+        }
+        for component, seconds in hottub_engine.snapshot()["runtimes"].items():
+            month_to_date += power_map.get(component, 0) * seconds / 3600 / 1000 * settings.kwh_cost
+        forecast_total = month_to_date + projection["remaining_cost"]
+        projection = dict(projection, month_to_date_cost=round(month_to_date, 2),
+                          remaining_cost=round(projection["remaining_cost"], 2))
+
+    payload = {
         "avg_heat_rate": round(avg_heat_rate, 2),
         "avg_cool_rate": round(avg_cool_rate, 2),
-        "estimated_time_to_104": round((104.0 - hottub_engine.controller.get_temperature()) / avg_heat_rate, 1) if avg_heat_rate > 0 else 0,
-        "hourly_loss_at_rest": round(abs(avg_cool_rate), 2),
+        "estimated_time_to_104": time_to_104,
+        "hourly_loss_at_rest": round(hourly_loss, 2),
         "histogram": histogram,
-        "projected_monthly_cost": round(forecast_total, 2)
+        "projected_monthly_cost": round(forecast_total, 2),
+        "cost_projection": projection,
+        "model": {
+            "loss_coeff": round(model.loss_coeff, 5),
+            "heat_rate": round(model.heat_rate, 2),
+            "rms_error": round(fit.rms_error, 3) if fit.rms_error is not None else None,
+            "windows": round(fit.windows, 1),
+            "outside_temp": outside_now,
+        } if model else None,
     }
+    if format == "columnar":
+        return columnar_response(request, payload)
+    return payload
 
 @router.get("/logs")
-def get_usage_logs(limit: int = 20, db: Session = Depends(get_db)):
+async def get_usage_logs(request: Request, limit: int = 20, format: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     from ..db.models import UsageLog
-    return db.query(UsageLog).order_by(UsageLog.timestamp.desc()).limit(limit).all()
+    if format == "columnar":
+        rows = (await db.execute(
+            select(UsageLog.timestamp, UsageLog.event, UsageLog.details)
+            .order_by(UsageLog.timestamp.desc())
+            .limit(limit)
+        )).all()
+        timestamps, events, details = split_columns(rows, 3)
+        return columnar_response(request, {"t": epoch_seconds(timestamps), "event": list(events), "details": list(details)})
+    logs = (await db.execute(select(UsageLog).order_by(UsageLog.timestamp.desc()).limit(limit))).scalars().all()
+    return FastJSONResponse(logs)
 
 def get_summary_no_live(start_date, end_date):
     from ..db.models import EnergyLog
@@ -215,7 +296,7 @@ def get_energy_stats(db: Session = Depends(get_db)):
         ).filter(EnergyLog.timestamp >= start_date).group_by(EnergyLog.component).all()
         return {r.component: {"kwh": r.kwh, "cost": r.cost, "runtime": r.runtime} for r in rows}
 
-    memory_runtimes = hottub_engine.runtimes 
+    memory_runtimes = hottub_engine.snapshot()["runtimes"]
     
     def get_live_summary(start_date):
         history = get_historical_summary(start_date)
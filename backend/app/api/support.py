@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import httpx
+from datetime import datetime
+from typing import Optional
+import asyncio
 import os
-import subprocess
+import re
 from sqlalchemy.orm import Session
 from ..db.session import SessionLocal
 from ..db.models import Settings
+from ..services.weather import get_http_client
+from ..services.system_logs import LEVELS, system_log_service
 
 router = APIRouter()
+LOG_FOLLOW_POLL_SEC = 0.5
 
 class BugReport(BaseModel):
     title: str
@@ -20,20 +26,59 @@ def get_db():
     finally:
         db.close()
 
-@router.get("/logs")
-def get_system_logs(is_admin: bool = True):
+def _log_filters(level: Optional[str], unit: Optional[str], pattern: Optional[str], since: Optional[str]):
+    if level is not None and level not in LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unknown level '{level}'")
     try:
-        # Fetch last 150 lines to ensure we have enough after filtering
-        cmd = ["journalctl", "-u", "opensoak.service", "-u", "opensoak-frontend.service", "-n", "150", "--no-pager", "-o", "short-iso"]
-        result = subprocess.check_output(cmd).decode("utf-8")
-        
-        # Filter out 200 OK access logs to reduce noise
-        lines = result.split('\n')
-        filtered_lines = [line for line in lines if '" 200 OK"' not in line]
-        
-        return {"logs": "\n".join(filtered_lines[-100:])}
-    except Exception as e:
-        return {"error": str(e), "logs": "Could not fetch system logs. Ensure journalctl is available."}
+        compiled = re.compile(pattern) if pattern else None
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid pattern: {e}")
+    try:
+        since_ts = datetime.fromisoformat(since.replace("Z", "+00:00")).timestamp() if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid since timestamp")
+    return {"level": level, "unit": unit, "pattern": compiled, "since": since_ts}
+
+@router.get("/logs")
+def get_system_logs(
+    is_admin: bool = True,
+    level: Optional[str] = None,
+    unit: Optional[str] = None,
+    pattern: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = 100,
+):
+    filters = _log_filters(level, unit, pattern, since)
+    if system_log_service.source is None:
+        return {"error": "Log source unavailable", "logs": "Could not fetch system logs. Ensure journalctl is available."}
+
+    entries = system_log_service.query(limit=limit, **filters)
+    return {
+        "logs": "\n".join(system_log_service.format_entry(e) for e in entries),
+        "cursor": entries[-1]["seq"] if entries else system_log_service.seq,
+    }
+
+@router.get("/logs/follow")
+async def follow_system_logs(
+    request: Request,
+    level: Optional[str] = None,
+    unit: Optional[str] = None,
+    pattern: Optional[str] = None,
+    since: Optional[str] = None,
+    cursor: int = 0,
+):
+    """Server-sent events stream of new buffered log lines; `cursor` resumes after a seq."""
+    filters = _log_filters(level, unit, pattern, since)
+
+    async def event_stream():
+        last_seq = cursor
+        while not await request.is_disconnected():
+            for entry in system_log_service.query(after_seq=last_seq, limit=0, **filters):
+                last_seq = entry["seq"]
+                yield f"id: {last_seq}\ndata: {system_log_service.format_entry(entry)}\n\n"
+            await asyncio.sleep(LOG_FOLLOW_POLL_SEC)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @router.post("/report-bug")
 async def report_bug(report: BugReport, db: Session = Depends(get_db)):
@@ -64,12 +109,11 @@ async def report_bug(report: BugReport, db: Session = Depends(get_db)):
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            res = await client.post(url, headers=headers, json=payload)
-            if res.status_code != 201:
-                raise HTTPException(status_code=res.status_code, detail=f"GitHub API Error: {res.text}")
-            
-            data = res.json()
-            return {"status": "success", "issue_url": data.get("html_url")}
+        res = await get_http_client().post(url, headers=headers, json=payload)
+        if res.status_code != 201:
+            raise HTTPException(status_code=res.status_code, detail=f"GitHub API Error: {res.text}")
+        
+        data = res.json()
+        return {"status": "success", "issue_url": data.get("html_url")}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
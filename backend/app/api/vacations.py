@@ -3,10 +3,12 @@ from typing import List
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, model_validator
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..db.models import VacationEvent
-from ..db.session import SessionLocal
+from ..db.session import AsyncSessionLocal, SessionLocal
 
 router = APIRouter()
 
@@ -39,9 +41,14 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 @router.get("/", response_model=List[VacationResponse])
-def get_vacations(db: Session = Depends(get_db)):
-    return db.query(VacationEvent).order_by(VacationEvent.start_at.asc()).all()
+async def get_vacations(db: AsyncSession = Depends(get_async_db)):
+    return (await db.execute(select(VacationEvent).order_by(VacationEvent.start_at.asc()))).scalars().all()
 
 
 @router.post("/", response_model=VacationResponse)
@@ -0,0 +1,57 @@
+"""Columnar (parallel-array) encoding for the time-series endpoints.
+
+Rows are fetched as plain tuples with Core ``select`` and turned into one list per
+column, so field names are sent once instead of once per row. Clients that send
+``Accept: application/x-msgpack`` get the same payload as MessagePack with
+single-precision floats.
+"""
+import calendar
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+
+def epoch_seconds(timestamps: Iterable) -> List[Optional[int]]:
+    """Convert datetimes to integer epoch seconds. Naive values are stored as UTC."""
+    out = []
+    for ts in timestamps:
+        if ts is None:
+            out.append(None)
+        elif ts.tzinfo is None:
+            out.append(calendar.timegm(ts.timetuple()))
+        else:
+            out.append(int(ts.timestamp()))
+    return out
+
+
+def float_column(values: Iterable, ndigits: int = 2) -> List[Optional[float]]:
+    return [None if v is None else round(float(v), ndigits) for v in values]
+
+
+def split_columns(rows, width: int):
+    """Transpose a list of result tuples into ``width`` column tuples."""
+    if not rows:
+        return ((),) * width
+    return tuple(zip(*rows))
+
+
+def wants_msgpack(request: Request) -> bool:
+    return MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def columnar_response(request: Request, payload: Dict[str, Any]):
+    if not wants_msgpack(request):
+        return payload
+    if not HAS_MSGPACK:
+        raise HTTPException(status_code=406, detail="MessagePack encoding requires the msgpack package")
+    body = msgpack.packb(payload, use_single_float=True)
+    return Response(content=body, media_type=MSGPACK_MEDIA_TYPE)
@@ -0,0 +1,40 @@
+"""orjson-backed JSON response used as the app-wide default response class.
+
+orjson serializes datetimes and NumPy scalars/arrays natively, so temperatures coming
+straight from the controller (``numpy.float64``) need no conversion. SQLAlchemy model
+instances are rendered as a dict of their column values, which lets hot endpoints return
+``FastJSONResponse(rows)`` directly and skip FastAPI's ``jsonable_encoder`` pass. When
+orjson is not installed the class behaves exactly like ``JSONResponse``.
+"""
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any):
+    table = getattr(obj, "__table__", None)
+    if table is not None:
+        return {column.key: getattr(obj, column.key) for column in table.columns}
+    # Fall back to FastAPI's encoder for anything orjson does not know (pydantic models, sets...)
+    return jsonable_encoder(obj)
+
+
+def render_json(content: Any) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
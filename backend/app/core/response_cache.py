@@ -0,0 +1,216 @@
+"""Shared cache of already-serialized, pre-compressed responses for hot GET endpoints.
+
+Each cached route depends on a set of "topics": table names, bumped whenever a
+transaction that wrote the table commits, plus ``engine``, bumped by the control loop
+once per tick. A response is rebuilt only when one of its topic versions changes, so any
+number of dashboards polling the same endpoint share one serialization per data change.
+
+Writes are tracked on the Core connection, so ORM flushes, bulk ``query.delete()`` /
+``update()``, ``session.execute(insert(...))``, plain ``engine.begin()`` blocks and the
+async engine are all covered. Raw ``text()`` DML is not; bump its topic by hand.
+"""
+import asyncio
+import gzip
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi.responses import Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.middleware.base import BaseHTTPMiddleware
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+COMPRESS_MIN_BYTES = 512
+
+# Route path -> topics whose versions key the cached body
+CACHED_ROUTES = {
+    "/api/status/": ("engine", "system_state"),
+    "/api/status/history": ("temperature_logs",),
+    "/api/status/energy": ("engine", "energy_logs", "settings"),
+    "/api/status/heating-stats": ("engine", "heating_events", "settings", "schedules", "vacation_events"),
+}
+# Long-lived streams go straight to the app; relaying them through call_next
+# would hide client disconnects from the endpoint
+UNCACHED_STREAMS = {"/api/support/logs/follow"}
+
+_version_lock = threading.Lock()
+_versions: Dict[str, int] = {}
+# Topics that also expire on wall-clock buckets, for writers in other processes
+# (the engine process, other API workers) that cannot bump this process's counters
+_clock_topics: Dict[str, float] = {}
+
+
+def bump(topic: str):
+    with _version_lock:
+        _versions[topic] = _versions.get(topic, 0) + 1
+
+
+def version_by_clock(interval: float, topics: Optional[Iterable[str]] = None):
+    if topics is None:
+        topics = {topic for route_topics in CACHED_ROUTES.values() for topic in route_topics}
+    for topic in topics:
+        _clock_topics[topic] = interval
+
+
+def data_version(topics: Iterable[str]) -> Tuple:
+    now = time.monotonic()
+    with _version_lock:
+        return tuple(
+            (int(now // _clock_topics[topic]), _versions.get(topic, 0)) if topic in _clock_topics else _versions.get(topic, 0)
+            for topic in topics
+        )
+
+
+@event.listens_for(Engine, "begin")
+def _start_written_tables(conn):
+    # conn.info outlives the checkout; never carry tables over from a reset transaction
+    conn.info["written_tables"] = set()
+
+
+@event.listens_for(Engine, "after_execute")
+def _track_written_tables(conn, clauseelement, *_args):
+    if isinstance(clauseelement, UpdateBase):
+        conn.info.setdefault("written_tables", set()).add(clauseelement.table.name)
+
+
+@event.listens_for(Engine, "commit")
+def _bump_written_tables(conn):
+    for table in conn.info.pop("written_tables", ()):
+        bump(table)
+
+
+@event.listens_for(Engine, "rollback")
+def _discard_written_tables(conn):
+    conn.info.pop("written_tables", None)
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, media_type: Optional[str], version: Tuple[int, ...]):
+        self.version = version
+        self.media_type = media_type
+        self.bodies = {"identity": body}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            if HAS_BROTLI:
+                self.bodies["br"] = brotli.compress(body, quality=5)
+        self.size = sum(len(b) for b in self.bodies.values())
+
+    def respond(self, accept_encoding: str) -> Response:
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+        headers = {"Vary": "Accept-Encoding"}
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.bodies:
+                headers["Content-Encoding"] = encoding
+                return Response(content=self.bodies[encoding], media_type=self.media_type, headers=headers)
+        return Response(content=self.bodies["identity"], media_type=self.media_type, headers=headers)
+
+
+class ResponseCache:
+    """LRU of CachedResponse entries, bounded by total stored bytes."""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, record: bool = True) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                if record:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record:
+                self.hits += 1
+            return entry
+
+    def put(self, key, entry: CachedResponse):
+        if entry.size > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.size
+            self._entries[key] = entry
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "brotli": HAS_BROTLI,
+            }
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, cache: ResponseCache):
+        super().__init__(app)
+        self.cache = cache
+        # key -> [lock, requests using it]; dropped once the last one is done
+        self._build_locks: Dict[tuple, list] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in UNCACHED_STREAMS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+    async def dispatch(self, request, call_next):
+        topics = CACHED_ROUTES.get(request.url.path)
+        if request.method != "GET" or topics is None:
+            return await call_next(request)
+
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), request.headers.get("accept", ""))
+        accept_encoding = request.headers.get("accept-encoding", "")
+        entry = self.cache.get(key, data_version(topics))
+        if entry is not None:
+            return entry.respond(accept_encoding)
+
+        # Concurrent misses for the same key wait for a single rebuild
+        build = self._build_locks.setdefault(key, [asyncio.Lock(), 0])
+        build[1] += 1
+        try:
+            async with build[0]:
+                version = data_version(topics)
+                entry = self.cache.get(key, version, record=False)
+                if entry is None:
+                    response = await call_next(request)
+                    if response.status_code != 200:
+                        return response
+                    body = b"".join([chunk async for chunk in response.body_iterator])
+                    entry = CachedResponse(body, response.headers.get("content-type"), version)
+                    self.cache.put(key, entry)
+        finally:
+            build[1] -= 1
+            if build[1] == 0:
+                self._build_locks.pop(key, None)
+        return entry.respond(accept_encoding)
+
+
+response_cache = ResponseCache()
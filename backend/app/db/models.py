@@ -30,6 +30,8 @@ class TemperatureLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     value = Column(Float)
+    outside_temp = Column(Float, nullable=True) # latest weather reading when logged
+    heater_duty = Column(Float, nullable=True) # fraction of the interval since the previous log the heater was on
 
 class UsageLog(Base):
     __tablename__ = "usage_logs"
@@ -81,6 +83,33 @@ class VacationEvent(Base):
     end_at = Column(DateTime(timezone=True))
     active = Column(Boolean, default=True)
 
+class GeocodeResult(Base):
+    """Persisted Open-Meteo geocoding lookup for a Settings.location value"""
+    __tablename__ = "geocode_results"
+    id = Column(Integer, primary_key=True, index=True)
+    location = Column(String, unique=True, index=True)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    city = Column(String)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ThermalModelFit(Base):
+    """Fitted heat-loss model plus the running least-squares sums it is refit from"""
+    __tablename__ = "thermal_model_fit"
+    id = Column(Integer, primary_key=True, index=True)
+    loss_coeff = Column(Float) # 1/hour, Newton cooling toward outside air
+    heat_rate = Column(Float) # F/hour with the heater on
+    windows = Column(Float, default=0.0) # effective (decayed) number of fitted windows
+    rms_error = Column(Float, nullable=True) # F/hour
+    last_log_id = Column(Integer, default=0) # TemperatureLog rows up to here are folded in
+    xtx_00 = Column(Float, default=0.0)
+    xtx_01 = Column(Float, default=0.0)
+    xtx_11 = Column(Float, default=0.0)
+    xty_0 = Column(Float, default=0.0)
+    xty_1 = Column(Float, default=0.0)
+    yty = Column(Float, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class SystemState(Base):
     """Stores the desired state (e.g. if the user turned the light on)"""
     __tablename__ = "system_state"
@@ -3,6 +3,7 @@ import os
 import threading
 import time
 from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from .models import Base
 
@@ -26,6 +27,28 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url):
+    """Map the sync URL to its asyncio driver (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql://", "postgres://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# Async path for request handlers: waits on the database without holding a threadpool thread
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(DATABASE_URL))
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 _pool_lock = threading.Lock()
 _checked_out = 0
 _high_watermark = 0
@@ -64,6 +87,25 @@ def _on_checkin(*_args):
         _checked_out = max(0, _checked_out - 1)
 
 
+_async_checked_out = 0
+_async_high_watermark = 0
+
+
+@event.listens_for(async_engine.sync_engine, "checkout")
+def _on_async_checkout(*_args):
+    global _async_checked_out, _async_high_watermark
+    with _pool_lock:
+        _async_checked_out += 1
+        _async_high_watermark = max(_async_high_watermark, _async_checked_out)
+
+
+@event.listens_for(async_engine.sync_engine, "checkin")
+def _on_async_checkin(*_args):
+    global _async_checked_out
+    with _pool_lock:
+        _async_checked_out = max(0, _async_checked_out - 1)
+
+
 def get_pool_diagnostics():
     with _pool_lock:
         return {
@@ -74,6 +116,12 @@ def get_pool_diagnostics():
             "timeout_sec": POOL_TIMEOUT,
             "warn_at": POOL_WARN_AT,
             "pool_status": _pool_status(),
+            # Pool behind AsyncSessionLocal (hot read endpoints); same size limits
+            "async": {
+                "checked_out": _async_checked_out,
+                "high_watermark": _async_high_watermark,
+                "pool_status": async_engine.pool.status(),
+            },
         }
 
 def init_db():
@@ -91,9 +139,14 @@ def init_db():
 def _apply_schema_updates():
     inspector = inspect(engine)
     schedule_columns = {column["name"] for column in inspector.get_columns("schedules")}
+    temperature_columns = {column["name"] for column in inspector.get_columns("temperature_logs")}
 
     with engine.begin() as connection:
         if "pause_until" not in schedule_columns:
             connection.execute(text("ALTER TABLE schedules ADD COLUMN pause_until DATETIME"))
         if "disable_during_vacations" not in schedule_columns:
             connection.execute(text("ALTER TABLE schedules ADD COLUMN disable_during_vacations BOOLEAN DEFAULT 0"))
+        if "outside_temp" not in temperature_columns:
+            connection.execute(text("ALTER TABLE temperature_logs ADD COLUMN outside_temp FLOAT"))
+        if "heater_duty" not in temperature_columns:
+            connection.execute(text("ALTER TABLE temperature_logs ADD COLUMN heater_duty FLOAT"))
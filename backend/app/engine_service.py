@@ -0,0 +1,38 @@
+"""Engine process entry point: runs the control loop and scheduler without the API.
+
+Once it holds the leader lease the engine owns GPIO/SPI and serves API workers over
+the engine IPC socket and the shared-memory status block.
+
+    ENGINE_MODE=remote uvicorn app.main:app --workers 4   # API
+    python -m app.engine_service                          # hardware
+"""
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from .db.session import init_db
+from .services.engine import engine as hottub_engine
+from .services.engine_ipc import ENGINE_SOCKET
+from .services.scheduler import scheduler as hottub_scheduler
+
+
+def main():
+    init_db()
+    hottub_engine.start()
+    hottub_scheduler.start()
+    print(f"OpenSoak engine started; the leader serves {ENGINE_SOCKET}")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    stopping.wait()
+
+    hottub_scheduler.stop()
+    hottub_engine.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,29 @@ try:
     import digitalio
     import board
     import adafruit_mcp3xxx.mcp3008 as MCP
-    from adafruit_mcp3xxx.analog_in import AnalogIn
     HAS_HARDWARE = True
 except ImportError:
     HAS_HARDWARE = False
 
 import numpy as np
+import os
+import threading
 import time
+import warnings
 from typing import Dict, Optional
 
+from .flow_switch import FLOW_DEBOUNCE_MS, FlowMonitor
+from .sensor_quality import SensorQuality
+from .sensors import ADC_MAX_CODE, TemperatureFilter, load_sensor_table
+
+# BCM pin of the flow switch; unset keeps the old "always flowing" placeholder
+FLOW_SWITCH_PIN = int(os.getenv("FLOW_SWITCH_PIN")) if os.getenv("FLOW_SWITCH_PIN") else None
+FLOW_SWITCH_ACTIVE_LOW = os.getenv("FLOW_SWITCH_ACTIVE_LOW", "True").lower() == "true"
+
+# Conversions per channel per temperature read; the median of the burst is used
+ADC_BURST_SAMPLES = int(os.getenv("ADC_BURST_SAMPLES", "8"))
+ADC_SPI_BAUDRATE = int(os.getenv("ADC_SPI_BAUDRATE", "1000000"))
+
 class HotTubController:
     # GPIO Pins (BCM)
     CIRC_PUMP = 22
@@ -21,75 +35,131 @@ class HotTubController:
     LIGHT = 5
     OZONE = 6
     
-    # ADC Setup
-    SERIES_RESISTOR = 10000
+    # ADC Setup (per-probe calibration lives in the sensor table, see sensors.py)
     VREF = 3.3
-    TEMP_VALUES = [6.8, 23.9, 49.0]
-    R_VALUES = [23300, 10080, 3300]
-    TEMP_OFFSET = 3.0 # Adjusted from 2.6 to correct remaining ~0.7F under-reading
 
     def __init__(self):
+        self._init_adc_stats()
+        self.sensors = load_sensor_table(self.VREF)
+        self.temp_filter = TemperatureFilter(len(self.sensors))
+        self.quality = SensorQuality(self.sensors)
+        self.flow_pin_ready = False
+        self.flow = FlowMonitor(self._read_flow_pin)
+
         if not HAS_HARDWARE:
             print("Hardware not detected or RPi.GPIO not installed. Initialization skipped.")
             return
 
-        # GPIO Setup
+        # GPIO Setup (outputs are claimed later by the engine leader, see setup_outputs)
         GPIO.setmode(GPIO.BCM)
         GPIO.setwarnings(False)
         self.pins = [self.CIRC_PUMP, self.HEATER, self.JET_PUMP, self.LIGHT, self.OZONE]
-        for pin in self.pins:
-            GPIO.setup(pin, GPIO.OUT)
-            GPIO.output(pin, GPIO.HIGH) # Active Low: High is OFF
 
         # SPI/ADC Setup
         self.spi = busio.SPI(clock=board.SCK, MISO=board.MISO, MOSI=board.MOSI)
         self.cs = digitalio.DigitalInOut(board.CE0)
-        self.mcp = MCP.MCP3008(self.spi, self.cs)
-        self.chan0 = AnalogIn(self.mcp, MCP.P0)
-        self.chan1 = AnalogIn(self.mcp, MCP.P1) # Placeholder for Hi-Limit
-
-        # Pre-calculate Steinhart-Hart coefficients
-        self.coefficients = self._calculate_coefficients(self.TEMP_VALUES, self.R_VALUES)
-        
-        # Filtering state
-        self.temp_history = {0: [], 1: []}
-        self.history_size = 10
+        self.mcp = MCP.MCP3008(self.spi, self.cs) # also puts CS in its idle-high output state
 
-    def _calculate_coefficients(self, temp_values, r_values):
-        ln_resistances = np.log(r_values)
-        inv_temp_values = 1 / (np.array(temp_values) + 273.15)
-        A = np.vstack([np.ones(3), ln_resistances, ln_resistances ** 3]).T
-        return np.linalg.lstsq(A, inv_temp_values, rcond=None)[0]
+    def _init_adc_stats(self):
+        self._adc_commands = {}
+        self.scan_lock = threading.Lock()
+        self.adc_counters = {"bursts": 0, "samples": 0, "errors": 0, "invalid_samples": 0,
+                             "last_duration": 0.0, "max_duration": 0.0}
 
-    def get_temperature(self, sensor: int = 0) -> float:
+    def setup_outputs(self):
+        """Configure relay pins as outputs, all OFF. Only the engine leader calls this."""
         if not HAS_HARDWARE:
-            return 0.0
-            
+            return
+        for pin in self.pins:
+            GPIO.setup(pin, GPIO.OUT)
+            GPIO.output(pin, GPIO.HIGH) # Active Low: High is OFF
+
+        if FLOW_SWITCH_PIN is not None:
+            GPIO.setup(FLOW_SWITCH_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP if FLOW_SWITCH_ACTIVE_LOW else GPIO.PUD_DOWN)
+            self.flow_pin_ready = True
+            self.flow.poll()
+            # The kernel reports edges; RPi.GPIO's bouncetime drops the worst of the chatter
+            GPIO.add_event_detect(FLOW_SWITCH_PIN, GPIO.BOTH, callback=lambda channel: self.flow.on_edge(),
+                                  bouncetime=max(1, int(FLOW_DEBOUNCE_MS)))
+
+    def _read_flow_pin(self) -> bool:
+        if not self.flow_pin_ready:
+            return True
+        level = GPIO.input(FLOW_SWITCH_PIN)
+        return level == (GPIO.LOW if FLOW_SWITCH_ACTIVE_LOW else GPIO.HIGH)
+
+    def read_adc_burst(self, channels=(0, 1), samples: int = ADC_BURST_SAMPLES) -> np.ndarray:
+        """Raw 10-bit codes, shape (samples, len(channels)), from one SPI burst.
+
+        The bus is locked and configured once for the whole burst and channels are
+        interleaved so each row is one near-simultaneous scan. The MCP3008 starts a
+        conversion on the falling edge of CS, so CS is still pulsed per conversion, but
+        directly rather than through AnalogIn, which re-locks and reconfigures the bus
+        on every read.
+        """
+        commands = self._adc_commands.get(channels)
+        if commands is None:
+            # Start bit, single-ended mode + channel, then clocks for the 10 result bits
+            commands = [bytes((0x01, 0x80 | (channel << 4), 0x00)) for channel in channels]
+            self._adc_commands[channels] = commands
+        codes = np.empty((samples, len(channels)), dtype=np.uint16)
+        reply = bytearray(3)
+
+        start = time.perf_counter()
+        while not self.spi.try_lock():
+            pass
         try:
-            chan = self.chan0 if sensor == 0 else self.chan1
-            adc_voltage = chan.voltage
-            if adc_voltage <= 0: return 0.0
-            resistance = self.SERIES_RESISTOR * (self.VREF - adc_voltage) / adc_voltage
-            ln_resistance = np.log(resistance)
-            temp_kelvin = 1 / (self.coefficients[0] + self.coefficients[1] * ln_resistance + self.coefficients[2] * (ln_resistance ** 3))
-            temp_celsius = temp_kelvin - 273.15
-            temp_fahrenheit = (temp_celsius + self.TEMP_OFFSET) * 9/5 + 32
-            
-            # Simple outlier rejection and moving average
-            history = self.temp_history[sensor]
-            if history:
-                # Reject values that jump more than 5 degrees in one reading (likely noise)
-                if abs(temp_fahrenheit - history[-1]) > 5.0:
-                    return sum(history) / len(history)
-            
-            history.append(temp_fahrenheit)
-            if len(history) > self.history_size:
-                history.pop(0)
-                
-            return sum(history) / len(history)
-        except Exception as e:
-            print(f"Error reading temperature on sensor {sensor}: {e}")
-            return 0.0
+            self.spi.configure(baudrate=ADC_SPI_BAUDRATE)
+            for row in range(samples):
+                for column, command in enumerate(commands):
+                    self.cs.value = False
+                    self.spi.write_readinto(command, reply)
+                    self.cs.value = True
+                    codes[row, column] = ((reply[1] & 0x03) << 8) | reply[2]
+        finally:
+            self.spi.unlock()
+        duration = time.perf_counter() - start
+
+        self.adc_counters["bursts"] += 1
+        self.adc_counters["samples"] += codes.size
+        self.adc_counters["last_duration"] = duration
+        self.adc_counters["max_duration"] = max(self.adc_counters["max_duration"], duration)
+        return codes
+
+    def read_temperatures(self, samples: int = ADC_BURST_SAMPLES) -> np.ndarray:
+        """Filtered temperatures of every sensor in the table (table order), one burst."""
+        if not HAS_HARDWARE:
+            return np.zeros(len(self.sensors))
+
+        with self.scan_lock:
+            start = time.perf_counter()
+            try:
+                codes = self.read_adc_burst(self.sensors.channels, samples).astype(np.float64)
+                invalid = (codes <= 0) | (codes >= ADC_MAX_CODE)
+                self.adc_counters["invalid_samples"] += int(invalid.sum())
+                codes[invalid] = np.nan
+                # Conversion is monotonic, so convert the median code rather than every sample
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning) # all-NaN column -> NaN
+                    median_codes = np.nanmedian(codes, axis=0)
+                    spread = np.nanmax(codes, axis=0) - np.nanmin(codes, axis=0)
+                temps = self.sensors.convert(median_codes)
+            except Exception as e:
+                self.adc_counters["errors"] += 1
+                self.quality.record_error(time.perf_counter() - start)
+                print(f"Error reading temperatures on channels {self.sensors.channels}: {e}")
+                return np.zeros(len(self.sensors))
+            filtered = self.temp_filter.update(temps)
+            self.quality.record_scan(time.perf_counter() - start, temps, filtered, self.temp_filter.rejected,
+                                     invalid_samples=invalid.sum(axis=0), spread=spread, median_codes=median_codes)
+            return filtered
+
+    def get_temperature(self, sensor: int = 0) -> float:
+        """Reading of the probe on ADC channel `sensor` (0 water, 1 hi-limit)."""
+        return float(self.read_temperatures()[self.sensors.channels.index(sensor)])
+
+    def adc_stats(self) -> dict:
+        return dict(self.adc_counters, burst_samples=ADC_BURST_SAMPLES)
 
     def set_relay(self, pin: int, state: bool):
         if not HAS_HARDWARE:
@@ -103,6 +173,14 @@ class HotTubController:
             if not self.get_relay_state(self.CIRC_PUMP):
                 print("Safety Violation: Attempted to turn on heater without circulation pump!")
                 return False
+            # ...and flow. Checked under the flow lock: a loss edge either lands first and
+            # blocks this, or lands after and its handler switches the heater back off.
+            with self.flow.lock:
+                if not self.flow.flowing:
+                    print("Safety Violation: Attempted to turn on heater without flow!")
+                    return False
+                GPIO.output(pin, GPIO.LOW)
+            return True
         
         GPIO.output(pin, GPIO.LOW if state else GPIO.HIGH)
         return True
@@ -132,11 +210,8 @@ class HotTubController:
         }
 
     def is_flow_detected(self) -> bool:
-        """
-        Placeholder for flow switch logic. 
-        Returns True for now until we know the GPIO pin.
-        """
-        return True
+        """Debounced flow switch state, updated from GPIO edge interrupts."""
+        return self.flow.flowing
 
     def emergency_shutdown(self):
         if not HAS_HARDWARE:
@@ -0,0 +1,91 @@
+"""Edge-driven flow switch state shared by the real and simulated controllers.
+
+The real controller registers ``on_edge`` as a GPIO interrupt callback; the simulator
+calls it when a scripted or relay-driven flow change happens. Edges arriving within
+the debounce window of the previous edge are treated as contact bounce. Because a
+rejected bounce can be the last edge of a burst, the engine also calls ``poll()`` each
+control tick to reconcile with the pin level once it has been quiet for the window.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+FLOW_DEBOUNCE_MS = float(os.getenv("FLOW_DEBOUNCE_MS", "50"))
+FLOW_HISTORY_SIZE = int(os.getenv("FLOW_HISTORY_SIZE", "200"))
+
+
+class FlowMonitor:
+    def __init__(self, read_level: Callable[[], bool], debounce_ms: float = FLOW_DEBOUNCE_MS,
+                 history_size: int = FLOW_HISTORY_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.read_level = read_level
+        self.debounce = debounce_ms / 1000.0
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.flowing = bool(read_level())
+        self.changed_at = clock() # monotonic time of the last accepted transition
+        self.last_edge_at = None
+        self.edges = 0
+        self.bounces = 0
+        self.history = deque(maxlen=history_size) # (epoch seconds, flowing)
+        self.history.append((time.time(), self.flowing))
+        self.loss_listeners: List[Callable[[], None]] = []
+
+    def on_loss(self, callback: Callable[[], None]):
+        """Call `callback` from the edge's thread as soon as flow is lost."""
+        self.loss_listeners.append(callback)
+
+    def on_edge(self, level: Optional[bool] = None):
+        now = self.clock()
+        level = bool(self.read_level()) if level is None else bool(level)
+        with self.lock:
+            self.edges += 1
+            bouncing = self.last_edge_at is not None and now - self.last_edge_at < self.debounce
+            self.last_edge_at = now
+            if bouncing:
+                self.bounces += 1
+                return
+            lost = self._accept(level, now)
+        if lost:
+            self._notify_loss()
+
+    def poll(self):
+        """Reconcile with the pin once edges have settled (catches a dropped final edge)."""
+        now = self.clock()
+        with self.lock:
+            if self.last_edge_at is not None and now - self.last_edge_at < self.debounce:
+                return
+            lost = self._accept(bool(self.read_level()), now)
+        if lost:
+            self._notify_loss()
+
+    def _accept(self, level: bool, now: float) -> bool:
+        if level == self.flowing:
+            return False
+        self.flowing = level
+        self.changed_at = now
+        self.history.append((time.time(), level))
+        return not level
+
+    def _notify_loss(self):
+        for callback in self.loss_listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Flow loss handler error: {e}")
+
+    def lost_for(self) -> float:
+        """Seconds since flow was lost, or 0.0 while flowing."""
+        with self.lock:
+            return 0.0 if self.flowing else self.clock() - self.changed_at
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "flowing": self.flowing,
+                "debounce_ms": self.debounce * 1000.0,
+                "edges": self.edges,
+                "bounces": self.bounces,
+                "history": [{"t": t, "flowing": level} for t, level in self.history],
+            }
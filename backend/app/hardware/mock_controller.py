@@ -1,6 +1,15 @@
+import numpy as np
 import random
+import threading
 import time
-from typing import Dict
+from typing import Dict, Iterable, Tuple
+
+from .flow_switch import FlowMonitor
+from .sensor_quality import SensorQuality
+from .sensors import load_sensor_table
+
+SIM_HEAT_F_PER_MIN = 0.5 # below the rate-of-rise runaway threshold
+SIM_COOL_F_PER_MIN = 0.1
 
 class MockHotTubController:
     """Simulates hot tub hardware for local testing without a Raspberry Pi."""
@@ -15,18 +24,31 @@ class MockHotTubController:
         self.state = {pin: False for pin in self.pins}
         self.state[self.CIRC_PUMP] = True # Default to ON
         self.simulated_temp = 100.0 # Start at 100 degrees
-        self.flow_detected = True
+        self.last_physics = time.monotonic()
+        self.flow_blocked = False # simulated clogged filter / airlock
+        self.ambient_temp = 60.0
+        self.sensors = load_sensor_table()
+        self.quality = SensorQuality(self.sensors)
+        self.flow = FlowMonitor(self._read_flow_level)
+        self.adc_counters = {"bursts": 0, "samples": 0, "errors": 0, "invalid_samples": 0,
+                             "last_duration": 0.0, "max_duration": 0.0}
         print("🔧 Running in HARDWARE SIMULATION MODE")
 
+    def setup_outputs(self):
+        pass
+
     def get_temperature(self, sensor: int = 0) -> float:
-        # Simulate physics: 
-        # If heater is on, temp goes up slowly. 
-        # Otherwise, it drops slowly toward ambient (70).
+        # Simulate physics per elapsed second, not per read, so faster safety scans
+        # don't look like runaway heating:
+        # If heater is on, temp goes up (0.5F/min, a fast demo heater).
+        # Otherwise, it drops slowly toward ambient (70) at 0.1F/min.
+        now = time.monotonic()
+        elapsed, self.last_physics = now - self.last_physics, now
         if self.state[self.HEATER]:
-            self.simulated_temp += 0.05
+            self.simulated_temp += SIM_HEAT_F_PER_MIN * elapsed / 60
         else:
             if self.simulated_temp > 70:
-                self.simulated_temp -= 0.01
+                self.simulated_temp -= SIM_COOL_F_PER_MIN * elapsed / 60
         
         # Add a tiny bit of noise
         reading = self.simulated_temp + (random.random() * 0.1)
@@ -36,9 +58,51 @@ class MockHotTubController:
             return reading + 0.5
         return reading
 
-    def is_flow_detected(self) -> bool:
+    def _read_flow_level(self) -> bool:
         # Flow should only exist if Circ Pump is ON in simulation
-        return self.state[self.CIRC_PUMP]
+        return self.state[self.CIRC_PUMP] and not self.flow_blocked
+
+    def read_temperatures(self, samples: int = 1) -> np.ndarray:
+        """One simulated scan of every probe in the sensor table (table order)."""
+        water = self.get_temperature(0)
+        heater_on = self.state[self.HEATER]
+        simulated = {
+            "water": water,
+            "hi_limit": water + 0.5,
+            "heater_outlet": water + (6.0 if heater_on else 0.3),
+            "ambient": self.ambient_temp,
+            "equipment_bay": self.ambient_temp + (12.0 if self.state[self.CIRC_PUMP] else 4.0),
+        }
+        self.adc_counters["bursts"] += 1
+        self.adc_counters["samples"] += len(self.sensors)
+        readings = np.array([simulated.get(role, self.ambient_temp) for role in self.sensors.roles])
+        readings += np.random.random(len(readings)) * 0.1
+        self.quality.record_scan(0.0, readings, readings, np.zeros(len(readings), dtype=bool))
+        return readings
+
+    def adc_stats(self) -> dict:
+        return dict(self.adc_counters, burst_samples=1)
+
+    def is_flow_detected(self) -> bool:
+        return self.flow.flowing
+
+    def set_flow_blocked(self, blocked: bool, bounce: int = 0):
+        """Simulate the flow switch opening/closing, with `bounce` chattering edges."""
+        self.flow_blocked = blocked
+        level = self._read_flow_level()
+        for i in range(bounce):
+            self.flow.on_edge(level if i % 2 == 0 else not level)
+        self.flow.on_edge(level)
+
+    def script_flow(self, steps: Iterable[Tuple[float, bool]], bounce: int = 0) -> threading.Thread:
+        """Play back (delay_seconds, blocked) steps on a background thread."""
+        def run():
+            for delay, blocked in steps:
+                time.sleep(delay)
+                self.set_flow_blocked(blocked, bounce)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
 
     def set_relay(self, pin: int, state: bool):
         # Safety Interlock Simulation
@@ -46,8 +110,17 @@ class MockHotTubController:
             if not self.state[self.CIRC_PUMP]:
                 print("SIMULATOR: Safety Violation! Heater blocked because Circ Pump is OFF.")
                 return False
+            with self.flow.lock:
+                if not self.flow.flowing:
+                    print("SIMULATOR: Safety Violation! Heater blocked because there is no flow.")
+                    return False
+                self.state[pin] = state
+            return True
         
+        previous = self.state.get(pin)
         self.state[pin] = state
+        if pin == self.CIRC_PUMP and previous != state:
+            self.flow.on_edge()
         return True
 
     def get_relay_state(self, pin: int) -> bool:
@@ -65,6 +138,7 @@ class MockHotTubController:
     def emergency_shutdown(self):
         for pin in self.pins:
             self.state[pin] = False
+        self.flow.on_edge()
         print("SIMULATOR: EMERGENCY SHUTDOWN EXECUTED")
 
     def cleanup(self):
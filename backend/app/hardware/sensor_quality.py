@@ -0,0 +1,155 @@
+"""Per-probe read quality: errors, rail samples, rejected outliers, filter lag, stuck values.
+
+Counters are NumPy arrays (one slot per sensor table column) updated once per scan,
+and ``SensorQualityCollector`` turns them into Prometheus families at scrape time, so
+the control tick pays for a few array operations regardless of how many probes exist.
+"""
+import os
+import threading
+
+import numpy as np
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+# A probe is "stuck" when its burst has no spread at all and its median code has not
+# moved for this many consecutive scans; a live thermistor always jitters by an LSB
+SENSOR_STUCK_SCANS = int(os.getenv("SENSOR_STUCK_SCANS", "120"))
+# Status only reflects invalid reads within this many recent scans; the counters keep all
+SENSOR_QUALITY_WINDOW = int(os.getenv("SENSOR_QUALITY_WINDOW", "120"))
+
+DELTA_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0) # |filtered - raw|, F
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25) # seconds
+
+
+def _histogram_buckets(counts, bounds):
+    cumulative = np.cumsum(counts)
+    buckets = [(str(bound), float(cumulative[i])) for i, bound in enumerate(bounds)]
+    buckets.append(("+Inf", float(cumulative[-1])))
+    return buckets
+
+
+class SensorQuality:
+    def __init__(self, table, stuck_scans: int = SENSOR_STUCK_SCANS, window: int = SENSOR_QUALITY_WINDOW):
+        n = len(table)
+        self.table = table
+        self.stuck_scans = stuck_scans
+        self.lock = threading.Lock()
+        self.columns = np.arange(n)
+        self.scans = 0
+        self.errors = 0 # failed bursts; every probe loses its reading
+        self.invalid_samples = np.zeros(n, dtype=np.int64)
+        self.invalid_reads = np.zeros(n, dtype=np.int64) # scans that reported 0.0
+        self.rejected = np.zeros(n, dtype=np.int64)
+        self.delta_counts = np.zeros((n, len(DELTA_BUCKETS) + 1), dtype=np.int64)
+        self.delta_sum = np.zeros(n)
+        self.latency_counts = np.zeros(len(LATENCY_BUCKETS) + 1, dtype=np.int64)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.flat_scans = np.zeros(n, dtype=np.int64)
+        self.last_median = np.full(n, np.nan)
+        self.last_raw = np.full(n, np.nan)
+        self.last_filtered = np.full(n, np.nan)
+        # Ring of the last `window` scans: which probes had no valid reading
+        self.recent_invalid = np.zeros((window, n), dtype=bool)
+        self.recent_pos = 0
+
+    def record_error(self, duration: float = 0.0):
+        with self.lock:
+            self.errors += 1
+            self.invalid_reads += 1
+            self._record_recent(True)
+            self._record_latency(duration)
+
+    def record_scan(self, duration, raw, filtered, rejected, invalid_samples=None, spread=None, median_codes=None):
+        """`raw`/`filtered` temperatures per probe; optional burst detail from real hardware."""
+        valid = ~np.isnan(raw)
+        with self.lock:
+            self.scans += 1
+            self._record_latency(duration)
+            self.invalid_reads += ~valid
+            self._record_recent(~valid)
+            self.rejected += rejected
+            if invalid_samples is not None:
+                self.invalid_samples += invalid_samples
+
+            delta = np.abs(filtered[valid] - raw[valid])
+            np.add.at(self.delta_counts, (self.columns[valid], np.searchsorted(DELTA_BUCKETS, delta)), 1)
+            self.delta_sum[valid] += delta
+
+            if spread is not None and median_codes is not None:
+                flat = (spread == 0) & (median_codes == self.last_median)
+                self.flat_scans = np.where(flat, self.flat_scans + 1, 0)
+                self.last_median = median_codes
+            self.last_raw = raw
+            self.last_filtered = filtered
+
+    def _record_recent(self, invalid):
+        self.recent_invalid[self.recent_pos] = invalid
+        self.recent_pos = (self.recent_pos + 1) % len(self.recent_invalid)
+
+    def _record_latency(self, duration):
+        self.latency_counts[np.searchsorted(LATENCY_BUCKETS, duration)] += 1
+        self.latency_sum += duration
+        self.latency_max = max(self.latency_max, duration)
+
+    def stuck(self) -> np.ndarray:
+        return self.flat_scans >= self.stuck_scans
+
+    def summary(self) -> dict:
+        with self.lock:
+            stuck = self.stuck()
+            recent_invalid = self.recent_invalid.sum(axis=0)
+            delta_totals = self.delta_counts.sum(axis=1)
+            sensors = {}
+            for i, (role, channel) in enumerate(zip(self.table.roles, self.table.channels)):
+                sensors[role] = {
+                    "channel": channel,
+                    "invalid_reads": int(self.invalid_reads[i]),
+                    "recent_invalid_reads": int(recent_invalid[i]),
+                    "invalid_samples": int(self.invalid_samples[i]),
+                    "rejected_outliers": int(self.rejected[i]),
+                    "mean_filter_delta": float(self.delta_sum[i] / delta_totals[i]) if delta_totals[i] else None,
+                    "last_raw": None if np.isnan(self.last_raw[i]) else float(self.last_raw[i]),
+                    "last_filtered": None if np.isnan(self.last_filtered[i]) else float(self.last_filtered[i]),
+                    "flat_scans": int(self.flat_scans[i]),
+                    "stuck": bool(stuck[i]),
+                }
+            reads = int(self.latency_counts.sum())
+            return {
+                "scans": self.scans,
+                "errors": self.errors,
+                "latency": {
+                    "mean": self.latency_sum / reads if reads else None,
+                    "max": self.latency_max,
+                },
+                # A probe that recovered reads "ok" again once its bad scans leave the window
+                "status": "degraded" if stuck.any() or recent_invalid.any() else "ok",
+                "sensors": sensors,
+            }
+
+
+class SensorQualityCollector:
+    def __init__(self, source):
+        self.source = source # () -> SensorQuality
+
+    def collect(self):
+        quality = self.source()
+        labels = ['role', 'channel']
+        invalid = CounterMetricFamily('hottub_sensor_invalid_reads', 'Scans where a probe had no valid sample (reported as 0.0)', labels=labels)
+        samples = CounterMetricFamily('hottub_sensor_invalid_samples', 'Burst samples at the ADC rails (open or shorted probe)', labels=labels)
+        rejected = CounterMetricFamily('hottub_sensor_rejected_outliers', 'Readings discarded by the jump filter', labels=labels)
+        stuck = GaugeMetricFamily('hottub_sensor_stuck', 'Probe reading has shown no noise or movement for SENSOR_STUCK_SCANS scans', labels=labels)
+        delta = HistogramMetricFamily('hottub_sensor_filter_delta_fahrenheit', 'Absolute difference between filtered and raw readings', labels=labels)
+        with quality.lock:
+            flagged = quality.stuck()
+            for i, (role, channel) in enumerate(zip(quality.table.roles, quality.table.channels)):
+                label_values = [role, str(channel)]
+                invalid.add_metric(label_values, float(quality.invalid_reads[i]))
+                samples.add_metric(label_values, float(quality.invalid_samples[i]))
+                rejected.add_metric(label_values, float(quality.rejected[i]))
+                stuck.add_metric(label_values, 1.0 if flagged[i] else 0.0)
+                delta.add_metric(label_values, _histogram_buckets(quality.delta_counts[i], DELTA_BUCKETS), float(quality.delta_sum[i]))
+            errors = CounterMetricFamily('hottub_adc_read_errors', 'ADC bursts that failed outright')
+            errors.add_metric([], float(quality.errors))
+            latency = HistogramMetricFamily('hottub_adc_scan_seconds', 'Duration of one ADC scan of all probes')
+            latency.add_metric([], _histogram_buckets(quality.latency_counts, LATENCY_BUCKETS), quality.latency_sum)
+        yield from (invalid, samples, rejected, stuck, delta, errors, latency)
@@ -0,0 +1,160 @@
+"""Configurable thermistor sensor table for the MCP3008.
+
+Each entry maps an ADC channel to a role (``water``, ``hi_limit``, ``heater_outlet``,
+``ambient``, ``equipment_bay``, ...) with its own Steinhart-Hart calibration and
+offset. Calibrations are stored as arrays so one burst of all channels is converted
+and filtered in a single vectorized pass; adding a probe adds a column, not Python
+work per tick.
+
+The table comes from the SENSOR_TABLE environment variable (a JSON list) or the file
+named by SENSOR_TABLE_FILE, e.g.::
+
+    [{"channel": 0, "role": "water", "offset": 3.0},
+     {"channel": 1, "role": "hi_limit", "offset": 3.0},
+     {"channel": 2, "role": "heater_outlet", "temp_values": [5, 25, 50], "r_values": [25400, 10000, 3600]},
+     {"channel": 3, "role": "ambient", "coefficients": [0.001129, 0.000234, 8.7e-8]}]
+"""
+import json
+import os
+import warnings
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+from prometheus_client.core import GaugeMetricFamily
+
+# Three-point calibration of the stock 10k probes (see HotTubController history)
+DEFAULT_TEMP_VALUES = [6.8, 23.9, 49.0]
+DEFAULT_R_VALUES = [23300, 10080, 3300]
+DEFAULT_OFFSET = 3.0 # Adjusted from 2.6 to correct remaining ~0.7F under-reading
+REQUIRED_ROLES = ("water", "hi_limit")
+ADC_MAX_CODE = 1023 # MCP3008 is 10-bit
+
+
+def steinhart_hart(temp_values: Sequence[float], r_values: Sequence[float]) -> np.ndarray:
+    """Fit A, B, C from calibration points (Celsius, ohms)."""
+    ln_resistances = np.log(r_values)
+    inv_temp_values = 1 / (np.array(temp_values) + 273.15)
+    A = np.vstack([np.ones(len(ln_resistances)), ln_resistances, ln_resistances ** 3]).T
+    return np.linalg.lstsq(A, inv_temp_values, rcond=None)[0]
+
+
+@dataclass
+class SensorSpec:
+    channel: int
+    role: str
+    temp_values: List[float] = field(default_factory=lambda: list(DEFAULT_TEMP_VALUES))
+    r_values: List[float] = field(default_factory=lambda: list(DEFAULT_R_VALUES))
+    coefficients: Optional[List[float]] = None # explicit A, B, C win over temp/r values
+    offset: float = 0.0 # Celsius, added before converting to Fahrenheit
+    series_resistor: float = 10000
+
+    def steinhart_coefficients(self) -> np.ndarray:
+        if self.coefficients is not None:
+            return np.asarray(self.coefficients, dtype=np.float64)
+        return steinhart_hart(self.temp_values, self.r_values)
+
+
+DEFAULT_SENSORS = [
+    SensorSpec(channel=0, role="water", offset=DEFAULT_OFFSET),
+    SensorSpec(channel=1, role="hi_limit", offset=DEFAULT_OFFSET),
+]
+
+
+class SensorTable:
+    def __init__(self, specs: Sequence[SensorSpec], vref: float = 3.3):
+        channels = [spec.channel for spec in specs]
+        roles = [spec.role for spec in specs]
+        if len(set(channels)) != len(channels) or len(set(roles)) != len(roles):
+            raise ValueError("Sensor table channels and roles must be unique")
+        if any(not 0 <= channel <= 7 for channel in channels):
+            raise ValueError("MCP3008 channels are 0-7")
+        missing = [role for role in REQUIRED_ROLES if role not in roles]
+        if missing:
+            raise ValueError(f"Sensor table is missing required roles: {', '.join(missing)}")
+
+        self.specs = list(specs)
+        self.vref = vref
+        self.channels = tuple(channels)
+        self.roles = tuple(roles)
+        self.index = {role: i for i, role in enumerate(roles)}
+        # One column per sensor
+        coefficients = np.array([spec.steinhart_coefficients() for spec in specs])
+        self.a, self.b, self.c = coefficients[:, 0], coefficients[:, 1], coefficients[:, 2]
+        self.offsets = np.array([spec.offset for spec in specs], dtype=np.float64)
+        self.series = np.array([spec.series_resistor for spec in specs], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.specs)
+
+    def convert(self, codes) -> np.ndarray:
+        """Fahrenheit for codes shaped (..., len(self)); rail codes map to NaN."""
+        codes = np.asarray(codes, dtype=np.float64)
+        # Same scaling as AnalogIn.voltage, which left-justifies the code into 16 bits
+        voltage = codes * 64 * self.vref / 65535
+        with np.errstate(divide="ignore", invalid="ignore"):
+            resistance = self.series * (self.vref - voltage) / voltage
+            ln_resistance = np.log(resistance)
+            temp_kelvin = 1 / (self.a + self.b * ln_resistance + self.c * ln_resistance ** 3)
+        temp_fahrenheit = (temp_kelvin - 273.15 + self.offsets) * 9/5 + 32
+        return np.where((codes > 0) & (codes < ADC_MAX_CODE), temp_fahrenheit, np.nan)
+
+
+class TemperatureFilter:
+    """Per-channel outlier rejection and moving average over a (size, channels) ring.
+
+    A reading that jumps more than `max_jump` from the channel's previous accepted
+    reading is dropped; the output is the mean of the accepted readings. Invalid
+    (NaN) readings report 0.0 like a failed single read always has.
+    """
+
+    def __init__(self, channels: int, size: int = 10, max_jump: float = 5.0):
+        self.size = size
+        self.max_jump = max_jump
+        self.buffer = np.full((size, channels), np.nan)
+        self.next_row = np.zeros(channels, dtype=np.intp)
+        self.last = np.full(channels, np.nan)
+        self.columns = np.arange(channels)
+        self.rejected = np.zeros(channels, dtype=bool) # outliers dropped by the last update
+
+    def update(self, temps: np.ndarray) -> np.ndarray:
+        valid = ~np.isnan(temps)
+        with np.errstate(invalid="ignore"):
+            accept = valid & (np.isnan(self.last) | (np.abs(temps - self.last) <= self.max_jump))
+        self.rejected = valid & ~accept
+        rows = self.next_row[accept]
+        self.buffer[rows, self.columns[accept]] = temps[accept]
+        self.next_row[accept] = (rows + 1) % self.size
+        self.last[accept] = temps[accept]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning) # all-NaN column -> NaN
+            averages = np.nanmean(self.buffer, axis=0)
+        return np.where(valid & ~np.isnan(averages), averages, 0.0)
+
+
+def load_sensor_table(vref: float = 3.3) -> SensorTable:
+    raw = os.getenv("SENSOR_TABLE")
+    path = os.getenv("SENSOR_TABLE_FILE")
+    if not raw and path:
+        with open(path) as f:
+            raw = f.read()
+    if not raw:
+        return SensorTable(DEFAULT_SENSORS, vref)
+    return SensorTable([SensorSpec(**entry) for entry in json.loads(raw)], vref)
+
+
+class SensorTemperatureCollector:
+    """Prometheus collector that reads the latest scan at scrape time, not per tick."""
+
+    def __init__(self, source):
+        self.source = source # () -> (SensorTable, np.ndarray of temperatures) or None
+
+    def collect(self):
+        family = GaugeMetricFamily('hottub_sensor_temperature_fahrenheit', 'Latest filtered reading of each configured probe', labels=['role', 'channel'])
+        latest = self.source()
+        if latest is not None:
+            table, temps = latest
+            for role, channel, temp in zip(table.roles, table.channels, temps):
+                family.add_metric([role, str(channel)], float(temp))
+        yield family
@@ -0,0 +1,230 @@
+"""Compact binary traces of per-tick controller inputs, and a controller that replays them.
+
+A trace is a small header followed by fixed-size little-endian records, one per control
+tick::
+
+    b"HTTRACE1" | uint32 header length | JSON {"version", "roles", "channels", "relays"}
+    record: wall f8 | monotonic f8 | temps f4[len(roles)] | flowing u1 | relays u1
+
+``relays`` is a bitmask of the relay read-backs in ``RELAY_NAMES`` order, taken before
+the tick ran, i.e. the outputs of the previous tick. Two probes cost 26 bytes a tick,
+about 2.2 MB a day at the default 1 s control period.
+
+Set ENGINE_TRACE_FILE to have the engine leader append to a trace. ``ReplayController``
+stands in for the hardware when feeding a trace back through the engine (see
+``app.services.replay``).
+"""
+import json
+import os
+import struct
+from typing import Dict, Optional
+
+import numpy as np
+
+from .flow_switch import FlowMonitor
+from .sensor_quality import SensorQuality
+from .sensors import SensorSpec, SensorTable
+
+ENGINE_TRACE_FILE = os.getenv("ENGINE_TRACE_FILE")
+TRACE_FLUSH_RECORDS = int(os.getenv("TRACE_FLUSH_RECORDS", "60"))
+
+TRACE_MAGIC = b"HTTRACE1"
+TRACE_VERSION = 1
+RELAY_NAMES = ("circ_pump", "heater", "jet_pump", "light", "ozone") # bit 0 .. bit 4
+
+
+def record_dtype(sensors: int) -> np.dtype:
+    return np.dtype([
+        ("wall", "<f8"),
+        ("monotonic", "<f8"),
+        ("temps", "<f4", (sensors,)),
+        ("flowing", "u1"),
+        ("relays", "u1"),
+    ])
+
+
+def relay_mask(states: Dict[str, bool]) -> int:
+    return sum(1 << bit for bit, name in enumerate(RELAY_NAMES) if states.get(name))
+
+
+def relay_states(mask: int) -> Dict[str, bool]:
+    return {name: bool(mask >> bit & 1) for bit, name in enumerate(RELAY_NAMES)}
+
+
+def _header(table: SensorTable) -> bytes:
+    meta = json.dumps({
+        "version": TRACE_VERSION,
+        "roles": list(table.roles),
+        "channels": list(table.channels),
+        "relays": list(RELAY_NAMES),
+    }).encode()
+    return TRACE_MAGIC + struct.pack("<I", len(meta)) + meta
+
+
+class Trace:
+    """A loaded trace: sensor layout plus a structured record array."""
+
+    def __init__(self, roles, channels, records: np.ndarray):
+        self.roles = tuple(roles)
+        self.channels = tuple(channels)
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def load(cls, path: str) -> "Trace":
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(TRACE_MAGIC)] != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a controller trace")
+        offset = len(TRACE_MAGIC)
+        (meta_len,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        meta = json.loads(data[offset:offset + meta_len])
+        offset += meta_len
+        if meta.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {meta.get('version')}")
+        dtype = record_dtype(len(meta["roles"]))
+        usable = (len(data) - offset) // dtype.itemsize * dtype.itemsize # drop a torn last record
+        records = np.frombuffer(data, dtype=dtype, count=usable // dtype.itemsize, offset=offset)
+        return cls(meta["roles"], meta["channels"], records)
+
+    def sensor_table(self) -> SensorTable:
+        return SensorTable([SensorSpec(channel=c, role=r) for c, r in zip(self.channels, self.roles)])
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(_header(self.sensor_table()))
+            f.write(self.records.tobytes())
+
+
+class TraceRecorder:
+    """Appends one record per control tick; buffered so the tick never waits on the disk."""
+
+    def __init__(self, path: str, table: SensorTable, flush_every: int = TRACE_FLUSH_RECORDS):
+        self.path = path
+        self.dtype = record_dtype(len(table))
+        self.buffer = np.zeros(flush_every, dtype=self.dtype)
+        self.pending = 0
+        self.records = 0
+        header = _header(table)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                if f.read(len(header)) != header:
+                    raise ValueError(f"{path} was recorded with a different sensor table")
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            self.file.write(header)
+
+    def record(self, wall: float, monotonic: float, temps, flowing: bool, relays: Dict[str, bool]):
+        row = self.buffer[self.pending]
+        row["wall"] = wall
+        row["monotonic"] = monotonic
+        row["temps"] = temps
+        row["flowing"] = flowing
+        row["relays"] = relay_mask(relays)
+        self.pending += 1
+        self.records += 1
+        if self.pending == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.buffer[:self.pending].tobytes())
+            self.file.flush()
+            self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class ReplayClock:
+    """Wall and monotonic time taken from the record being replayed."""
+
+    def __init__(self):
+        self.wall_now = 0.0
+        self.monotonic_now = 0.0
+
+    def wall(self) -> float:
+        return self.wall_now
+
+    def monotonic(self) -> float:
+        return self.monotonic_now
+
+
+class ReplayController:
+    """Controller whose inputs come from a trace; relay outputs are whatever the engine sets."""
+    CIRC_PUMP = 22
+    HEATER = 4
+    JET_PUMP = 27
+    LIGHT = 5
+    OZONE = 6
+
+    def __init__(self, trace: Trace, clock: Optional[ReplayClock] = None):
+        self.trace = trace
+        self.clock = clock or ReplayClock()
+        self.pins = [self.CIRC_PUMP, self.HEATER, self.JET_PUMP, self.LIGHT, self.OZONE]
+        self.names = dict(zip(RELAY_NAMES, self.pins))
+        self.state = {pin: False for pin in self.pins}
+        self.sensors = trace.sensor_table()
+        self.quality = SensorQuality(self.sensors)
+        self.temps = np.zeros(len(self.sensors))
+        self.flow_level = True
+        self.shutdowns = 0
+        # The trace already holds the debounced state, so edges are taken as they come
+        self.flow = FlowMonitor(lambda: self.flow_level, debounce_ms=0, clock=self.clock.monotonic)
+
+    def load(self, index: int):
+        """Present record `index` as the current hardware inputs."""
+        row = self.trace.records[index]
+        self.clock.wall_now = float(row["wall"])
+        self.clock.monotonic_now = float(row["monotonic"])
+        self.temps = row["temps"].astype(np.float64)
+        flowing = bool(row["flowing"])
+        if flowing != self.flow_level:
+            self.flow_level = flowing
+            self.flow.on_edge(flowing)
+
+    def restore_relays(self, index: int):
+        """Start from the relay read-backs of record `index`."""
+        for name, on in relay_states(int(self.trace.records[index]["relays"])).items():
+            self.state[self.names[name]] = on
+
+    def relay_mask(self) -> int:
+        return relay_mask(self.get_all_states())
+
+    def setup_outputs(self):
+        pass
+
+    def read_temperatures(self, samples: int = 1) -> np.ndarray:
+        return self.temps
+
+    def get_temperature(self, sensor: int = 0) -> float:
+        return float(self.temps[sensor])
+
+    def adc_stats(self) -> dict:
+        return {}
+
+    def is_flow_detected(self) -> bool:
+        return self.flow.flowing
+
+    def set_relay(self, pin: int, state: bool):
+        self.state[pin] = state
+        return True
+
+    def get_relay_state(self, pin: int) -> bool:
+        return self.state.get(pin, False)
+
+    def get_all_states(self) -> Dict[str, bool]:
+        return {name: self.state[pin] for name, pin in self.names.items()}
+
+    def emergency_shutdown(self):
+        self.shutdowns += 1
+        for pin in self.pins:
+            self.state[pin] = False
+
+    def cleanup(self):
+        pass
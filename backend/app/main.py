@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import make_asgi_app
 from dotenv import load_dotenv
@@ -6,12 +6,18 @@ import os
 
 load_dotenv()
 
-from .db.session import init_db
-from .services.engine import engine as hottub_engine
+from .db.session import async_engine, init_db
+from .core.json_response import FastJSONResponse
+from .core.response_cache import ResponseCacheMiddleware, response_cache, version_by_clock
+from .services.engine_link import EMBEDDED, engine as hottub_engine
+from .services.engine_commands import CommandRejected
+from .services.engine_ipc import EngineUnavailable
 from .services.scheduler import scheduler as hottub_scheduler
+from .services.weather import close_http_client
+from .services.system_logs import system_log_service
 from .api import status, settings, control, schedules, support, vacations
 
-app = FastAPI(title="OpenSoak API")
+app = FastAPI(title="OpenSoak API", default_response_class=FastJSONResponse)
 
 # Prometheus Metrics
 metrics_app = make_asgi_app()
@@ -19,16 +25,41 @@ app.mount("/metrics", metrics_app)
 
 # CORS handled by Nginx
 
+# Serve hot polling endpoints from pre-serialized, pre-compressed bytes
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+# Engine ticks and their DB writes happen in whichever process holds the leader lease (the
+# engine process, or another embedded worker); expire cached data once per tick period
+version_by_clock(1.0)
+
+@app.exception_handler(EngineUnavailable)
+async def engine_unavailable_handler(request: Request, exc: EngineUnavailable):
+    return FastJSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(CommandRejected)
+async def command_rejected_handler(request: Request, exc: CommandRejected):
+    return FastJSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.on_event("startup")
 def startup_event():
     init_db()
-    hottub_engine.start()
-    hottub_scheduler.start()
+    # In remote mode the engine process owns the control loop and scheduler
+    if EMBEDDED:
+        hottub_engine.start()
+        hottub_scheduler.start()
+    system_log_service.start()
 
 @app.on_event("shutdown")
 def shutdown_event():
-    hottub_engine.stop()
-    hottub_scheduler.stop()
+    if EMBEDDED:
+        # Scheduler first: its jobs must not run once the engine gives up the lease
+        hottub_scheduler.stop()
+        hottub_engine.stop()
+    system_log_service.stop()
+
+@app.on_event("shutdown")
+async def async_shutdown_event():
+    await close_http_client()
+    await async_engine.dispose()
 
 app.include_router(status.router, prefix="/api/status", tags=["status"])
 app.include_router(settings.router, prefix="/api/settings", tags=["settings"])
@@ -0,0 +1,110 @@
+"""Fixed-rate phase scheduling for the engine's control loop.
+
+Each phase runs on its own period against ``time.monotonic()``: its next deadline is
+the previous deadline plus the period, not "now plus the period", so the rate does
+not drift with the phase's own run time. A phase that falls more than a period behind
+skips the missed runs instead of bursting to catch up. Each phase also has a time
+budget; overruns are counted and exported rather than silently stretching the loop.
+"""
+import time
+from typing import Callable, Iterable, Optional
+
+from prometheus_client import Counter, Gauge
+
+PROM_PHASE_SECONDS = Gauge('hottub_loop_phase_seconds', 'Duration of the last run of an engine loop phase', ['phase'])
+PROM_PHASE_OVERRUNS = Counter('hottub_loop_phase_overruns_total', 'Engine loop phase runs that exceeded their budget', ['phase'])
+PROM_PHASE_SKIPPED = Counter('hottub_loop_phase_skipped_total', 'Engine loop phase runs skipped after falling behind', ['phase'])
+
+
+class Phase:
+    def __init__(self, name: str, period: float, fn: Callable[[], None], budget: Optional[float] = None, delay: float = 0.0):
+        self.name = name
+        self.period = period
+        self.fn = fn
+        self.budget = budget if budget is not None else period
+        self.delay = delay # first run `delay` seconds after the loop starts
+        self.next_due = None
+        self.runs = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "period": self.period,
+            "budget": self.budget,
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+        }
+
+
+class FixedRateLoop:
+    """Runs due phases in declaration order; put the most critical phase first."""
+
+    def __init__(self, phases: Iterable[Phase], clock: Callable[[], float] = time.monotonic,
+                 on_error: Optional[Callable[[Phase, Exception], None]] = None):
+        self.phases = list(phases)
+        self.clock = clock
+        self.on_error = on_error
+
+    def phase(self, name: str) -> Phase:
+        return next(phase for phase in self.phases if phase.name == name)
+
+    def reset(self):
+        now = self.clock()
+        for phase in self.phases:
+            phase.next_due = now + phase.delay
+
+    def make_due(self, name: str):
+        """Run `name` on the next pass, e.g. when a command is waiting for it."""
+        self.phase(name).next_due = self.clock()
+
+    def run_due(self) -> list:
+        ran = []
+        for phase in self.phases:
+            if phase.next_due is None:
+                phase.next_due = self.clock() + phase.delay
+            now = self.clock()
+            if now < phase.next_due:
+                continue
+
+            try:
+                phase.fn()
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(phase, e)
+                else:
+                    print(f"Engine phase '{phase.name}' error: {e}")
+            finished = self.clock()
+            ran.append(phase.name)
+
+            phase.runs += 1
+            phase.last_duration = finished - now
+            phase.max_duration = max(phase.max_duration, phase.last_duration)
+            PROM_PHASE_SECONDS.labels(phase=phase.name).set(phase.last_duration)
+            if phase.last_duration > phase.budget:
+                phase.overruns += 1
+                PROM_PHASE_OVERRUNS.labels(phase=phase.name).inc()
+                print(f"Engine phase '{phase.name}' overran its budget: {phase.last_duration:.3f}s > {phase.budget:.3f}s")
+
+            phase.next_due += phase.period
+            if phase.next_due <= finished:
+                # Behind by more than a period: drop the missed runs and realign to the grid
+                missed = int((finished - phase.next_due) // phase.period) + 1
+                phase.next_due += missed * phase.period
+                phase.skipped += missed
+                PROM_PHASE_SKIPPED.labels(phase=phase.name).inc(missed)
+        return ran
+
+    def time_until_next(self) -> float:
+        pending = [phase.next_due for phase in self.phases if phase.next_due is not None]
+        if not pending:
+            return 0.0
+        return max(0.0, min(pending) - self.clock())
+
+    def stats(self) -> dict:
+        return {phase.name: phase.stats() for phase in self.phases}
@@ -0,0 +1,220 @@
+"""Projected cost for the rest of the calendar month.
+
+The remaining hours of the month are simulated hourly:
+
+* active schedules are compiled into per-hour calendar fractions with minute-accurate
+  overlaps, including overnight windows. Hours inside a vacation are cleared for
+  schedules that pause during vacations;
+* outside air comes from the cached 7-day hourly forecast. After its last hour, the
+  forecast's mean hour-of-day profile repeats. Without a forecast, the last logged
+  outside temperature is used;
+* the heater on-time per hour comes from the heat-loss model (fitted if available)
+  holding the hour's target: the soak temperature while a soak runs, otherwise the
+  rest temperature. The water cools freely after a soak instead of being held.
+
+Only the water trajectory is stepped hour by hour, since each hour starts from the
+last. The calendar, weather and costs are whole-horizon array operations. The result
+is cached until one of its inputs changes.
+"""
+import calendar
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .thermal_model import ThermalModel
+
+PROJECTION_DEFAULT_OUTSIDE_F = float(os.getenv("PROJECTION_DEFAULT_OUTSIDE_F", "50"))
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _local_minutes(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return int(np.datetime64(value, "m").astype(np.int64))
+
+
+def _overlap(starts: np.ndarray, ends: np.ndarray, slot_start: np.ndarray, slot_end: np.ndarray) -> np.ndarray:
+    """Minutes of each slot covered by the intervals [starts, ends), summed over intervals."""
+    if len(starts) == 0:
+        return np.zeros(len(slot_start))
+    covered = np.minimum(ends[:, None], slot_end[None, :]) - np.maximum(starts[:, None], slot_start[None, :])
+    return np.clip(covered, 0, None).sum(axis=0)
+
+
+def month_slots(now: datetime) -> Tuple[np.ndarray, np.ndarray]:
+    """Slot boundaries (minutes since the epoch, local time) from `now` to the end of its month."""
+    days = calendar.monthrange(now.year, now.month)[1]
+    month_end = datetime(now.year, now.month, 1) + timedelta(days=days)
+    first_hour = now.replace(minute=0, second=0, microsecond=0)
+    hours = np.arange(np.datetime64(first_hour, "h"), np.datetime64(month_end, "h"), dtype="datetime64[h]")
+    starts = hours.astype("datetime64[m]")
+    starts[0] = np.datetime64(now.replace(second=0, microsecond=0), "m")
+    ends = hours.astype("datetime64[m]") + np.timedelta64(60, "m")
+    return starts.astype(np.int64), ends.astype(np.int64)
+
+
+def compile_calendar(schedules: Iterable, vacations: Iterable, slot_start: np.ndarray, slot_end: np.ndarray,
+                     soak_default: float) -> Dict[str, np.ndarray]:
+    """Per-slot fraction of soak/jets/light/ozone time and the soak target (NaN when none)."""
+    count = len(slot_start)
+    length = (slot_end - slot_start).astype(np.float64)
+    day0 = slot_start[0] // 1440 - 1 # the day before, for overnight windows
+    days = np.arange(day0, slot_end[-1] // 1440 + 1) if count else np.empty(0, dtype=np.int64)
+    weekday = (days + 3) % 7 # 1970-01-01 was a Thursday; Monday is 0 like the scheduler
+
+    vacation_minutes = np.zeros(count)
+    for start, end in vacations:
+        vacation_minutes += _overlap(np.array([_local_minutes(start)]), np.array([_local_minutes(end)]), slot_start, slot_end)
+    on_vacation = np.clip(vacation_minutes / length, 0, 1) if count else vacation_minutes
+
+    soak = np.zeros(count)
+    soak_target = np.full(count, np.nan)
+    jets, light, ozone = np.zeros(count), np.zeros(count), np.zeros(count)
+    for sched in schedules:
+        try:
+            start_min, end_min = _minutes(sched.start_time), _minutes(sched.end_time)
+            sched_days = {int(d) for d in sched.days_of_week.split(",") if d.strip()}
+        except (AttributeError, ValueError):
+            continue
+        duration = (end_min - start_min) % 1440
+        occurrences = days[np.isin(weekday, list(sched_days))]
+        if duration == 0 or len(occurrences) == 0:
+            continue
+        starts = occurrences * 1440 + start_min
+        coverage = _overlap(starts, starts + duration, slot_start, slot_end) / length
+        if getattr(sched, "disable_during_vacations", False):
+            coverage *= 1 - on_vacation
+        if sched.type == "soak":
+            soak += coverage
+            target = sched.target_temp if sched.target_temp is not None else soak_default
+            soak_target = np.where(coverage > 0, np.fmax(soak_target, target), soak_target)
+            jets += coverage * bool(getattr(sched, "jet_on", False))
+            light += coverage * bool(getattr(sched, "light_on", True))
+            ozone += coverage * bool(getattr(sched, "ozone_on", False))
+        elif sched.type == "clean":
+            jets += coverage
+        elif sched.type == "ozone":
+            ozone += coverage
+
+    return {
+        "soak": np.clip(soak, 0, 1),
+        "soak_target": soak_target,
+        "jets": np.clip(jets, 0, 1),
+        "light": np.clip(light, 0, 1),
+        "ozone": np.clip(ozone, 0, 1),
+    }
+
+
+def outside_series(slot_start: np.ndarray, forecast: Optional[dict], fallback: float) -> Tuple[np.ndarray, int]:
+    """Hourly outside temperature per slot and how many slots the forecast itself covers."""
+    hours = slot_start // 60
+    if forecast and forecast.get("time"):
+        times = np.array(forecast["time"], dtype="datetime64[m]").astype("datetime64[h]").astype(np.int64)
+        temps = np.array([np.nan if t is None else t for t in forecast["temperature_2m"]], dtype=np.float64)
+        known = ~np.isnan(temps)
+        if known.any():
+            times, temps = times[known], temps[known]
+            hour_of_day = times % 24
+            counts = np.bincount(hour_of_day, minlength=24)
+            profile = np.bincount(hour_of_day, temps, minlength=24) / np.maximum(counts, 1)
+            profile[counts == 0] = temps.mean()
+            series = profile[hours % 24]
+            covered = (hours >= times[0]) & (hours <= times[-1])
+            series[covered] = np.interp(hours[covered], times, temps)
+            return series, int(covered.sum())
+    return np.full(len(hours), float(fallback)), 0
+
+
+def simulate_heater(model: ThermalModel, start_temp: float, targets: np.ndarray, outside: np.ndarray,
+                    hours: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Heater on-time per slot holding `targets`; returns (heater hours, water at slot end)."""
+    heater_hours = np.zeros(len(targets))
+    water = np.zeros(len(targets))
+    temp = float(start_temp)
+    for i, (target, air, span) in enumerate(zip(targets.tolist(), outside.tolist(), hours.tolist())):
+        free = float(model.step(temp, air, False, span))
+        if free >= target:
+            temp = free # cooling down toward a lower target; the heater stays off
+        else:
+            full = float(model.step(temp, air, True, span))
+            duty = min(1.0, (target - free) / (full - free)) if full > free else 1.0
+            heater_hours[i] = duty * span
+            temp = free + duty * (full - free)
+        water[i] = temp
+    return heater_hours, water
+
+
+def project_month(now: datetime, settings, schedules: Sequence, vacations: Sequence[Tuple[datetime, datetime]],
+                  model: ThermalModel, start_temp: float, forecast: Optional[dict], fallback_outside: float) -> dict:
+    """Cost of the remaining hours of `now`'s month (see module docstring)."""
+    slot_start, slot_end = month_slots(now)
+    hours = (slot_end - slot_start) / 60.0
+    plan = compile_calendar(schedules, vacations, slot_start, slot_end, settings.default_soak_temp)
+    outside, forecast_hours = outside_series(slot_start, forecast, fallback_outside)
+
+    rest = settings.default_rest_temp
+    targets = np.where(plan["soak"] >= 0.5, np.nan_to_num(plan["soak_target"], nan=rest), rest)
+    if start_temp <= 0: # no reading yet
+        start_temp = targets[0] if len(targets) else rest
+    heater_hours, water = simulate_heater(model, start_temp, targets, outside, hours)
+
+    watts = {
+        "heater": heater_hours * settings.heater_watts,
+        "circ_pump": hours * settings.circ_pump_watts,
+        "jet_pump": plan["jets"] * hours * settings.jet_pump_watts,
+        "light": plan["light"] * hours * settings.light_watts,
+        "ozone": plan["ozone"] * hours * settings.ozone_watts,
+    }
+    kwh = {component: float(watt_hours.sum()) / 1000 for component, watt_hours in watts.items()}
+    total_kwh = sum(kwh.values())
+    return {
+        "hours": float(hours.sum()),
+        "forecast_hours": forecast_hours,
+        "heater_hours": float(heater_hours.sum()),
+        "soak_hours": float((plan["soak"] * hours).sum()),
+        "mean_outside_temp": float(np.average(outside, weights=hours)) if len(hours) else None,
+        "end_temp": float(water[-1]) if len(water) else start_temp,
+        "kwh": kwh,
+        "remaining_kwh": total_kwh,
+        "remaining_cost": total_kwh * settings.kwh_cost,
+    }
+
+
+class CostProjector:
+    """Caches ``project_month`` on a key of every input it reads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.result = None
+        self.builds = 0
+
+    def project(self, now: datetime, settings, schedules, vacations, model: Optional[ThermalModel],
+                start_temp: float, forecast: Optional[dict], forecast_version, fallback_outside: float) -> dict:
+        model = model or ThermalModel()
+        key = (
+            now.replace(minute=0, second=0, microsecond=0), round(start_temp),
+            tuple(getattr(settings, name) for name in ("default_rest_temp", "default_soak_temp", "kwh_cost", "heater_watts",
+                                                       "circ_pump_watts", "jet_pump_watts", "light_watts", "ozone_watts")),
+            tuple((s.id, s.type, s.start_time, s.end_time, s.days_of_week, s.target_temp, s.light_on, s.jet_on,
+                   s.ozone_on, s.disable_during_vacations) for s in schedules),
+            tuple(vacations), (model.loss_coeff, model.heat_rate), forecast_version, fallback_outside,
+        )
+        with self.lock:
+            if key == self.key:
+                return self.result
+        result = project_month(now, settings, schedules, vacations, model, start_temp, forecast, fallback_outside)
+        with self.lock:
+            self.key, self.result = key, result
+            self.builds += 1
+        return result
+
+
+cost_projector = CostProjector()
@@ -1,15 +1,35 @@
 import threading
 import time
 import os
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime
-from prometheus_client import Gauge
+from prometheus_client import REGISTRY, Gauge
 from ..db.session import SessionLocal
 from ..db.models import Settings, TemperatureLog, SystemState, UsageLog, EnergyLog
+from ..core import response_cache
+from ..hardware.sensor_quality import SensorQualityCollector
+from ..hardware.sensors import SensorTemperatureCollector
+from ..hardware.trace import ENGINE_TRACE_FILE, TraceRecorder
+from .engine_commands import ENGINE_COMMAND_TIMEOUT_SEC, CommandQueue, MasterShutdown, command_from_dict
+from .control_loop import FixedRateLoop, Phase
+from .engine_ipc import EngineServer, EngineUnavailable, RemoteEngine
+from .leader import leader_lease
+from .rate_of_rise import RateOfRiseDetector
+from .status_block import StatusBlockReader, StatusBlockWriter
+from .watchdog import ENGINE_CONTROL_WATCHDOG_TIMEOUT_SEC, EngineWatchdog
+from .weather import LocationNotFound, weather_service
+
+ENGINE_SAFETY_PERIOD_SEC = float(os.getenv("ENGINE_SAFETY_PERIOD_SEC", "0.5"))
+ENGINE_CONTROL_PERIOD_SEC = float(os.getenv("ENGINE_CONTROL_PERIOD_SEC", "1.0"))
+ENGINE_ENERGY_PERIOD_SEC = float(os.getenv("ENGINE_ENERGY_PERIOD_SEC", "5.0"))
+FLOW_LOCKOUT_SEC = float(os.getenv("FLOW_LOCKOUT_SEC", "5.0"))
 
 # Prometheus Metrics
 PROM_TEMP = Gauge('hottub_temperature_fahrenheit', 'Current hot tub water temperature')
 PROM_HI_LIMIT = Gauge('hottub_hi_limit_fahrenheit', 'Current heater hi-limit temperature')
 PROM_OUTSIDE_TEMP = Gauge('hottub_outside_temperature_fahrenheit', 'Current outside air temperature')
+PROM_WATER_RATE = Gauge('hottub_water_rate_fahrenheit_per_minute', 'Least-squares slope of the water temperature over the rate-of-rise window')
+PROM_DELTA_RATE = Gauge('hottub_hi_limit_delta_rate_fahrenheit_per_minute', 'Slope of the hi-limit minus water delta over the rate-of-rise window')
 PROM_RELAY = Gauge('hottub_relay_state', 'State of hot tub relays (1=ON, 0=OFF)', ['component'])
 
 class HotTubEngine:
@@ -20,21 +40,41 @@ class HotTubEngine:
         else:
             from ..hardware.controller import HotTubController
             self.controller = HotTubController()
+        # Injectable so a trace replay can run the control logic on recorded time, against
+        # its own throwaway database
+        self.wall_clock = time.time
+        self.clock = time.monotonic
+        self.session_factory = SessionLocal
             
         self.running = False
-        self.thread = None
-        self.poll_interval = 1.0 # seconds
-        self.last_log_time = 0
+        self.thread = None # safety thread: leadership, sensor scans, trips, watchdog heartbeat
+        self.control_thread = None
+        self.poll_interval = 1.0 # seconds; passive instances retry the lease this often
+        self.wake_event = threading.Event()
+        self.commands = CommandQueue() # drained at the start of every tick
+        self.command_timeout = ENGINE_COMMAND_TIMEOUT_SEC
+
+        # Leadership: only the lease holder actuates hardware. It publishes the status
+        # block and serves IPC; passive instances forward commands to it.
+        self.lease = leader_lease
+        self.leading = False
+        self.status_block = None # StatusBlockWriter while leading
+        self.server = None # EngineServer while leading
+        self.leader = None # RemoteEngine proxy while passive
         self.log_interval = 60 # log temp every minute
         self.current_temp = 0.0
         self.hi_limit_temp = 0.0
         self.safety_status = "OK"
-        self.flow_error_count = 0
         self.system_locked = False
         self.circ_start_time = 0
+        self.sensor_temps = None # latest scan, in sensor table order
+        self.rate_of_rise = RateOfRiseDetector()
+        self.recorder = None # TraceRecorder while leading with ENGINE_TRACE_FILE set
+        self.attach_controller(self.controller)
+        self.session_expires = None # epoch seconds of the active soak/session timer
         
         # Energy Tracking
-        self.last_tick_time = time.time()
+        self.last_energy_time = None # monotonic time of the last runtime accounting
         self.runtimes = {
             "heater": 0.0,
             "circ_pump": 0.0,
@@ -42,8 +82,10 @@ class HotTubEngine:
             "light": 0.0,
             "ozone": 0.0
         }
-        self.last_energy_log_time = time.time()
         self.energy_log_interval = 3600 # Log energy every hour
+        # Heater on-time since the last temperature log, for heat-loss model fitting
+        self.log_heater_seconds = 0.0
+        self.log_elapsed = 0.0
 
         # Heating/Cooling Performance Tracking
         self.active_heating_event = None # { "start_time": t, "start_temp": x, "target": y }
@@ -52,27 +94,259 @@ class HotTubEngine:
         self.last_heater_on = False
         
         # Weather Tracking
-        self.last_weather_update = 0
         self.weather_update_interval = 900 # Update weather every 15 minutes
+        self.outside_temp = None
+
+        # Fixed-rate phases on three threads. The safety thread does no DB or network I/O;
+        # the control tick reads and writes SQLite, and logging and weather fetches run on
+        # the housekeeping thread, so a busy database can stall those but not the safety scan.
+        self.runtimes_lock = threading.Lock()
+        # Serializes trips on the safety thread with the control tick's relay writes, so a
+        # tick that passed its lock check cannot switch a relay back on after a trip
+        self.fault_lock = threading.RLock()
+        self.publish_lock = threading.Lock()
+        self.loop = FixedRateLoop([
+            Phase("safety", ENGINE_SAFETY_PERIOD_SEC, lambda: self._check_safety(), budget=0.1),
+            Phase("energy", ENGINE_ENERGY_PERIOD_SEC, lambda: self._account_energy(), budget=0.05),
+        ], on_error=self._phase_error)
+        self.control_loop = FixedRateLoop([
+            Phase("control", ENGINE_CONTROL_PERIOD_SEC, lambda: self._tick(), budget=0.5),
+        ], on_error=self._phase_error)
+        self.housekeeping = FixedRateLoop([
+            Phase("temperature_log", self.log_interval, lambda: self._log_temperature(), budget=1.0, delay=ENGINE_CONTROL_PERIOD_SEC),
+            Phase("energy_log", self.energy_log_interval, lambda: self._log_energy(), budget=1.0, delay=self.energy_log_interval),
+            Phase("weather", self.weather_update_interval, lambda: self._update_weather(), budget=10.0),
+        ], on_error=self._housekeeping_error)
+        self.housekeeping_thread = None
+        self.stop_event = threading.Event()
+        self.watchdog = EngineWatchdog(self)
+        self.control_watchdog = EngineWatchdog(self, timeout=ENGINE_CONTROL_WATCHDOG_TIMEOUT_SEC, name="control",
+                                               on_trip=self.control_watchdog_trip)
+
+    def attach_controller(self, controller):
+        self.controller = controller
+        self.water_index = controller.sensors.index["water"]
+        self.hi_limit_index = controller.sensors.index["hi_limit"]
+        # Loss-of-flow edges cut the heater from the interrupt, not the next tick
+        controller.flow.on_loss(self._on_flow_lost)
 
     def start(self):
         self.running = True
+        self.stop_event.clear()
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
+        self.control_thread = threading.Thread(target=self._run_control, daemon=True)
+        self.control_thread.start()
+        self.housekeeping_thread = threading.Thread(target=self._run_housekeeping, daemon=True)
+        self.housekeeping_thread.start()
+        self.watchdog.start()
+        self.control_watchdog.start()
 
     def stop(self):
         self.running = False
+        self.stop_event.set()
+        self.wake_event.set()
+        self.watchdog.stop()
+        self.control_watchdog.stop()
         if self.thread:
             self.thread.join()
-        self.controller.cleanup()
+        if self.control_thread:
+            self.control_thread.join()
+        if self.housekeeping_thread:
+            self.housekeeping_thread.join()
+        # A passive instance must not touch relays the leader is driving
+        if self.leading:
+            if self.server:
+                self.server.stop()
+                self.server = None
+            self.controller.cleanup()
+            if self.recorder:
+                self.recorder.close()
+                self.recorder = None
+            if self.status_block:
+                self.status_block.close()
+                self.status_block = None
+            self.lease.release()
+            self.leading = False
+
+    def _acquire_leadership(self) -> bool:
+        if not self.lease.try_acquire():
+            return False
+        if not self.leading:
+            print(f"Engine leader lease acquired (pid {os.getpid()})")
+            self.controller.setup_outputs()
+            self.status_block = StatusBlockWriter()
+            try:
+                self.server = EngineServer(self)
+                self.server.start()
+            except OSError as e:
+                print(f"Engine IPC server unavailable: {e}")
+            if ENGINE_TRACE_FILE:
+                try:
+                    self.recorder = TraceRecorder(ENGINE_TRACE_FILE, self.controller.sensors)
+                except (OSError, ValueError) as e:
+                    print(f"Engine trace recording unavailable: {e}")
+            self.loop.reset()
+            self.watchdog.reset()
+            self.control_watchdog.reset()
+            self.leading = True
+        return True
+
+    @property
+    def passive(self) -> bool:
+        return self.running and not self.leading
+
+    def _leader_proxy(self) -> RemoteEngine:
+        if self.leader is None:
+            self.leader = RemoteEngine(status_block=StatusBlockReader())
+        return self.leader
+
+    def wake(self):
+        """Run the next tick now instead of waiting out the poll interval."""
+        if self.passive:
+            return self._leader_proxy().wake()
+        self.wake_event.set()
 
     def reset_faults(self):
-        self.flow_error_count = 0
-        self.system_locked = False
-        self.safety_status = "OK"
+        if self.passive:
+            return self._leader_proxy().reset_faults()
+        with self.fault_lock:
+            self.system_locked = False
+            self.safety_status = "OK"
+            self.rate_of_rise.reset()
+
+    def _on_flow_lost(self):
+        if not self.leading:
+            return
+        self.controller.set_relay(self.controller.HEATER, False)
+        self.controller.set_relay(self.controller.OZONE, False)
+        print("Flow lost: heater and ozone switched off")
+
+    def flow_status(self) -> dict:
+        if self.passive:
+            return self._leader_proxy().flow_status()
+        return self.controller.flow.stats()
+
+    def sensor_readings(self) -> dict:
+        """Latest scan keyed by role (extra probes included)."""
+        if self.passive:
+            return self._leader_proxy().sensor_readings()
+        temps = self.sensor_temps
+        if temps is None:
+            return {}
+        return {role: float(temp) for role, temp in zip(self.controller.sensors.roles, temps)}
+
+    def sensor_quality(self) -> dict:
+        if self.passive:
+            return self._leader_proxy().sensor_quality()
+        return self.controller.quality.summary()
+
+    def watchdog_trip(self):
+        """Called from the watchdog thread while the safety loop is stuck."""
+        # Cut the relays before waiting on the fault lock, in case its holder is what hung
+        self.controller.emergency_shutdown()
+        self._trip("STOP: ENGINE WATCHDOG TIMEOUT")
+
+    def control_watchdog_trip(self):
+        """Called from the watchdog thread while the control tick is stuck."""
+        # Only a tick switches the heater off again; without one it would stay as left.
+        # No fault lock: the stuck tick may be holding it.
+        self.controller.set_relay(self.controller.HEATER, False)
+
+    def master_shutdown(self):
+        if self.passive:
+            return self._leader_proxy().master_shutdown()
+        # Cut the relays right away; only the desired-state write waits for the tick
+        self._trip("STOP: MASTER SHUTDOWN")
+        return self.submit(MasterShutdown())
+
+    def submit(self, command):
+        """Queue a control command for the next tick and wait for its result."""
+        if isinstance(command, dict): # forwarded over IPC
+            command = command_from_dict(command)
+        if self.passive:
+            return self._leader_proxy().submit(command)
+        if not self.running:
+            # No control loop to race with (tests, tooling): apply inline
+            future = self.commands.put(command)
+            self._drain_commands()
+            return future.result()
+
+        future = self.commands.put(command)
+        self.wake_event.set()
+        try:
+            return future.result(timeout=self.command_timeout)
+        except FutureTimeout:
+            # Not applied yet; cancelling stops the engine applying it late
+            if future.cancel():
+                raise EngineUnavailable(f"Engine did not apply {type(command).__name__} within {self.command_timeout}s")
+            return future.result()
+
+    def _load_state_and_settings(self, db):
+        settings = db.query(Settings).first()
+        if not settings:
+            settings = Settings()
+            db.add(settings)
+            db.commit()
+            db.refresh(settings)
+
+        state = db.query(SystemState).first()
+        if not state:
+            state = SystemState()
+            db.add(state)
+            db.commit()
+            db.refresh(state)
+        return state, settings
+
+    def _drain_commands(self, db=None, state=None, settings=None):
+        pending = self.commands.drain()
+        if not pending:
+            return
+        own_session = db is None
+        if own_session:
+            db = self.session_factory()
+        try:
+            if state is None:
+                state, settings = self._load_state_and_settings(db)
+            for command, future in pending:
+                if not future.set_running_or_notify_cancel():
+                    continue # the caller gave up waiting
+                # One transaction per command so a rejected one leaves the rest intact
+                try:
+                    result = command.apply(db, state, settings)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            if own_session:
+                db.close()
+
+    def snapshot(self):
+        """Live state for the API; the same shape is served over IPC by the leader.
+
+        Temperatures come from the last safety scan: a request never triggers its own
+        SPI burst, which would also feed the scan filters out of cadence.
+        """
+        if self.passive:
+            return self._leader_proxy().snapshot()
+        return {
+            "current_temp": self.current_temp,
+            "hi_limit_temp": self.hi_limit_temp,
+            "relay_states": self.controller.get_all_states(),
+            "safety_status": self.safety_status,
+            "system_locked": self.system_locked,
+            "runtimes": dict(self.runtimes),
+        }
 
-    def _log_energy(self, db, settings):
+    def _log_energy(self):
+        db = self.session_factory()
         try:
+            settings = db.query(Settings).first()
+            if not settings:
+                return
             power_map = {
                 "heater": settings.heater_watts,
                 "circ_pump": settings.circ_pump_watts,
@@ -80,8 +354,14 @@ class HotTubEngine:
                 "light": settings.light_watts,
                 "ozone": settings.ozone_watts
             }
-            
-            for component, seconds in self.runtimes.items():
+
+            # Take this period's counters and reset them for the next one
+            with self.runtimes_lock:
+                period = dict(self.runtimes)
+                for component in self.runtimes:
+                    self.runtimes[component] = 0.0
+
+            for component, seconds in period.items():
                 if seconds > 0:
                     watts = power_map.get(component, 0)
                     kwh = (watts * (seconds / 3600)) / 1000
@@ -94,24 +374,17 @@ class HotTubEngine:
                         estimated_cost=cost
                     )
                     db.add(log)
-                    # Reset memory counter for next period
-                    self.runtimes[component] = 0.0
             
             db.commit()
         except Exception as e:
             print(f"Error logging energy: {e}")
+        finally:
+            db.close()
 
     def _log_thermal_event(self, db, event_type, start_temp, target_temp, duration):
         try:
-            # Fetch current weather for correlation
-            outside_temp = None
-            try:
-                from .status import get_weather
-                import asyncio
-                weather = asyncio.run(get_weather(db))
-                if "current" in weather:
-                    outside_temp = weather["current"]["temperature_2m"]
-            except: pass
+            # Latest reading from the weather phase, for correlation
+            outside_temp = self.outside_temp
 
             from ..db.models import HeatingEvent
             if duration < 60:
@@ -137,72 +410,201 @@ class HotTubEngine:
         except Exception as e:
             print(f"Error logging thermal event: {e}")
 
+    def _phase_error(self, phase, e):
+        print(f"Engine Error ({phase.name}): {e}")
+        with self.fault_lock:
+            # A lockout's status stays visible until faults are reset
+            if not self.system_locked:
+                self.safety_status = f"Error: {str(e)}"
+
+    def _housekeeping_error(self, phase, e):
+        # Logging and weather failures are not safety faults
+        print(f"Engine Housekeeping Error ({phase.name}): {e}")
+
+    def _publish(self):
+        # Live readings or relays changed; invalidate cached status/energy responses
+        response_cache.bump("engine")
+        with self.publish_lock:
+            try:
+                self.status_block.publish(self)
+            except Exception as e:
+                print(f"Status block publish error: {e}")
+
     def _run(self):
         while self.running:
+            # Passive instances keep retrying so they take over if the leader exits
+            if not self._acquire_leadership():
+                self.stop_event.wait(self.poll_interval)
+                continue
+
+            if self.loop.run_due():
+                self._publish()
+            self.watchdog.beat()
+            self.stop_event.wait(self.loop.time_until_next())
+
+    def _run_control(self):
+        was_leading = False
+        while self.running:
+            # Control acts on the safety thread's readings; wait for its first scan
+            if not self.leading or self.sensor_temps is None:
+                was_leading = False
+                self.stop_event.wait(self.poll_interval)
+                continue
+            if not was_leading:
+                self.control_loop.reset()
+                self.control_watchdog.reset()
+                was_leading = True
+
+            if self.control_loop.run_due():
+                self._publish()
+            self.control_watchdog.beat()
+
+            # Sleep until the next tick; wake() cuts it short for queued commands
+            if self.wake_event.wait(self.control_loop.time_until_next()):
+                self.wake_event.clear()
+                if self.running:
+                    self.control_loop.make_due("control")
+
+    def _run_housekeeping(self):
+        was_leading = False
+        while self.running:
+            if self.leading:
+                if not was_leading:
+                    self.housekeeping.reset()
+                    was_leading = True
+                self.housekeeping.run_due()
+                timeout = self.housekeeping.time_until_next()
+            else:
+                timeout = self.poll_interval
+            self.stop_event.wait(timeout)
+
+    def loop_stats(self) -> dict:
+        """Per-phase timing: runs, overruns, skipped deadlines, last/max duration."""
+        if self.passive:
+            return self._leader_proxy().loop_stats()
+        return {"loop": {**self.loop.stats(), **self.control_loop.stats()}, "housekeeping": self.housekeeping.stats(), "watchdog": self.watchdog.stats(),
+                "control_watchdog": self.control_watchdog.stats(),
+                "rate_of_rise": self.rate_of_rise.stats(),
+                "adc": self.controller.adc_stats()}
+
+    def _log_temperature(self):
+        with self.runtimes_lock:
+            duty = self.log_heater_seconds / self.log_elapsed if self.log_elapsed else None
+            self.log_heater_seconds = self.log_elapsed = 0.0
+        db = self.session_factory()
+        try:
+            db.add(TemperatureLog(value=self.current_temp, outside_temp=self.outside_temp, heater_duty=duty))
+            db.commit()
+        finally:
+            db.close()
+
+    def _update_weather(self):
+        location = None
+        try:
+            db = self.session_factory()
             try:
-                self._tick()
-            except Exception as e:
-                print(f"Engine Error: {e}")
-                self.safety_status = f"Error: {str(e)}"
-            time.sleep(self.poll_interval)
+                settings = db.query(Settings).first()
+                location = settings.location if settings else None
+            finally:
+                db.close()
+            if not location:
+                return
 
-    def _tick(self):
+            # Same persisted geocode and cached payload as /api/status/weather
+            outside_temp = weather_service.current_temperature(location)
+        except LocationNotFound:
+            print(f"Weather update skipped: location '{location}' not found")
+            return
+        except Exception as e:
+            print(f"Weather Update Error: {e}")
+            return
+        if outside_temp is not None:
+            self.outside_temp = outside_temp
+            PROM_OUTSIDE_TEMP.set(self.outside_temp)
+
+    def _trip(self, status):
+        """Cut every relay and lock the system until faults are reset."""
+        with self.fault_lock:
+            self.safety_status = status
+            self.system_locked = True
+            self.controller.emergency_shutdown()
+
+    def _check_safety(self):
+        # Every probe in the sensor table comes from one oversampled SPI burst
+        temps = self.controller.read_temperatures()
+        self.sensor_temps = temps
+        self.current_temp = float(temps[self.water_index])
+        self.hi_limit_temp = float(temps[self.hi_limit_index])
+        PROM_TEMP.set(self.current_temp)
+        PROM_HI_LIMIT.set(self.hi_limit_temp)
+        # Readings stay current for the API while locked; the checks wait for a reset
         if self.system_locked:
             return
 
-        db = SessionLocal()
+        # --- HI-LIMIT FAULT CHECK ---
+        if self.current_temp >= 110.0 or self.hi_limit_temp >= 110.0:
+            self._trip("CRITICAL: HI-LIMIT FAULT")
+            return
+
+        # --- RATE-OF-RISE CHECK ---
+        if self.current_temp <= 0.0 or self.hi_limit_temp <= 0.0:
+            # A failed read reports 0.0; a slope across it would be meaningless
+            self.rate_of_rise.reset()
+            return
+        fault = self.rate_of_rise.add(self.clock(), self.current_temp, self.hi_limit_temp,
+                                      self.controller.get_relay_state(self.controller.HEATER))
+        PROM_WATER_RATE.set(self.rate_of_rise.water_rate)
+        PROM_DELTA_RATE.set(self.rate_of_rise.delta_rate)
+        if fault:
+            self._trip(f"CRITICAL: {fault}")
+
+    def _account_energy(self):
+        now = self.clock()
+        if self.last_energy_time is None:
+            self.last_energy_time = now
+            return
+        dt = now - self.last_energy_time
+        self.last_energy_time = now
+
+        # Relay states are sampled once per energy period
+        relay_states = self.controller.get_all_states()
+        with self.runtimes_lock:
+            for component, is_on in relay_states.items():
+                if is_on:
+                    self.runtimes[component] += dt
+            self.log_elapsed += dt
+            if relay_states.get("heater"):
+                self.log_heater_seconds += dt
+
+    def _tick(self):
+        db = self.session_factory()
         try:
-            settings = db.query(Settings).first()
-            if not settings:
-                settings = Settings()
-                db.add(settings)
-                db.commit()
-                db.refresh(settings)
+            state, settings = self._load_state_and_settings(db)
+            if self.recorder and self.sensor_temps is not None:
+                # Inputs this tick acts on; relay read-backs are the previous tick's outputs
+                self.recorder.record(self.wall_clock(), self.clock(), self.sensor_temps,
+                                     self.controller.flow.flowing, self.controller.get_all_states())
+
+            # Apply queued API commands first so this tick acts on them. This runs even
+            # while locked so a master shutdown's desired state is still persisted.
+            self._drain_commands(db, state, settings)
+            if self.system_locked:
+                return
 
-            state = db.query(SystemState).first()
-            if not state:
-                state = SystemState()
-                db.add(state)
-                db.commit()
-                db.refresh(state)
+            if state.manual_soak_active and state.manual_soak_expires:
+                self.session_expires = state.manual_soak_expires.timestamp()
+            elif state.scheduled_session_active and state.scheduled_session_expires:
+                self.session_expires = state.scheduled_session_expires.timestamp()
+            else:
+                self.session_expires = None
 
-            self.current_temp = self.controller.get_temperature(0)
-            self.hi_limit_temp = self.controller.get_temperature(1)
+            # Temperatures come from the safety phase, which runs first and more often
             is_heater_currently_on = self.controller.get_relay_state(self.controller.HEATER)
             
-            # Update Prometheus Metrics
-            PROM_TEMP.set(self.current_temp)
-            PROM_HI_LIMIT.set(self.hi_limit_temp)
-            
             relay_states = self.controller.get_all_states()
             for component, is_on in relay_states.items():
                 PROM_RELAY.labels(component=component).set(1 if is_on else 0)
 
-            # --- WEATHER UPDATE ---
-            if time.time() - self.last_weather_update >= self.weather_update_interval:
-                try:
-                    import httpx
-                    if settings.location:
-                        # 1. Geocode
-                        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={settings.location}&count=1&language=en&format=json"
-                        geo_res = httpx.get(geo_url)
-                        geo_data = geo_res.json()
-                        
-                        if geo_data.get("results"):
-                            lat = geo_data["results"][0]["latitude"]
-                            lon = geo_data["results"][0]["longitude"]
-
-                            # 2. Weather
-                            weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m&temperature_unit=fahrenheit&timezone=auto"
-                            weather_res = httpx.get(weather_url)
-                            weather_data = weather_res.json()
-                            
-                            if "current" in weather_data:
-                                PROM_OUTSIDE_TEMP.set(weather_data["current"]["temperature_2m"])
-                                self.last_weather_update = time.time()
-                except Exception as e:
-                    print(f"Weather Update Error: {e}")
-
             # --- THERMAL PERFORMANCE TRACKING ---
             # We track "heat" events strictly when the heater is ON
             # We track "cool" events strictly when the heater is OFF
@@ -212,47 +614,47 @@ class HotTubEngine:
                 # Heater just turned ON
                 # Log any final cooling progress if we had an active event
                 if self.active_cooling_event:
-                    duration = time.time() - self.active_cooling_event["start_time"]
+                    duration = self.wall_clock() - self.active_cooling_event["start_time"]
                     self._log_thermal_event(db, "cool", self.active_cooling_event["start_temp"], self.current_temp, duration)
                 
                 # Start heating tracking
-                self.active_heating_event = { "start_time": time.time(), "start_temp": self.current_temp }
+                self.active_heating_event = { "start_time": self.wall_clock(), "start_temp": self.current_temp }
                 self.active_cooling_event = None
             
             elif self.last_heater_on and not is_heater_currently_on:
                 # Heater just turned OFF
                 # Log the heating performance for this burn
                 if self.active_heating_event:
-                    duration = time.time() - self.active_heating_event["start_time"]
+                    duration = self.wall_clock() - self.active_heating_event["start_time"]
                     self._log_thermal_event(db, "heat", self.active_heating_event["start_temp"], self.current_temp, duration)
                 
                 # Start cooling tracking
-                self.active_cooling_event = { "start_time": time.time(), "start_temp": self.current_temp }
+                self.active_cooling_event = { "start_time": self.wall_clock(), "start_temp": self.current_temp }
                 self.active_heating_event = None
 
             # 2. Incremental Processing (for long periods)
             if self.active_cooling_event:
                 temp_drop = self.active_cooling_event["start_temp"] - self.current_temp
                 if temp_drop >= 1.0: # Every 1 degree drop
-                    duration = time.time() - self.active_cooling_event["start_time"]
+                    duration = self.wall_clock() - self.active_cooling_event["start_time"]
                     self._log_thermal_event(db, "cool", self.active_cooling_event["start_temp"], self.current_temp, duration)
                     # Reset start point to track the NEXT degree
-                    self.active_cooling_event = { "start_time": time.time(), "start_temp": self.current_temp }
+                    self.active_cooling_event = { "start_time": self.wall_clock(), "start_temp": self.current_temp }
             
             if self.active_heating_event:
                 temp_rise = self.current_temp - self.active_heating_event["start_temp"]
                 if temp_rise >= 1.0: # Every 1 degree rise (for long continuous burns)
-                    duration = time.time() - self.active_heating_event["start_time"]
+                    duration = self.wall_clock() - self.active_heating_event["start_time"]
                     self._log_thermal_event(db, "heat", self.active_heating_event["start_temp"], self.current_temp, duration)
                     # Reset start point to track the NEXT degree
-                    self.active_heating_event = { "start_time": time.time(), "start_temp": self.current_temp }
+                    self.active_heating_event = { "start_time": self.wall_clock(), "start_temp": self.current_temp }
 
             self.last_target_temp = settings.set_point
             self.last_heater_on = is_heater_currently_on
 
             #             # --- MANUAL SOAK EXPIRATION ---
             if state.manual_soak_active and state.manual_soak_expires:
-                if datetime.now().replace(tzinfo=state.manual_soak_expires.tzinfo) > state.manual_soak_expires:
+                if datetime.fromtimestamp(self.wall_clock()).replace(tzinfo=state.manual_soak_expires.tzinfo) > state.manual_soak_expires:
                     state.manual_soak_active = False
                     state.manual_soak_expires = None
                     # state.jet_pump = False # Preserving user state
@@ -263,99 +665,72 @@ class HotTubEngine:
                     db.add(log)
                     db.commit()
 
-            # --- HI-LIMIT FAULT CHECK ---
-            if self.current_temp >= 110.0 or self.hi_limit_temp >= 110.0:
-                self.safety_status = "CRITICAL: HI-LIMIT FAULT"
-                self.system_locked = True
-                self.controller.emergency_shutdown()
+            # The safety thread may have tripped while this tick was blocked above
+            if self.system_locked:
                 return
 
             # --- CIRCULATION & FLOW LOGIC ---
-            # Default to ON unless system is locked (Shutdown or Fault)
-            needs_circ = not self.system_locked
-            
             # Forced sync of DB state for mandatory always-on components
-            if needs_circ and not state.circ_pump:
+            if not state.circ_pump:
                 state.circ_pump = True
                 db.commit()
                 db.refresh(state)
 
-            is_circ_currently_on = self.controller.get_relay_state(self.controller.CIRC_PUMP)
-            
-            if needs_circ:
+            # Relay writes only from here on: no DB I/O while holding the fault lock
+            with self.fault_lock:
+                if self.system_locked:
+                    return
+                self.controller.flow.poll()
+                is_circ_currently_on = self.controller.get_relay_state(self.controller.CIRC_PUMP)
+
+                # Circulation defaults to ON unless the system is locked (Shutdown or Fault)
                 if not is_circ_currently_on:
                     self.controller.set_relay(self.controller.CIRC_PUMP, True)
-                    self.circ_start_time = time.time()
+                    self.circ_start_time = self.wall_clock()
                     is_circ_currently_on = True # Allow rest of tick to proceed with virtual confirmation
-                
-                # Logic Diagram: Wait 5 seconds before checking flow
-                if time.time() - self.circ_start_time > 5:
-                    if not self.controller.is_flow_detected():
-                        self.flow_error_count += 1
-                        if self.flow_error_count >= 5:
-                            self.safety_status = "STOP: NO FLOW DETECTED"
-                            self.system_locked = True
-                            self.controller.emergency_shutdown()
-                            return
-                    else:
-                        self.flow_error_count = 0 
-            else:
-                self.controller.set_relay(self.controller.CIRC_PUMP, False)
-                if state.circ_pump:
-                    state.circ_pump = False
-                    db.commit()
-
-            # --- HEATER LOGIC (Hysteresis) ---
-            is_circ_actually_on = self.controller.get_relay_state(self.controller.CIRC_PUMP)
-            is_flow_ok = self.controller.is_flow_detected()
 
-            # Heater runs if Master toggle is ON AND safety conditions met
-            # And ONLY if circ pump is actually on and flowing
-            if state.heater and is_circ_actually_on and is_flow_ok:
-                target = settings.set_point
-                upper = target + settings.hysteresis_upper
-                lower = target - settings.hysteresis_lower
-                
-                if self.current_temp >= upper:
+                # Logic Diagram: Wait 5 seconds before checking flow
+                if self.wall_clock() - self.circ_start_time > 5:
+                    if self.controller.flow.lost_for() >= FLOW_LOCKOUT_SEC:
+                        self._trip("STOP: NO FLOW DETECTED")
+                        return
+
+                # --- HEATER LOGIC (Hysteresis) ---
+                is_circ_actually_on = self.controller.get_relay_state(self.controller.CIRC_PUMP)
+                is_flow_ok = self.controller.is_flow_detected()
+
+                # Heater runs if Master toggle is ON AND safety conditions met
+                # And ONLY if circ pump is actually on and flowing
+                if state.heater and is_circ_actually_on and is_flow_ok:
+                    target = settings.set_point
+                    upper = target + settings.hysteresis_upper
+                    lower = target - settings.hysteresis_lower
+
+                    if self.current_temp >= upper:
+                        self.controller.set_relay(self.controller.HEATER, False)
+                    elif self.current_temp <= lower:
+                        self.controller.set_relay(self.controller.HEATER, True)
+                else:
                     self.controller.set_relay(self.controller.HEATER, False)
-                elif self.current_temp <= lower:
-                    self.controller.set_relay(self.controller.HEATER, True)
-            else:
-                self.controller.set_relay(self.controller.HEATER, False)
 
-            # --- OZONE & OTHER ---
-            # Ozone runs if Master toggle is ON AND safety conditions met
-            if state.ozone and is_circ_actually_on and is_flow_ok and not self.system_locked:
-                self.controller.set_relay(self.controller.OZONE, True)
-            else:
-                self.controller.set_relay(self.controller.OZONE, False)
+                # --- OZONE & OTHER ---
+                # Ozone runs if Master toggle is ON AND safety conditions met
+                if state.ozone and is_circ_actually_on and is_flow_ok:
+                    self.controller.set_relay(self.controller.OZONE, True)
+                else:
+                    self.controller.set_relay(self.controller.OZONE, False)
 
-            self.controller.set_relay(self.controller.JET_PUMP, state.jet_pump)
-            self.controller.set_relay(self.controller.LIGHT, state.light)
-
-            # --- ENERGY TRACKING ---
-            now = time.time()
-            dt = now - self.last_tick_time
-            self.last_tick_time = now
-            
-            relay_states = self.controller.get_all_states()
-            for component, is_on in relay_states.items():
-                if is_on:
-                    self.runtimes[component] += dt
-
-            if now - self.last_energy_log_time >= self.energy_log_interval:
-                self._log_energy(db, settings)
-                self.last_energy_log_time = now
-
-            # --- LOGGING ---
-            if time.time() - self.last_log_time >= self.log_interval:
-                log = TemperatureLog(value=self.current_temp)
-                db.add(log)
-                db.commit()
-                self.last_log_time = time.time()
+                self.controller.set_relay(self.controller.JET_PUMP, state.jet_pump)
+                self.controller.set_relay(self.controller.LIGHT, state.light)
 
         finally:
             db.close()
 
 # Global engine instance
-engine = HotTubEngine()
\ No newline at end of file
+engine = HotTubEngine()
+
+# Per-probe gauges are filled at scrape time so extra probes cost the tick nothing
+REGISTRY.register(SensorTemperatureCollector(
+    lambda: (engine.controller.sensors, engine.sensor_temps) if engine.sensor_temps is not None else None
+))
+REGISTRY.register(SensorQualityCollector(lambda: engine.controller.quality))
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""Typed control commands from the API to the engine.
+
+Routers no longer write ``SystemState``/``Settings`` for control actions. They build a
+command and hand it to ``engine.submit()``; the engine drains its queue at the start of
+each tick, applies every command in its own transaction and resolves the caller's
+future with the result. All control writes therefore happen on the engine thread, so
+they cannot race the engine's own commits.
+"""
+import os
+import queue
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from ..db.models import UsageLog
+
+ENGINE_COMMAND_TIMEOUT_SEC = float(os.getenv("ENGINE_COMMAND_TIMEOUT_SEC", "5.0"))
+MAX_SET_POINT = 108.0 # Same hard cap as /api/settings
+
+
+class CommandRejected(Exception):
+    """The command is invalid for the current state (mapped to HTTP 400)."""
+
+
+@dataclass
+class Command:
+    def apply(self, db, state, settings) -> dict:
+        raise NotImplementedError
+
+    def to_dict(self) -> dict:
+        return {"type": type(self).__name__, **asdict(self)}
+
+
+@dataclass
+class SetRelays(Command):
+    circ_pump: Optional[bool] = None
+    heater: Optional[bool] = None
+    jet_pump: Optional[bool] = None
+    light: Optional[bool] = None
+    ozone: Optional[bool] = None
+
+    def apply(self, db, state, settings):
+        for relay, value in asdict(self).items():
+            if value is not None:
+                setattr(state, relay, value)
+        return {"status": "relays updated"}
+
+
+@dataclass
+class SetPoint(Command):
+    value: float
+
+    def apply(self, db, state, settings):
+        if self.value > MAX_SET_POINT:
+            raise CommandRejected("Set point too high")
+        settings.set_point = self.value
+        return {"status": "set point updated", "set_point": self.value}
+
+
+@dataclass
+class StartSoak(Command):
+    target_temp: float
+    duration_minutes: Optional[int] = None
+
+    def apply(self, db, state, settings):
+        duration = self.duration_minutes if self.duration_minutes else settings.default_soak_duration
+
+        # Update state
+        state.manual_soak_active = True
+        state.manual_soak_expires = datetime.now() + timedelta(minutes=duration)
+        state.heater = True
+
+        # Update target temp
+        settings.set_point = self.target_temp
+
+        db.add(UsageLog(event="Manual Soak Started", details=f"Target: {self.target_temp}F, Duration: {duration}m"))
+        return {"status": "soak started", "expires": state.manual_soak_expires.isoformat()}
+
+
+@dataclass
+class CancelSoak(Command):
+    def apply(self, db, state, settings):
+        state.manual_soak_active = False
+        state.manual_soak_expires = None
+        state.jet_pump = False
+        state.light = False
+
+        settings.set_point = settings.default_rest_temp
+
+        db.add(UsageLog(event="Manual Soak Cancelled", details="User terminated soak session"))
+        return {"status": "soak cancelled", "reverted_to": settings.default_rest_temp}
+
+
+@dataclass
+class CancelScheduledSession(Command):
+    def apply(self, db, state, settings):
+        state.scheduled_session_active = False
+        state.scheduled_session_expires = None
+        state.jet_pump = False
+        state.light = False
+        state.ozone = False
+
+        settings.set_point = settings.default_rest_temp
+
+        db.add(UsageLog(event="Scheduled Session Cancelled", details="User manually stopped the active schedule."))
+        return {"status": "scheduled session cancelled", "reverted_to": settings.default_rest_temp}
+
+
+@dataclass
+class AdjustTimer(Command):
+    minutes: int
+
+    def apply(self, db, state, settings):
+        # Determine which expiry to adjust
+        target_field = None
+        if state.manual_soak_active and state.manual_soak_expires:
+            target_field = "manual_soak_expires"
+        elif state.scheduled_session_active and state.scheduled_session_expires:
+            target_field = "scheduled_session_expires"
+
+        if not target_field:
+            raise CommandRejected("No active soak session to adjust")
+
+        new_expiry = getattr(state, target_field) + timedelta(minutes=self.minutes)
+
+        # Don't allow timer to go below now
+        if new_expiry < datetime.now():
+            if target_field == "manual_soak_expires":
+                return CancelSoak().apply(db, state, settings)
+            return CancelScheduledSession().apply(db, state, settings)
+
+        setattr(state, target_field, new_expiry)
+
+        event_type = "Time Added" if self.minutes > 0 else "Time Removed"
+        db.add(UsageLog(event=f"Soak {event_type}", details=f"{abs(self.minutes)} minutes adjusted. New expiry: {new_expiry.strftime('%H:%M:%S')}"))
+        return {"status": "timer adjusted", "expires": new_expiry.isoformat()}
+
+
+@dataclass
+class TriggerSchedule(Command):
+    schedule_id: int
+
+    def apply(self, db, state, settings):
+        from ..db.models import Schedule
+        from .scheduler import scheduler
+
+        sched = db.query(Schedule).filter(Schedule.id == self.schedule_id).first()
+        if not sched:
+            raise CommandRejected(f"Schedule {self.schedule_id} not found")
+        if not scheduler.activate_schedule(sched, db):
+            return {"status": "schedule skipped", "name": sched.name, "reason": "disabled during vacation"}
+        return {"status": "schedule triggered", "name": sched.name}
+
+
+@dataclass
+class EndSchedule(Command):
+    schedule_id: int
+
+    def apply(self, db, state, settings):
+        from ..db.models import Schedule
+        from .scheduler import scheduler
+
+        sched = db.query(Schedule).filter(Schedule.id == self.schedule_id).first()
+        if not sched:
+            raise CommandRejected(f"Schedule {self.schedule_id} not found")
+        scheduler.deactivate_schedule(sched, db)
+        return {"status": "schedule ended", "name": sched.name}
+
+
+@dataclass
+class MasterShutdown(Command):
+    """Persists the all-off desired state; the engine cuts the relays before queueing it."""
+
+    def apply(self, db, state, settings):
+        state.circ_pump = False
+        state.heater = False
+        state.jet_pump = False
+        state.light = False
+        state.ozone = False
+        db.add(UsageLog(event="Master Shutdown", details="System emergency stop executed by admin"))
+        return {"status": "all systems off and locked"}
+
+
+@dataclass
+class Batch(Command):
+    """Several commands applied in one transaction: all of them or none."""
+    commands: List[Command] = field(default_factory=list)
+
+    def apply(self, db, state, settings):
+        return {"results": [command.apply(db, state, settings) for command in self.commands]}
+
+    def to_dict(self):
+        return {"type": "Batch", "commands": [command.to_dict() for command in self.commands]}
+
+
+COMMAND_TYPES = {cls.__name__: cls for cls in (
+    SetRelays, SetPoint, StartSoak, CancelSoak, CancelScheduledSession,
+    AdjustTimer, TriggerSchedule, EndSchedule, MasterShutdown, Batch,
+)}
+
+
+def command_from_dict(data: dict) -> Command:
+    data = dict(data)
+    cls = COMMAND_TYPES.get(data.pop("type", None))
+    if cls is None:
+        raise ValueError("Unknown engine command")
+    if cls is Batch:
+        return Batch([command_from_dict(item) for item in data.get("commands", [])])
+    return cls(**data)
+
+
+class CommandQueue:
+    """Thread-safe FIFO of (command, future) pairs filled by API threads."""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+
+    def put(self, command: Command) -> Future:
+        future = Future()
+        self._queue.put((command, future))
+        return future
+
+    def drain(self):
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                return pending
+
+    def __len__(self):
+        return self._queue.qsize()
@@ -0,0 +1,125 @@
+"""Local IPC between API workers and the engine process.
+
+The engine process owns the hardware and serves newline-delimited JSON requests on a
+Unix socket: ``{"cmd": "snapshot", "args": {...}}`` -> ``{"ok": true, "result": ...}``.
+``RemoteEngine`` exposes the same command surface as ``HotTubEngine`` so routers do
+not care which side of the socket the engine lives on.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import Optional
+
+from .engine_commands import ENGINE_COMMAND_TIMEOUT_SEC, CommandRejected
+from .status_block import StatusBlockReader
+
+ENGINE_SOCKET = os.getenv("ENGINE_SOCKET", "/tmp/opensoak-engine.sock")
+ENGINE_IPC_TIMEOUT_SEC = float(os.getenv("ENGINE_IPC_TIMEOUT_SEC", "2.0"))
+
+# Commands an API worker may invoke on the engine
+COMMANDS = ("snapshot", "wake", "reset_faults", "master_shutdown", "submit", "loop_stats", "flow_status", "sensor_readings", "sensor_quality")
+
+
+class EngineUnavailable(Exception):
+    pass
+
+
+class _EngineRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+                cmd = request.get("cmd")
+                if cmd not in COMMANDS:
+                    raise ValueError(f"Unknown command '{cmd}'")
+                result = getattr(self.server.engine, cmd)(**request.get("args", {}))
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                response = {"ok": False, "error": str(e), "rejected": isinstance(e, CommandRejected)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class EngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, engine, path: str = ENGINE_SOCKET):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.engine = engine
+        self.path = path
+        super().__init__(path, _EngineRequestHandler)
+        os.chmod(path, 0o660)
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RemoteEngine:
+    """API-side proxy for an engine running in the engine process."""
+
+    def __init__(self, path: str = ENGINE_SOCKET, timeout: float = ENGINE_IPC_TIMEOUT_SEC, status_block: Optional[StatusBlockReader] = None):
+        self.path = path
+        self.timeout = timeout
+        self.status_block = status_block
+
+    def _call(self, cmd: str, timeout: Optional[float] = None, **args):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout or self.timeout)
+                sock.connect(self.path)
+                sock.sendall(json.dumps({"cmd": cmd, "args": args}).encode("utf-8") + b"\n")
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+        except OSError as e:
+            raise EngineUnavailable(f"Engine process unreachable at {self.path}: {e}")
+        if not line:
+            raise EngineUnavailable("Engine process closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            if response.get("rejected"):
+                raise CommandRejected(response["error"])
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def snapshot(self):
+        # The shared-memory block holds the last scan's readings; only fall back to a
+        # round trip when the engine is not publishing it
+        block = self.status_block.read() if self.status_block is not None else None
+        if block is not None:
+            return {key: block[key] for key in ("current_temp", "hi_limit_temp", "relay_states", "safety_status", "system_locked", "runtimes")}
+        return self._call("snapshot")
+
+    def wake(self):
+        return self._call("wake")
+
+    def reset_faults(self):
+        return self._call("reset_faults")
+
+    def loop_stats(self):
+        return self._call("loop_stats")
+
+    def flow_status(self):
+        return self._call("flow_status")
+
+    def sensor_readings(self):
+        return self._call("sensor_readings")
+
+    def sensor_quality(self):
+        return self._call("sensor_quality")
+
+    def master_shutdown(self):
+        # Waits for the engine to persist the shutdown, like submit()
+        return self._call("master_shutdown", timeout=self.timeout + ENGINE_COMMAND_TIMEOUT_SEC)
+
+    def submit(self, command):
+        return self._call("submit", timeout=self.timeout + ENGINE_COMMAND_TIMEOUT_SEC, command=command.to_dict())
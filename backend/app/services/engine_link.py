@@ -0,0 +1,17 @@
+"""Selects the engine the API talks to.
+
+ENGINE_MODE=embedded (default) runs the control engine and scheduler inside the API
+process, as before. ENGINE_MODE=remote leaves hardware to ``python -m app.engine_service``
+and talks to it over ENGINE_SOCKET, so uvicorn can run several workers.
+"""
+import os
+
+ENGINE_MODE = os.getenv("ENGINE_MODE", "embedded").lower()
+EMBEDDED = ENGINE_MODE != "remote"
+
+if EMBEDDED:
+    from .engine import engine
+else:
+    from .engine_ipc import RemoteEngine
+    from .status_block import StatusBlockReader
+    engine = RemoteEngine(status_block=StatusBlockReader())
@@ -0,0 +1,215 @@
+"""Offline sweep of set point and hysteresis band settings against a thermal model.
+
+Every (set_point, hysteresis_upper, hysteresis_lower) combination is simulated at once:
+the water temperature, heater state and tallies are NumPy arrays with one slot per
+combination, so a step of the simulation is a handful of array operations no matter how
+many settings are being compared. The heater follows the engine's rule (off at
+set_point + upper, on at set_point - lower, otherwise unchanged).
+
+Outside temperatures come from a CSV trace (``timestamp,outside[,water]``; timestamps
+in epoch seconds or ISO 8601) or a synthetic daily swing. Run from backend/::
+
+    python -m app.services.hysteresis_sweep --set-points 100:104:0.5 \\
+        --upper 0.1:2:0.1 --lower 0.1:2:0.1 --comfort 101 104 --days 7
+"""
+import argparse
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .thermal_model import ThermalModel
+
+DEFAULT_STEP_SEC = 30.0
+
+
+@dataclass
+class SweepResult:
+    set_point: np.ndarray
+    upper: np.ndarray
+    lower: np.ndarray
+    heater_kwh: np.ndarray
+    cost: np.ndarray
+    cycles: np.ndarray
+    hours_outside_comfort: np.ndarray
+    min_temp: np.ndarray
+    max_temp: np.ndarray
+    days: float
+
+    def __len__(self):
+        return len(self.set_point)
+
+    def rows(self, order: Optional[np.ndarray] = None) -> List[dict]:
+        order = np.arange(len(self)) if order is None else order
+        return [{
+            "set_point": float(self.set_point[i]),
+            "hysteresis_upper": float(self.upper[i]),
+            "hysteresis_lower": float(self.lower[i]),
+            "heater_kwh": float(self.heater_kwh[i]),
+            "cost": float(self.cost[i]),
+            "cycles": int(self.cycles[i]),
+            "cycles_per_day": float(self.cycles[i] / self.days) if self.days else 0.0,
+            "hours_outside_comfort": float(self.hours_outside_comfort[i]),
+            "min_temp": float(self.min_temp[i]),
+            "max_temp": float(self.max_temp[i]),
+        } for i in order]
+
+    def best(self, limit: int = 10, max_outside_hours: Optional[float] = None,
+             max_cycles_per_day: Optional[float] = None) -> List[dict]:
+        """Cheapest settings that meet the comfort and relay-wear limits."""
+        ok = np.ones(len(self), dtype=bool)
+        if max_outside_hours is not None:
+            ok &= self.hours_outside_comfort <= max_outside_hours
+        if max_cycles_per_day is not None and self.days:
+            ok &= self.cycles / self.days <= max_cycles_per_day
+        candidates = np.flatnonzero(ok)
+        # Cheapest first; ties go to fewer relay cycles
+        order = candidates[np.lexsort((self.cycles[candidates], self.cost[candidates]))]
+        return self.rows(order[:limit])
+
+
+def sweep(outside: np.ndarray, step_sec: float, set_points: Sequence[float], uppers: Sequence[float],
+          lowers: Sequence[float], comfort: Tuple[float, float], model: Optional[ThermalModel] = None,
+          initial_temp: Optional[float] = None, heater_watts: float = 5500.0, kwh_cost: float = 0.12) -> SweepResult:
+    """Simulate every combination over `outside` (F, one value per step)."""
+    model = model or ThermalModel()
+    set_point, upper, lower = (grid.ravel() for grid in np.meshgrid(
+        np.asarray(set_points, dtype=np.float64), np.asarray(uppers, dtype=np.float64),
+        np.asarray(lowers, dtype=np.float64), indexing="ij"))
+    on_at, off_at = set_point - lower, set_point + upper
+    hours = step_sec / 3600.0
+
+    water = set_point.copy() if initial_temp is None else np.full(len(set_point), float(initial_temp))
+    heater = np.zeros(len(set_point), dtype=bool)
+    on_steps = np.zeros(len(set_point), dtype=np.int64)
+    cycles = np.zeros(len(set_point), dtype=np.int64)
+    outside_steps = np.zeros(len(set_point), dtype=np.int64)
+    min_temp, max_temp = water.copy(), water.copy()
+    low, high = comfort
+
+    for air in outside:
+        switched_on = ~heater & (water <= on_at)
+        heater = (heater | switched_on) & (water < off_at)
+        cycles += switched_on
+        on_steps += heater
+        water = model.step(water, air, heater, hours)
+        outside_steps += (water < low) | (water > high)
+        np.minimum(min_temp, water, out=min_temp)
+        np.maximum(max_temp, water, out=max_temp)
+
+    heater_kwh = on_steps * hours * heater_watts / 1000.0
+    return SweepResult(
+        set_point=set_point, upper=upper, lower=lower,
+        heater_kwh=heater_kwh, cost=heater_kwh * kwh_cost, cycles=cycles,
+        hours_outside_comfort=outside_steps * hours,
+        min_temp=min_temp, max_temp=max_temp,
+        days=len(outside) * step_sec / 86400.0,
+    )
+
+
+def parse_range(spec: str) -> np.ndarray:
+    """'102' or inclusive 'start:stop:step'."""
+    parts = [float(p) for p in spec.split(":")]
+    if len(parts) == 1:
+        return np.array(parts)
+    if len(parts) != 3 or parts[2] <= 0:
+        raise ValueError(f"Expected VALUE or START:STOP:STEP, got {spec!r}")
+    start, stop, step = parts
+    return np.round(np.arange(start, stop + step / 2, step), 6)
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def load_outside_trace(path: str, step_sec: float) -> Tuple[np.ndarray, Optional[float]]:
+    """Resample a CSV trace onto the simulation step; returns (outside, first water temp)."""
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        raise ValueError(f"{path} has no rows")
+    times = np.array([_parse_time(row["timestamp"]) for row in rows])
+    outside = np.array([float(row["outside"]) for row in rows])
+    order = np.argsort(times)
+    grid = np.arange(times[order[0]], times[order[-1]], step_sec)
+    water = rows[order[0]].get("water")
+    return np.interp(grid, times[order], outside[order]), float(water) if water else None
+
+
+def synthetic_outside(days: float, step_sec: float, mean: float = 40.0, swing: float = 10.0) -> np.ndarray:
+    """Daily sinusoid, coldest at 05:00."""
+    t = np.arange(0.0, days * 86400.0, step_sec)
+    return mean - swing * np.cos(2 * np.pi * (t / 3600.0 - 5.0) / 24.0)
+
+
+def _settings_defaults():
+    try:
+        from ..db.session import SessionLocal
+        from ..db.models import Settings
+        db = SessionLocal()
+        try:
+            return db.query(Settings).first()
+        finally:
+            db.close()
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Sweep set point / hysteresis settings against a thermal model.")
+    parser.add_argument("--trace", help="CSV with timestamp,outside[,water] columns")
+    parser.add_argument("--days", type=float, default=7.0, help="length of the synthetic outside trace")
+    parser.add_argument("--outside-mean", type=float, default=40.0)
+    parser.add_argument("--outside-swing", type=float, default=10.0)
+    parser.add_argument("--set-points", default="100:104:0.5")
+    parser.add_argument("--upper", default="0.1:2:0.1", help="hysteresis_upper values")
+    parser.add_argument("--lower", default="0.1:2:0.1", help="hysteresis_lower values")
+    parser.add_argument("--comfort", type=float, nargs=2, default=(101.0, 104.0), metavar=("LOW", "HIGH"))
+    parser.add_argument("--max-outside-hours", type=float, help="only report settings within this much discomfort")
+    parser.add_argument("--max-cycles-per-day", type=float)
+    parser.add_argument("--loss-coeff", type=float, help="1/hour (default: model default)")
+    parser.add_argument("--heat-rate", type=float, help="F/hour with the heater on")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP_SEC, help="simulation step, seconds")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--csv", help="write every combination to this file")
+    args = parser.parse_args(argv)
+
+    settings = _settings_defaults()
+    model = ThermalModel()
+    if args.loss_coeff is not None:
+        model.loss_coeff = args.loss_coeff
+    if args.heat_rate is not None:
+        model.heat_rate = args.heat_rate
+
+    if args.trace:
+        outside, initial_temp = load_outside_trace(args.trace, args.step)
+    else:
+        outside, initial_temp = synthetic_outside(args.days, args.step, args.outside_mean, args.outside_swing), None
+
+    result = sweep(
+        outside, args.step, parse_range(args.set_points), parse_range(args.upper), parse_range(args.lower),
+        tuple(args.comfort), model=model, initial_temp=initial_temp,
+        heater_watts=settings.heater_watts if settings else 5500.0,
+        kwh_cost=settings.kwh_cost if settings else 0.12,
+    )
+    print(f"{len(result)} combinations over {result.days:.1f} days")
+    print(f"{'set':>6} {'upper':>6} {'lower':>6} {'kWh':>8} {'cost':>8} {'cyc/day':>8} {'out h':>7}")
+    for row in result.best(args.top, args.max_outside_hours, args.max_cycles_per_day):
+        print(f"{row['set_point']:6.1f} {row['hysteresis_upper']:6.2f} {row['hysteresis_lower']:6.2f} "
+              f"{row['heater_kwh']:8.1f} {row['cost']:8.2f} {row['cycles_per_day']:8.1f} {row['hours_outside_comfort']:7.1f}")
+    if args.csv:
+        rows = result.rows()
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,51 @@
+"""Exclusive leader lease: only the holder actuates hardware and runs schedules.
+
+The lease is an exclusive ``flock`` on LEADER_LOCK_PATH. The kernel drops it when the
+holding process exits, however it exits, so a passive instance simply retries and takes
+over without needing a heartbeat.
+"""
+import fcntl
+import os
+import threading
+
+LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", "/tmp/opensoak-leader.lock")
+
+
+class LeaderLease:
+    def __init__(self, path: str = LEADER_LOCK_PATH):
+        self.path = path
+        self._fd = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Non-blocking; returns True if this process holds (or just took) the lease."""
+        with self._lock:
+            if self._fd is not None:
+                return True
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            # Record the holder for operators; the lock itself is what matters
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{os.getpid()}\n".encode("ascii"))
+            self._fd = fd
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._fd is None:
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+# One lease per process, shared by the engine and the scheduler
+leader_lease = LeaderLease()
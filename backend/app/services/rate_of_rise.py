@@ -0,0 +1,108 @@
+"""Early thermal fault detection from the rate of change of recent readings.
+
+The absolute hi-limit check only trips once a reading reaches 110F, after the moving
+average has lagged behind. This detector keeps the last ROR_WINDOW_SEC of safety-phase
+samples and fits least-squares slopes (F/min) to the water temperature and to the
+hi-limit minus water delta, all in one vectorized pass. It flags:
+
+* runaway heating: water rising faster than any healthy heater can drive it;
+* a stuck heater: water still rising while the heater has been off for the window;
+* divergence: the hi-limit probe pulling away from the water, as happens when the
+  heater is on without flow through it.
+
+A condition must hold for ROR_CONFIRM_SAMPLES consecutive samples before it trips.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+ROR_WINDOW_SEC = float(os.getenv("ROR_WINDOW_SEC", "30"))
+ROR_MIN_SAMPLES = int(os.getenv("ROR_MIN_SAMPLES", "20"))
+ROR_CONFIRM_SAMPLES = int(os.getenv("ROR_CONFIRM_SAMPLES", "3"))
+ROR_MAX_RISE_F_PER_MIN = float(os.getenv("ROR_MAX_RISE_F_PER_MIN", "1.0")) # healthy heaters manage ~0.1
+ROR_STUCK_RISE_F_PER_MIN = float(os.getenv("ROR_STUCK_RISE_F_PER_MIN", "0.3"))
+ROR_DIVERGE_F_PER_MIN = float(os.getenv("ROR_DIVERGE_F_PER_MIN", "1.0"))
+ROR_DIVERGE_MIN_DELTA = float(os.getenv("ROR_DIVERGE_MIN_DELTA", "3.0"))
+
+
+class RateOfRiseDetector:
+    def __init__(self, window: float = ROR_WINDOW_SEC, capacity: int = 512, min_samples: int = ROR_MIN_SAMPLES,
+                 confirm: int = ROR_CONFIRM_SAMPLES, max_rise: float = ROR_MAX_RISE_F_PER_MIN,
+                 stuck_rise: float = ROR_STUCK_RISE_F_PER_MIN, diverge_rate: float = ROR_DIVERGE_F_PER_MIN,
+                 diverge_delta: float = ROR_DIVERGE_MIN_DELTA):
+        self.window = window
+        self.min_samples = min_samples
+        self.confirm = confirm
+        self.max_rise = max_rise
+        self.stuck_rise = stuck_rise
+        self.diverge_rate = diverge_rate
+        self.diverge_delta = diverge_delta
+        # Ring of samples: time, water, hi-limit - water, heater relay state
+        self.times = np.full(capacity, np.nan)
+        self.values = np.full((2, capacity), np.nan)
+        self.heater = np.zeros(capacity, dtype=bool)
+        self.next = 0
+        self.pending = None # condition seen on consecutive samples, not yet confirmed
+        self.pending_count = 0
+        self.water_rate = 0.0
+        self.delta_rate = 0.0
+        self.trips = 0
+
+    def reset(self):
+        self.times[:] = np.nan
+        self.pending, self.pending_count = None, 0
+        self.water_rate = self.delta_rate = 0.0
+
+    def add(self, t: float, water: float, hi_limit: float, heater_on: bool) -> Optional[str]:
+        """Record one sample (monotonic seconds); returns a fault description when one trips."""
+        slot = self.next
+        self.times[slot] = t
+        self.values[0, slot] = water
+        self.values[1, slot] = hi_limit - water
+        self.heater[slot] = heater_on
+        self.next = (slot + 1) % len(self.times)
+
+        in_window = self.times >= t - self.window
+        if np.count_nonzero(in_window) < self.min_samples:
+            return None
+
+        # Least-squares slopes of both series against time in one pass
+        times = self.times[in_window]
+        centered_t = times - times.mean()
+        values = self.values[:, in_window]
+        centered_v = values - values.mean(axis=1, keepdims=True)
+        slopes = (centered_v @ centered_t) / np.dot(centered_t, centered_t) * 60.0
+        self.water_rate, self.delta_rate = float(slopes[0]), float(slopes[1])
+
+        condition = None
+        if self.water_rate >= self.max_rise:
+            condition = f"RUNAWAY HEATING ({self.water_rate:.2f}F/min)"
+        elif self.water_rate >= self.stuck_rise and not self.heater[in_window].any():
+            condition = f"HEATER STUCK ON ({self.water_rate:.2f}F/min with heater off)"
+        elif self.delta_rate >= self.diverge_rate and hi_limit - water >= self.diverge_delta:
+            condition = f"HI-LIMIT DIVERGING ({self.delta_rate:.2f}F/min)"
+
+        if condition is None:
+            self.pending, self.pending_count = None, 0
+            return None
+        # Consecutive samples may describe the same fault with different numbers
+        kind = condition.split(" (")[0]
+        if self.pending == kind:
+            self.pending_count += 1
+        else:
+            self.pending, self.pending_count = kind, 1
+        if self.pending_count < self.confirm:
+            return None
+        self.trips += 1
+        return condition
+
+    def stats(self) -> dict:
+        return {
+            "window": self.window,
+            "samples": int(np.count_nonzero(~np.isnan(self.times))),
+            "water_rate_f_per_min": self.water_rate,
+            "hi_limit_delta_rate_f_per_min": self.delta_rate,
+            "pending": self.pending,
+            "trips": self.trips,
+        }
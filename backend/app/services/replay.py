@@ -0,0 +1,175 @@
+"""Replay a recorded controller trace through the engine's control logic.
+
+Each record is presented by a ``ReplayController`` and run through the safety check and
+``HotTubEngine._tick`` back to back, on the record's own wall and monotonic time, with
+no sleeping in between. The engine runs against a throwaway in-memory SQLite database
+seeded from a fixture (Settings and SystemState column values), never the configured
+DATABASE_URL: the thermal events, usage logs and state changes a tick writes are
+discarded with it, and results depend only on the trace and the fixture.
+
+Records are written once per control tick, so replay runs the safety check once per
+record, while the live engine scans every ENGINE_SAFETY_PERIOD_SEC (twice per tick by
+default). The rate-of-rise detector therefore sees fewer samples, and a hi-limit
+crossing between records is caught at the next one. The report's stats show both
+intervals.
+
+The report holds the relay outputs after every tick next to the read-backs recorded at
+the following tick, plus per-tick timings, so a trace doubles as a regression test and
+a throughput benchmark::
+
+    python -m app.services.replay trace.bin [--fixture fixture.json] [--seed-from-database]
+"""
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..db.models import Base, Settings, SystemState
+
+from ..hardware.trace import ReplayController, Trace, relay_states
+
+
+@dataclass
+class ReplayReport:
+    relays: np.ndarray # replayed relay mask after each tick
+    expected: np.ndarray # recorded read-backs at the next tick (last tick has none)
+    tick_seconds: np.ndarray
+    safety_status: str
+    system_locked: bool
+    record_interval: Optional[float] = None # median monotonic spacing of the records
+    live_safety_period: Optional[float] = None # the engine's safety scan period when live
+
+    @property
+    def ticks(self) -> int:
+        return len(self.relays)
+
+    def mismatches(self) -> List[dict]:
+        compared = self.relays[:-1]
+        differ = np.flatnonzero(compared != self.expected)
+        return [{"tick": int(i), "expected": relay_states(int(self.expected[i])), "actual": relay_states(int(compared[i]))}
+                for i in differ]
+
+    def stats(self) -> dict:
+        total = float(self.tick_seconds.sum())
+        return {
+            "ticks": self.ticks,
+            "mismatches": int(np.count_nonzero(self.relays[:-1] != self.expected)),
+            "ticks_per_sec": self.ticks / total if total else None,
+            "mean_tick": float(self.tick_seconds.mean()) if self.ticks else None,
+            "p99_tick": float(np.percentile(self.tick_seconds, 99)) if self.ticks else None,
+            "max_tick": float(self.tick_seconds.max()) if self.ticks else None,
+            "safety_status": self.safety_status,
+            "system_locked": self.system_locked,
+            # Replay checks safety once per record, not at the live scan rate
+            "record_interval": self.record_interval,
+            "live_safety_period": self.live_safety_period,
+        }
+
+
+# Desired state when no fixture is given: heating at the model defaults
+DEFAULT_FIXTURE = {"settings": {}, "state": {"heater": True}}
+
+
+def replay_session_factory(fixture: Optional[Dict] = None) -> sessionmaker:
+    """A fresh in-memory database holding one Settings and one SystemState row."""
+    fixture = DEFAULT_FIXTURE if fixture is None else fixture
+    db_engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=db_engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    db = factory()
+    try:
+        db.add_all([Settings(**fixture.get("settings", {})), SystemState(**fixture.get("state", {}))])
+        db.commit()
+    finally:
+        db.close()
+    return factory
+
+
+def fixture_from_database() -> Dict:
+    """Read (never write) the configured database's settings and desired state."""
+    from ..db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        fixture = {}
+        for key, model in (("settings", Settings), ("state", SystemState)):
+            row = db.query(model).first()
+            columns = [column.key for column in inspect(model).columns if column.key != "id"]
+            fixture[key] = {column: getattr(row, column) for column in columns} if row else {}
+        return fixture
+    finally:
+        db.close()
+
+
+def replay_trace(trace: Trace, engine=None, fixture: Optional[Dict] = None) -> ReplayReport:
+    """Drive `engine` (a fresh HotTubEngine by default) through every record of `trace`.
+
+    `fixture` seeds the throwaway database: ``{"settings": {...}, "state": {...}}``.
+    """
+    if engine is None:
+        from .engine import HotTubEngine
+        engine = HotTubEngine()
+    engine.session_factory = replay_session_factory(fixture)
+    controller = ReplayController(trace)
+    engine.attach_controller(controller)
+    engine.wall_clock = controller.clock.wall
+    engine.clock = controller.clock.monotonic
+    engine.leading = True # act on flow-loss edges like the live leader does
+
+    count = len(trace)
+    relays = np.zeros(count, dtype=np.uint8)
+    tick_seconds = np.zeros(count)
+    if count:
+        controller.restore_relays(0)
+        engine.last_heater_on = controller.get_relay_state(controller.HEATER)
+    for i in range(count):
+        controller.load(i)
+        start = time.perf_counter()
+        engine._check_safety()
+        engine._tick()
+        tick_seconds[i] = time.perf_counter() - start
+        relays[i] = controller.relay_mask()
+
+    return ReplayReport(
+        relays=relays,
+        expected=np.array(trace.records["relays"][1:], dtype=np.uint8),
+        tick_seconds=tick_seconds,
+        safety_status=engine.safety_status,
+        system_locked=engine.system_locked,
+        record_interval=float(np.median(np.diff(trace.records["monotonic"]))) if count > 1 else None,
+        live_safety_period=engine.loop.phase("safety").period,
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a controller trace through the engine's control logic.")
+    parser.add_argument("trace", help="trace recorded with ENGINE_TRACE_FILE")
+    parser.add_argument("--fixture", help="JSON file with the settings and state to replay against")
+    parser.add_argument("--seed-from-database", action="store_true",
+                        help="copy settings and state from the configured database (read only)")
+    args = parser.parse_args(argv)
+    if args.fixture and args.seed_from_database:
+        parser.error("use either --fixture or --seed-from-database")
+
+    fixture = None
+    if args.fixture:
+        with open(args.fixture) as f:
+            fixture = json.load(f)
+    elif args.seed_from_database:
+        fixture = fixture_from_database()
+    report = replay_trace(Trace.load(args.trace), fixture=fixture)
+    for key, value in report.stats().items():
+        print(f"{key}: {value}")
+    for mismatch in report.mismatches()[:20]:
+        print(f"tick {mismatch['tick']}: expected {mismatch['expected']} got {mismatch['actual']}")
+    return 0 if not report.mismatches() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,43 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from ..db.session import SessionLocal
 from ..db.models import Schedule, SystemState, Settings, UsageLog, VacationEvent
+from .engine_commands import EndSchedule, TriggerSchedule
+from .leader import leader_lease
+from .thermal_model import THERMAL_MODEL_REFIT_MIN, refit_thermal_model
 from datetime import datetime
 
 class HotTubScheduler:
     def __init__(self):
         self.scheduler = BackgroundScheduler()
+        # Held by the engine; jobs only check it so they never take leadership themselves
+        self.lease = leader_lease
+        self.caught_up = False # startup catch-up done since this process became leader
         self.scheduler.add_job(self.check_schedules, 'interval', minutes=1)
+        self.scheduler.add_job(self.refit_thermal_model, 'interval', minutes=THERMAL_MODEL_REFIT_MIN)
 
     def start(self):
         self.scheduler.start()
-        # Initial check on startup to catch up
+        # Initial check on startup to catch up (repeated on the first check after taking over)
         self.check_schedules(is_startup=True)
 
     def stop(self):
         self.scheduler.shutdown()
 
+    def refit_thermal_model(self):
+        # The fit row is shared; one writer is enough
+        if not self.lease.is_leader:
+            return
+        db = SessionLocal()
+        try:
+            fit = refit_thermal_model(db)
+            if fit.loss_coeff is not None:
+                print(f"Thermal model refit: loss {fit.loss_coeff:.4f}/hr, heater {fit.heat_rate:.2f}F/hr over {fit.windows:.0f} windows")
+        except Exception as e:
+            db.rollback()
+            print(f"Thermal model refit error: {e}")
+        finally:
+            db.close()
+
     def _normalize_compare_time(self, value, now):
         if value.tzinfo is not None and now.tzinfo is None:
             return now.replace(tzinfo=value.tzinfo), value
@@ -66,7 +88,23 @@ class HotTubScheduler:
         except:
             return False
 
+    def _submit(self, command):
+        # Schedules change control state through the engine, like the API does, so only
+        # the engine thread commits SystemState/Settings
+        from .engine import engine
+        try:
+            return engine.submit(command)
+        except Exception as e:
+            print(f"Schedule command {type(command).__name__} failed: {e}")
+
     def check_schedules(self, is_startup=False):
+        # Only the leader activates schedules; passive instances would duplicate them
+        if not self.lease.is_leader:
+            self.caught_up = False
+            return
+        if not self.caught_up:
+            is_startup = True
+            self.caught_up = True
         db = SessionLocal()
         try:
             now = datetime.now()
@@ -77,39 +115,44 @@ class HotTubScheduler:
             schedules = db.query(Schedule).filter(Schedule.active == True).all()
             active_vacations = self.get_active_vacations(db, now)
             
+            # Decide here, read-only; the engine applies the changes
+            commands = []
             for sched in schedules:
                 if self.schedule_disabled_by_vacation(sched, now=now, active_vacations=active_vacations):
                     if self.is_in_window(sched.start_time, sched.end_time) and state and state.scheduled_session_active:
-                        self.deactivate_schedule(sched, db)
+                        commands.append(EndSchedule(sched.id))
                     continue
 
                 days = sched.days_of_week.split(',')
                 if day_of_week in days:
                     # Regular time-based triggers
                     if current_time == sched.start_time:
-                        self.activate_schedule(sched, db)
+                        commands.append(TriggerSchedule(sched.id))
                     elif current_time == sched.end_time:
-                        self.deactivate_schedule(sched, db)
+                        commands.append(EndSchedule(sched.id))
                     # Startup/Resume logic: If we are in the window but system says inactive, catch up
                     elif is_startup and self.is_in_window(sched.start_time, sched.end_time):
                         if state and not state.scheduled_session_active:
                             print(f"Startup catch-up: Resuming {sched.name}")
-                            self.activate_schedule(sched, db)
+                            commands.append(TriggerSchedule(sched.id))
         finally:
             db.close()
+        for command in commands:
+            self._submit(command)
 
-    def activate_schedule(self, sched, db):
+    def activate_schedule(self, sched, db) -> bool:
+        """Applied by the engine (TriggerSchedule), which commits; False when skipped (vacation, or no state yet)."""
         active_vacations = self.get_active_vacations(db)
         if self.schedule_disabled_by_vacation(sched, active_vacations=active_vacations):
             print(f"Skipping schedule during vacation: {sched.name}")
-            return
+            return False
 
         print(f"Activating schedule: {sched.name} ({sched.type})")
         state = db.query(SystemState).first()
         settings = db.query(Settings).first()
         
         if not state or not settings:
-            return
+            return False
 
         # Calculate expiry for countdown
         now = datetime.now()
@@ -141,9 +184,10 @@ class HotTubScheduler:
             
         log = UsageLog(event=f"{sched.type.capitalize()} Cycle Started", details=event_details)
         db.add(log)
-        db.commit()
+        return True
 
     def deactivate_schedule(self, sched, db):
+        """Applied by the engine (EndSchedule), which commits."""
         print(f"Deactivating schedule: {sched.name} ({sched.type})")
         state = db.query(SystemState).first()
         settings = db.query(Settings).first()
@@ -168,6 +212,5 @@ class HotTubScheduler:
             
         log = UsageLog(event=f"{sched.type.capitalize()} Cycle Ended", details=f"Schedule: {sched.name}")
         db.add(log)
-        db.commit()
 
 scheduler = HotTubScheduler()
@@ -0,0 +1,130 @@
+"""Fixed-layout shared-memory status block published by the engine once per tick.
+
+The block is an mmap of a small file (in /dev/shm when available) guarded by a seqlock:
+the writer makes the sequence counter odd, writes the payload and makes it even again;
+readers copy the payload and retry if the counter was odd or changed meanwhile. Any API
+worker can take a consistent snapshot without syscalls, IPC or database access.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Dict, Optional
+
+_DEFAULT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+STATUS_BLOCK_PATH = os.getenv("STATUS_BLOCK_PATH", os.path.join(_DEFAULT_DIR, "opensoak-status"))
+# A block older than this is treated as absent (engine stopped or hung)
+STATUS_BLOCK_MAX_AGE_SEC = float(os.getenv("STATUS_BLOCK_MAX_AGE_SEC", "5.0"))
+
+MAGIC = 0x4F534B31  # "OSK1"
+RELAYS = ("circ_pump", "heater", "jet_pump", "light", "ozone")
+SAFETY_CODES = {
+    "OK": 0,
+    "CRITICAL: HI-LIMIT FAULT": 1,
+    "STOP: NO FLOW DETECTED": 2,
+    "STOP: MASTER SHUTDOWN": 3,
+}
+SAFETY_CODE_OTHER = 255
+SAFETY_TEXT_BYTES = 120
+
+# seq is kept outside the payload so the payload can be copied in one struct call
+_SEQ = struct.Struct("<Q")
+# magic, tick, published_at, current_temp, hi_limit_temp, session_expires,
+# 5 runtimes, relay bitmask, safety code, system_locked, safety text
+_PAYLOAD = struct.Struct(f"<IQddddddddd BBB {SAFETY_TEXT_BYTES}s")
+BLOCK_SIZE = _SEQ.size + _PAYLOAD.size
+
+
+class StatusBlockWriter:
+    def __init__(self, path: str = STATUS_BLOCK_PATH):
+        self.path = path
+        self.seq = 0
+        self.tick = 0
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, BLOCK_SIZE)
+            self.buf = mmap.mmap(fd, BLOCK_SIZE, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+    def publish(self, engine):
+        relay_states = engine.controller.get_all_states()
+        bitmask = 0
+        for bit, name in enumerate(RELAYS):
+            if relay_states.get(name):
+                bitmask |= 1 << bit
+        status = engine.safety_status
+        self.tick += 1
+        payload = _PAYLOAD.pack(
+            MAGIC,
+            self.tick,
+            time.time(),
+            float(engine.current_temp),
+            float(engine.hi_limit_temp),
+            engine.session_expires or 0.0,
+            *(float(engine.runtimes.get(name, 0.0)) for name in RELAYS),
+            bitmask,
+            SAFETY_CODES.get(status, SAFETY_CODE_OTHER),
+            1 if engine.system_locked else 0,
+            status.encode("utf-8")[:SAFETY_TEXT_BYTES],
+        )
+        self.seq += 1  # odd: write in progress
+        _SEQ.pack_into(self.buf, 0, self.seq)
+        self.buf[_SEQ.size:BLOCK_SIZE] = payload
+        self.seq += 1  # even: consistent
+        _SEQ.pack_into(self.buf, 0, self.seq)
+
+    def close(self):
+        self.buf.close()
+
+
+class StatusBlockReader:
+    def __init__(self, path: str = STATUS_BLOCK_PATH, max_age: float = STATUS_BLOCK_MAX_AGE_SEC):
+        self.path = path
+        self.max_age = max_age
+        self.buf = None
+
+    def _open(self) -> bool:
+        if self.buf is not None:
+            return True
+        try:
+            with open(self.path, "rb") as f:
+                self.buf = mmap.mmap(f.fileno(), BLOCK_SIZE, access=mmap.ACCESS_READ)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def read(self, retries: int = 100) -> Optional[Dict]:
+        """Consistent snapshot of the block, or None if missing, unpublished or stale."""
+        if not self._open():
+            return None
+        for _ in range(retries):
+            before = _SEQ.unpack_from(self.buf, 0)[0]
+            if before & 1:
+                continue
+            payload = self.buf[_SEQ.size:BLOCK_SIZE]
+            if _SEQ.unpack_from(self.buf, 0)[0] == before:
+                break
+        else:
+            return None
+
+        (magic, tick, published_at, current_temp, hi_limit_temp, session_expires, *rest) = _PAYLOAD.unpack(payload)
+        runtimes, (bitmask, safety_code, locked, safety_text) = rest[:len(RELAYS)], rest[len(RELAYS):]
+        if magic != MAGIC or time.time() - published_at > self.max_age:
+            # The engine may have recreated the file; map it afresh next time
+            self.buf.close()
+            self.buf = None
+            return None
+        return {
+            "tick": tick,
+            "published_at": published_at,
+            "current_temp": current_temp,
+            "hi_limit_temp": hi_limit_temp,
+            "session_expires": session_expires or None,
+            "relay_states": {name: bool(bitmask & (1 << bit)) for bit, name in enumerate(RELAYS)},
+            "safety_code": safety_code,
+            "safety_status": safety_text.rstrip(b"\0").decode("utf-8", errors="replace"),
+            "system_locked": bool(locked),
+            "runtimes": dict(zip(RELAYS, runtimes)),
+        }
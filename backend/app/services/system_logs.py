@@ -0,0 +1,189 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Pattern
+
+LOG_UNITS = ["opensoak.service", "opensoak-frontend.service"]
+LOG_BUFFER_SIZE = int(os.getenv("SYSTEM_LOG_BUFFER_SIZE", "2000"))
+# Local stand-in for the journal (dev machines, containers without systemd)
+SYSTEM_LOG_FILE = os.getenv("SYSTEM_LOG_FILE")
+
+# syslog priorities, as used by journald's PRIORITY field
+LEVELS = {"emerg": 0, "alert": 1, "crit": 2, "err": 3, "warning": 4, "notice": 5, "info": 6, "debug": 7}
+
+# Leading ISO-8601 timestamp of a log file line, optionally in brackets
+LINE_TIMESTAMP = re.compile(r"^\[?(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)")
+
+
+def line_timestamp(message: str) -> Optional[float]:
+    match = LINE_TIMESTAMP.match(message)
+    if not match:
+        return None
+    try:
+        parsed = datetime.fromisoformat(match.group(1).replace(",", ".").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.timestamp() # naive stamps are local time
+
+
+class SystemLogService:
+    """Tails the journal once in the background into a bounded ring buffer.
+
+    Requests read and filter the buffer instead of spawning journalctl, and followers
+    poll it by sequence number. When journalctl is not available (or SYSTEM_LOG_FILE is
+    set) a plain log file is tailed instead.
+    """
+
+    def __init__(self, max_entries: int = LOG_BUFFER_SIZE, log_file: Optional[str] = SYSTEM_LOG_FILE):
+        self.entries = deque(maxlen=max_entries)
+        self.log_file = log_file
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.running = False
+        self.thread = None
+        self.process = None
+        self.source = None
+        # Resume points, so a restarted tail does not re-add what is already buffered
+        self.journal_cursor = None
+        self.file_offset = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def append(self, timestamp: float, unit: str, priority: int, message: str):
+        # Access log noise never reaches the buffer
+        if '" 200 OK' in message:
+            return
+        with self.lock:
+            self.seq += 1
+            self.entries.append({
+                "seq": self.seq,
+                "timestamp": timestamp,
+                "unit": unit,
+                "priority": priority,
+                "message": message,
+            })
+
+    def query(
+        self,
+        level: Optional[str] = None,
+        unit: Optional[str] = None,
+        pattern: Optional[Pattern] = None,
+        since: Optional[float] = None,
+        after_seq: int = 0,
+        limit: int = 100,
+    ) -> List[Dict]:
+        max_priority = LEVELS.get(level, 7) if level else 7
+        with self.lock:
+            snapshot = list(self.entries)
+        matched = [
+            entry for entry in snapshot
+            if entry["seq"] > after_seq
+            and entry["priority"] <= max_priority
+            and (unit is None or entry["unit"] == unit)
+            and (since is None or entry["timestamp"] > since)
+            and (pattern is None or pattern.search(entry["message"]))
+        ]
+        return matched[-limit:] if limit else matched
+
+    @staticmethod
+    def format_entry(entry: Dict) -> str:
+        ts = datetime.fromtimestamp(entry["timestamp"], tz=timezone.utc).astimezone().isoformat(timespec="seconds")
+        return f"{ts} {entry['unit']}: {entry['message']}"
+
+    def _run(self):
+        if not self.log_file and not shutil.which("journalctl"):
+            print("System logs unavailable: journalctl not found and SYSTEM_LOG_FILE not set")
+            return
+        while self.running:
+            try:
+                if self.log_file:
+                    self._tail_file()
+                else:
+                    self._tail_journal()
+            except Exception as e:
+                print(f"System log tail error: {e}")
+            if self.running:
+                time.sleep(5)
+
+    def _tail_journal(self):
+        self.source = "journal"
+        cmd = ["journalctl", "-f", "--no-pager", "-o", "json"]
+        if self.journal_cursor:
+            cmd += ["--after-cursor", self.journal_cursor]
+        else:
+            cmd += ["-n", str(self.entries.maxlen)]
+        for unit in LOG_UNITS:
+            cmd += ["-u", unit]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            for raw in self.process.stdout:
+                if not self.running:
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue # one garbled line; the rest of the stream is fine
+                message = record.get("MESSAGE", "")
+                if isinstance(message, list):  # journald encodes non-UTF-8 payloads as byte arrays
+                    message = bytes(message).decode("utf-8", errors="replace")
+                self.append(
+                    int(record.get("__REALTIME_TIMESTAMP", 0)) / 1_000_000,
+                    record.get("_SYSTEMD_UNIT", "unknown"),
+                    int(record.get("PRIORITY", 6)),
+                    message,
+                )
+                self.journal_cursor = record.get("__CURSOR", self.journal_cursor)
+        finally:
+            if self.process.poll() is None:
+                self.process.terminate()
+
+    def _tail_file(self):
+        self.source = self.log_file
+        unit = os.path.basename(self.log_file)
+        with open(self.log_file, "r", errors="replace") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < self.file_offset:
+                self.file_offset = 0 # truncated or rotated: read it from the start
+            f.seek(self.file_offset)
+            # Lines already in the file when the tail starts are history, not "now"
+            last_stamp = stat.st_mtime
+            caught_up = False
+            while self.running:
+                line = f.readline()
+                if not line:
+                    caught_up = True
+                    time.sleep(0.5)
+                    continue
+                self.file_offset = f.tell()
+                message = line.rstrip("\n")
+                lowered = message.lower()
+                if "error" in lowered or "critical" in lowered:
+                    priority = LEVELS["err"]
+                elif "warn" in lowered:
+                    priority = LEVELS["warning"]
+                else:
+                    priority = LEVELS["info"]
+                stamp = line_timestamp(message)
+                if stamp is None:
+                    stamp = time.time() if caught_up else last_stamp
+                last_stamp = stamp
+                self.append(stamp, unit, priority, message)
+
+
+system_log_service = SystemLogService()
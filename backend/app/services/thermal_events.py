@@ -0,0 +1,155 @@
+"""Re-derive ``heating_events`` from the raw temperature log in one vectorized pass.
+
+Live events come from per-degree edge tracking in the engine tick. They are lost when
+the service restarts mid-event, and they can't be recomputed after a filter or
+calibration change. This rebuild works on ``TemperatureLog`` instead:
+
+* each log interval is "heating" if the heater duty recorded with it is at least 0.5.
+  Older rows predate duty logging, so the smoothed temperature trend stands in for
+  the relay;
+* segments break on heater edges and on logging gaps;
+* each segment gets a least-squares slope (the efficiency score, F/hr) and the mean
+  logged outside temperature, with the same plausibility limits as live events.
+
+The table is rewritten in one transaction. Run from backend/::
+
+    python -m app.services.thermal_events
+"""
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import insert, select
+
+from ..core.columnar import epoch_seconds
+from ..db.models import HeatingEvent, TemperatureLog
+from .thermal_model import THERMAL_FIT_MAX_GAP_SEC
+
+TREND_SAMPLES = 5 # log intervals averaged when the heater state has to be inferred
+MIN_EVENT_SEC = 60
+MAX_HEAT_RATE = 20.0 # F/hr; faster "heating" is a sensor glitch
+MAX_COOL_RATE = -10.0
+
+
+def derive_events(times, water, outside, duty, max_gap: float = THERMAL_FIT_MAX_GAP_SEC) -> dict:
+    """Heat/cool segments as parallel arrays (see module docstring)."""
+    times, water, outside, duty = (np.asarray(a, dtype=np.float64) for a in (times, water, outside, duty))
+    empty = {key: np.empty(0) for key in ("event_type", "start_temp", "target_temp", "duration_seconds",
+                                          "outside_temp", "efficiency_score", "end_time")}
+    if len(times) < 2:
+        return empty
+
+    dt = np.diff(times)
+    rise = np.diff(water)
+    valid = (dt > 0) & (dt <= max_gap) & (water[:-1] > 0) & (water[1:] > 0)
+    trend = np.convolve(np.where(valid, rise, 0.0), np.ones(TREND_SAMPLES), mode="same")
+    interval_duty = duty[1:]
+    heating = np.where(np.isnan(interval_duty), trend > 0, interval_duty >= 0.5)
+
+    # A segment starts after a gap or on a heater edge; invalid intervals belong to none
+    starts = np.ones(len(dt), dtype=bool)
+    starts[1:] = ~valid[:-1] | (heating[1:] != heating[:-1])
+    segment = np.cumsum(starts) - 1
+    index = np.flatnonzero(valid)
+    if len(index) == 0:
+        return empty
+    segment = segment[index]
+    segments, group = np.unique(segment, return_inverse=True)
+    count = len(segments)
+
+    first = np.full(count, len(dt), dtype=np.intp)
+    last = np.zeros(count, dtype=np.intp)
+    np.minimum.at(first, group, index)
+    np.maximum.at(last, group, index)
+    start_row, end_row = first, last + 1
+
+    # Slope of the interval midpoints, in time relative to the segment start for precision
+    t_mid = (times[index] + times[index + 1]) / 2 - times[start_row[group]]
+    w_mid = (water[index] + water[index + 1]) / 2
+    n = np.bincount(group, minlength=count).astype(np.float64)
+    st = np.bincount(group, t_mid, count)
+    sw = np.bincount(group, w_mid, count)
+    stt = np.bincount(group, t_mid * t_mid, count)
+    stw = np.bincount(group, t_mid * w_mid, count)
+    denom = n * stt - st * st
+    duration = times[end_row] - times[start_row]
+    overall = (water[end_row] - water[start_row]) / np.where(duration > 0, duration, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denom > 1e-9 * np.maximum(n * stt, 1.0), (n * stw - st * sw) / denom, overall)
+    efficiency = slope * 3600.0
+
+    air = outside[index + 1]
+    known = ~np.isnan(air)
+    air_count = np.bincount(group, known, count)
+    with np.errstate(invalid="ignore"):
+        outside_mean = np.bincount(group, np.where(known, air, 0.0), count) / air_count
+
+    is_heat = heating[first]
+    keep = (duration >= MIN_EVENT_SEC) & np.where(
+        is_heat, (efficiency >= 0) & (efficiency <= MAX_HEAT_RATE), (efficiency <= 0) & (efficiency >= MAX_COOL_RATE))
+    return {
+        "event_type": np.where(is_heat, "heat", "cool")[keep],
+        "start_temp": water[start_row][keep],
+        "target_temp": water[end_row][keep],
+        "duration_seconds": duration[keep],
+        "outside_temp": outside_mean[keep],
+        "efficiency_score": efficiency[keep],
+        "end_time": times[end_row][keep],
+    }
+
+
+def rebuild_heating_events(db) -> int:
+    """Replace every HeatingEvent with ones derived from TemperatureLog; returns the count."""
+    rows = db.execute(
+        select(TemperatureLog.timestamp, TemperatureLog.value, TemperatureLog.outside_temp, TemperatureLog.heater_duty)
+        .order_by(TemperatureLog.timestamp, TemperatureLog.id)
+    ).all()
+    if rows:
+        timestamps, water, outside, duty = zip(*rows)
+        events = derive_events(
+            epoch_seconds(timestamps),
+            [v if v is not None else 0.0 for v in water],
+            [np.nan if v is None else v for v in outside],
+            [np.nan if v is None else v for v in duty],
+        )
+    else:
+        events = derive_events([], [], [], [])
+
+    records = [{
+        # Naive UTC like the server_default timestamps
+        "timestamp": datetime.fromtimestamp(end, timezone.utc).replace(tzinfo=None),
+        "event_type": str(kind),
+        "start_temp": float(start),
+        "target_temp": float(target),
+        "duration_seconds": float(duration),
+        "outside_temp": None if np.isnan(air) else float(air),
+        "efficiency_score": float(score),
+    } for end, kind, start, target, duration, air, score in zip(
+        events["end_time"], events["event_type"], events["start_temp"], events["target_temp"],
+        events["duration_seconds"], events["outside_temp"], events["efficiency_score"])]
+
+    try:
+        db.query(HeatingEvent).delete(synchronize_session=False)
+        if records:
+            db.execute(insert(HeatingEvent), records)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(records)
+
+
+def main():
+    from ..db.session import SessionLocal, init_db
+    init_db()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = rebuild_heating_events(db)
+        print(f"Rebuilt {count} heating events in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""First-order thermal model of the tub for offline what-if simulation.
+
+Newton cooling toward the outside air plus a constant heater input::
+
+    dT/dt = -loss_coeff * (T - T_outside) + heat_rate * heater_on      (F per hour)
+
+The defaults describe a ~400 gal tub with the stock 5.5 kW heater, losing about 1.5F/hr
+at 100F water and 40F air.
+
+``refit_thermal_model`` fits both parameters from ``TemperatureLog`` rows (water, outside
+air and heater duty per log interval). Consecutive intervals are grouped into windows of
+THERMAL_FIT_WINDOW, and each window's mean rate of change is one least-squares row. The
+normal equations are kept in the ``thermal_model_fit`` row, so each refit only reads logs
+newer than the last one folded in. Older windows decay with a THERMAL_FIT_HALF_LIFE_DAYS
+half-life so the fit follows the seasons (a cover, wind, insulation changes).
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ..core.columnar import epoch_seconds
+from ..db.models import TemperatureLog, ThermalModelFit
+
+DEFAULT_LOSS_COEFF = 0.025 # 1/hour
+DEFAULT_HEAT_RATE = 5.7 # F/hour with the heater on
+
+THERMAL_FIT_WINDOW = int(os.getenv("THERMAL_FIT_WINDOW", "15")) # log intervals (minutes) per window
+THERMAL_FIT_MAX_GAP_SEC = float(os.getenv("THERMAL_FIT_MAX_GAP_SEC", "180"))
+THERMAL_FIT_MIN_WINDOWS = float(os.getenv("THERMAL_FIT_MIN_WINDOWS", "24"))
+THERMAL_FIT_HALF_LIFE_DAYS = float(os.getenv("THERMAL_FIT_HALF_LIFE_DAYS", "30"))
+THERMAL_MODEL_REFIT_MIN = float(os.getenv("THERMAL_MODEL_REFIT_MIN", "30"))
+
+
+@dataclass
+class ThermalModel:
+    loss_coeff: float = DEFAULT_LOSS_COEFF
+    heat_rate: float = DEFAULT_HEAT_RATE
+
+    def rate(self, water, outside, heater_on):
+        """F/hour; works elementwise on arrays."""
+        return -self.loss_coeff * (np.asarray(water) - outside) + self.heat_rate * np.asarray(heater_on)
+
+    def step(self, water, outside, heater_on, hours: float):
+        """Exact solution over one step with the outside temperature and heater held constant."""
+        if self.loss_coeff <= 0:
+            return water + self.rate(water, outside, heater_on) * hours
+        # Equilibrium the water decays toward for this heater state
+        equilibrium = outside + self.heat_rate * np.asarray(heater_on) / self.loss_coeff
+        return equilibrium + (water - equilibrium) * np.exp(-self.loss_coeff * hours)
+
+    def hours_to_reach(self, water: float, target: float, outside: float) -> Optional[float]:
+        """Heater-on time from `water` to `target`; None if the heater can't get there."""
+        if water >= target:
+            return 0.0
+        if self.loss_coeff <= 0:
+            return (target - water) / self.heat_rate if self.heat_rate > 0 else None
+        equilibrium = outside + self.heat_rate / self.loss_coeff
+        if target >= equilibrium:
+            return None
+        return float(np.log((equilibrium - water) / (equilibrium - target)) / self.loss_coeff)
+
+    def loss_rate(self, water: float, outside: float) -> float:
+        """F/hour lost with the heater off."""
+        return self.loss_coeff * (water - outside)
+
+
+def fit_windows(times, water, outside, duty, window: int = THERMAL_FIT_WINDOW,
+                max_gap: float = THERMAL_FIT_MAX_GAP_SEC) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Least-squares rows from full windows of consecutive log intervals.
+
+    Interval i spans samples i and i + 1, and `duty[i + 1]` covers it. Returns the design
+    rows (-(water - outside), heater duty), the observed rates in F/hour, and the index of
+    the last sample consumed (-1 if no window is complete).
+    """
+    times, water, outside, duty = (np.asarray(a, dtype=np.float64) for a in (times, water, outside, duty))
+    dt = np.diff(times)
+    if len(dt) == 0:
+        return np.empty((0, 2)), np.empty(0), -1
+    valid = (dt > 0) & (dt <= max_gap)
+    index = np.arange(len(dt))
+    # A gap starts a new run; windows never straddle one
+    run_start = np.maximum.accumulate(np.where(valid, 0, index + 1))
+    key = run_start * (len(dt) + 1) + (index - run_start) // window
+    keys, group, counts = np.unique(key[valid], return_inverse=True, return_counts=True)
+    full = counts == window
+    if not full.any():
+        return np.empty((0, 2)), np.empty(0), -1
+
+    hours = dt[valid] / 3600.0
+    rise = np.diff(water)[valid]
+    gap = ((water[:-1] + water[1:]) / 2 - (outside[:-1] + outside[1:]) / 2)[valid]
+    sum_hours = np.bincount(group, hours)
+    rate = np.bincount(group, rise) / sum_hours
+    loss = -np.bincount(group, gap * hours) / sum_hours
+    heat = np.bincount(group, duty[1:][valid] * hours) / sum_hours
+    last_interval = np.zeros(len(keys), dtype=np.intp)
+    np.maximum.at(last_interval, group, index[valid])
+    return np.column_stack([loss, heat])[full], rate[full], int(last_interval[full].max()) + 1
+
+
+def refit_thermal_model(db) -> ThermalModelFit:
+    """Fold TemperatureLog rows newer than the last refit into the cached fit."""
+    fit = db.query(ThermalModelFit).first()
+    if fit is None:
+        fit = ThermalModelFit(windows=0.0, last_log_id=0, xtx_00=0.0, xtx_01=0.0, xtx_11=0.0,
+                              xty_0=0.0, xty_1=0.0, yty=0.0)
+        db.add(fit)
+    rows = db.execute(
+        select(TemperatureLog.id, TemperatureLog.timestamp, TemperatureLog.value,
+               TemperatureLog.outside_temp, TemperatureLog.heater_duty)
+        .where(TemperatureLog.id >= fit.last_log_id, TemperatureLog.value > 0,
+               TemperatureLog.outside_temp.isnot(None), TemperatureLog.heater_duty.isnot(None))
+        .order_by(TemperatureLog.id)
+    ).all()
+    if len(rows) < 2:
+        db.commit()
+        return fit
+    ids, timestamps, water, outside, duty = zip(*rows)
+    X, y, last = fit_windows(epoch_seconds(timestamps), water, outside, duty)
+    if last < 0:
+        db.commit()
+        return fit
+
+    # Forget old windows by how much new data arrived, then add the new normal equations
+    new_hours = len(y) * THERMAL_FIT_WINDOW / 60.0
+    decay = 0.5 ** (new_hours / (THERMAL_FIT_HALF_LIFE_DAYS * 24))
+    xtx = decay * np.array([[fit.xtx_00, fit.xtx_01], [fit.xtx_01, fit.xtx_11]]) + X.T @ X
+    xty = decay * np.array([fit.xty_0, fit.xty_1]) + X.T @ y
+    fit.yty = decay * fit.yty + float(y @ y)
+    fit.windows = decay * fit.windows + len(y)
+    fit.xtx_00, fit.xtx_01, fit.xtx_11 = float(xtx[0, 0]), float(xtx[0, 1]), float(xtx[1, 1])
+    fit.xty_0, fit.xty_1 = float(xty[0]), float(xty[1])
+    fit.last_log_id = int(ids[last])
+
+    # Needs enough windows, and heater-on as well as heater-off ones to separate the terms
+    if fit.windows >= THERMAL_FIT_MIN_WINDOWS and np.linalg.det(xtx) > 1e-9 * max(1.0, xtx[0, 0] * xtx[1, 1]):
+        loss_coeff, heat_rate = np.linalg.solve(xtx, xty)
+        if loss_coeff > 0 and heat_rate > 0:
+            fit.loss_coeff, fit.heat_rate = float(loss_coeff), float(heat_rate)
+            beta = np.array([loss_coeff, heat_rate])
+            residual = fit.yty - 2 * beta @ xty + beta @ xtx @ beta
+            fit.rms_error = float(np.sqrt(max(residual, 0.0) / fit.windows))
+    db.commit()
+    return fit
+
+
+def load_thermal_model(db) -> Tuple[Optional[ThermalModel], Optional[ThermalModelFit]]:
+    """Cached fitted model (no fitting happens here), or (None, row-or-None) before a fit exists."""
+    fit = db.query(ThermalModelFit).first()
+    if fit is None or fit.loss_coeff is None or fit.heat_rate is None:
+        return None, fit
+    return ThermalModel(loss_coeff=fit.loss_coeff, heat_rate=fit.heat_rate), fit
@@ -0,0 +1,148 @@
+import os
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+UPDATE_COMMAND = ["git", "pull", "origin", "main"]
+UPDATE_TIMEOUT_SEC = float(os.getenv("UPDATE_TIMEOUT_SEC", "300"))
+MAX_OUTPUT_LINES = 500
+MAX_FINISHED_JOBS = 10
+
+
+class JobAlreadyRunning(Exception):
+    pass
+
+
+class UpdateJob:
+    def __init__(self, command: List[str], timeout: float):
+        self.id = uuid.uuid4().hex
+        self.command = command
+        self.timeout = timeout
+        self.status = "pending"  # pending, running, succeeded, failed, cancelled, timed_out
+        self.returncode = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        # (line_number, text); old lines fall off but numbering keeps offsets stable
+        self.output = deque(maxlen=MAX_OUTPUT_LINES)
+        self.line_count = 0
+        self.process = None
+        self.lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ("pending", "running")
+
+    def to_dict(self, offset: int = 0) -> Dict:
+        with self.lock:
+            lines = [text for number, text in self.output if number >= offset]
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "returncode": self.returncode,
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "output": lines,
+                "next_offset": self.line_count,
+            }
+
+
+class UpdateJobManager:
+    """Runs system update commands off the request threadpool, one at a time."""
+
+    def __init__(self):
+        self.jobs: Dict[str, UpdateJob] = {}
+        self.lock = threading.Lock()
+
+    def start(self, command: List[str] = UPDATE_COMMAND, timeout: float = UPDATE_TIMEOUT_SEC) -> UpdateJob:
+        with self.lock:
+            if any(not job.done for job in self.jobs.values()):
+                raise JobAlreadyRunning()
+            self._prune()
+            job = UpdateJob(command, timeout)
+            self.jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[UpdateJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[UpdateJob]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        with job.lock:
+            if job.done:
+                return job
+            job.status = "cancelled"
+            process = job.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+        return job
+
+    def _prune(self):
+        finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.created_at)
+        for job in finished[:-MAX_FINISHED_JOBS or None]:
+            del self.jobs[job.id]
+
+    def _run(self, job: UpdateJob):
+        with job.lock:
+            if job.status == "cancelled":
+                job.finished_at = time.time()
+                return
+            job.status = "running"
+        try:
+            process = subprocess.Popen(
+                job.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace"
+            )
+        except Exception as e:
+            with job.lock:
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = time.time()
+            return
+        with job.lock:
+            job.process = process
+            cancelled = job.status == "cancelled"
+        if cancelled:
+            process.terminate()
+
+        def _expire():
+            with job.lock:
+                if job.done:
+                    return
+                job.status = "timed_out"
+            job.process.kill()
+
+        timer = threading.Timer(job.timeout, _expire)
+        timer.daemon = True
+        timer.start()
+        returncode, error = None, None
+        try:
+            for line in job.process.stdout:
+                with job.lock:
+                    job.output.append((job.line_count, line.rstrip("\n")))
+                    job.line_count += 1
+            returncode = job.process.wait()
+        except Exception as e:
+            error = str(e)
+            if process.poll() is None:
+                process.kill()
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+
+        with job.lock:
+            job.returncode = returncode
+            if job.status == "running":
+                job.status = "succeeded" if returncode == 0 and error is None else "failed"
+            if error is not None:
+                job.error = error
+            job.finished_at = time.time()
+
+
+update_jobs = UpdateJobManager()
@@ -0,0 +1,112 @@
+"""Watchdogs for the engine's safety and control threads.
+
+Each watched thread calls ``beat()`` after every pass of its fixed-rate loop, and a
+separate thread checks the heartbeat age. The safety thread does no database I/O, so
+its deadline is short: if a pass has not completed within it (a hung sensor read), the
+engine cuts every relay through the controller and locks the system, exactly like a
+hi-limit fault. The lock is cleared through the usual fault reset once someone has
+looked at why the loop stalled.
+
+The control tick reads and writes SQLite, so its deadline sits above the driver's 5 s
+busy timeout; ordinary write contention does not trip it. A tick stuck past it (a
+commit that never returns, a hung request) gets the heater cut, since no tick is left
+to switch it off; the tick's own logic takes over again once it recovers.
+"""
+import os
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+ENGINE_WATCHDOG_TIMEOUT_SEC = float(os.getenv("ENGINE_WATCHDOG_TIMEOUT_SEC", "3.0"))
+ENGINE_CONTROL_WATCHDOG_TIMEOUT_SEC = float(os.getenv("ENGINE_CONTROL_WATCHDOG_TIMEOUT_SEC", "10.0"))
+
+PROM_HEARTBEAT_INTERVAL = Histogram(
+    'hottub_engine_heartbeat_interval_seconds', 'Time between engine loop heartbeats', ['thread'],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0),
+)
+PROM_HEARTBEAT_AGE = Gauge('hottub_engine_heartbeat_age_seconds', 'Seconds since the engine loop last completed a pass', ['thread'])
+PROM_STALLS = Counter('hottub_engine_stalls_total', 'Engine loop stalls that tripped the watchdog', ['thread'])
+PROM_LAST_STALL = Gauge('hottub_engine_last_stall_seconds', 'Duration of the most recent engine loop stall', ['thread'])
+
+
+class EngineWatchdog:
+    def __init__(self, engine, timeout: float = ENGINE_WATCHDOG_TIMEOUT_SEC, clock=time.monotonic,
+                 name: str = "safety", on_trip=None):
+        self.engine = engine
+        self.timeout = timeout
+        self.clock = clock
+        self.name = name # thread label on the metrics
+        self.on_trip = on_trip if on_trip is not None else engine.watchdog_trip
+        self.last_beat = None
+        self.stalled_since = None
+        self.stalls = 0
+        self.last_stall_duration = 0.0
+        self.max_interval = 0.0
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def beat(self):
+        now = self.clock()
+        with self.lock:
+            if self.last_beat is not None:
+                interval = now - self.last_beat
+                self.max_interval = max(self.max_interval, interval)
+                PROM_HEARTBEAT_INTERVAL.labels(thread=self.name).observe(interval)
+            if self.stalled_since is not None:
+                self.last_stall_duration = now - self.stalled_since
+                PROM_LAST_STALL.labels(thread=self.name).set(self.last_stall_duration)
+                print(f"Engine {self.name} loop recovered after a {self.last_stall_duration:.1f}s stall")
+                self.stalled_since = None
+            self.last_beat = now
+
+    def reset(self):
+        """Forget the previous heartbeat, e.g. when leadership was just (re)acquired."""
+        with self.lock:
+            self.last_beat = self.clock()
+            self.stalled_since = None
+
+    def check(self) -> bool:
+        """Trip if the heartbeat is overdue; returns True when a new stall was detected."""
+        with self.lock:
+            if self.last_beat is None:
+                return False
+            age = self.clock() - self.last_beat
+            PROM_HEARTBEAT_AGE.labels(thread=self.name).set(age)
+            if age <= self.timeout or self.stalled_since is not None:
+                return False
+            self.stalled_since = self.last_beat
+            self.stalls += 1
+        PROM_STALLS.labels(thread=self.name).inc()
+        print(f"WATCHDOG: engine {self.name} loop stalled for {age:.1f}s, shutting down outputs")
+        self.on_trip()
+        return True
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.timeout / 4):
+            if self.engine.leading:
+                self.check()
+
+    def stats(self) -> dict:
+        with self.lock:
+            age = self.clock() - self.last_beat if self.last_beat is not None else None
+            return {
+                "timeout": self.timeout,
+                "heartbeat_age": age,
+                "stalled": self.stalled_since is not None,
+                "stalls": self.stalls,
+                "last_stall_duration": self.last_stall_duration,
+                "max_interval": self.max_interval,
+            }
@@ -0,0 +1,191 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ..db.session import AsyncSessionLocal, SessionLocal
+from ..db.models import GeocodeResult
+
+WEATHER_CACHE_TTL_SEC = int(os.getenv("WEATHER_CACHE_TTL_SEC", "60"))
+# The engine reuses the API's payload for its outside temperature while it is this fresh
+WEATHER_CURRENT_MAX_AGE_SEC = int(os.getenv("WEATHER_CURRENT_MAX_AGE_SEC", "900"))
+GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+FORECAST_PARAMS = {
+    "current": "temperature_2m,is_day,weather_code",
+    "hourly": "temperature_2m,weather_code,precipitation_probability,wind_speed_10m,wind_direction_10m",
+    "daily": "weather_code,temperature_2m_max,temperature_2m_min",
+    "temperature_unit": "fahrenheit",
+    "wind_speed_unit": "mph",
+    "timezone": "auto",
+    "forecast_days": 7,
+}
+
+_http_client: Optional[httpx.AsyncClient] = None
+_sync_http_client: Optional[httpx.Client] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """App-lifetime pooled client for all outbound HTTP (weather, GitHub)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=8.0,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=120),
+        )
+    return _http_client
+
+
+def get_sync_http_client() -> httpx.Client:
+    """Pooled blocking client for the engine's housekeeping thread (no event loop there)."""
+    global _sync_http_client
+    if _sync_http_client is None or _sync_http_client.is_closed:
+        _sync_http_client = httpx.Client(
+            timeout=5.0,
+            limits=httpx.Limits(max_connections=2, max_keepalive_connections=1, keepalive_expiry=120),
+        )
+    return _sync_http_client
+
+
+async def close_http_client():
+    global _http_client, _sync_http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _sync_http_client is not None:
+        _sync_http_client.close()
+        _sync_http_client = None
+
+
+class LocationNotFound(Exception):
+    pass
+
+
+def _geocode_params(location: str) -> dict:
+    return {"name": location, "count": 1, "language": "en", "format": "json"}
+
+
+def _geocode_row(location: str, geo_data: dict) -> GeocodeResult:
+    if not geo_data.get("results"):
+        raise LocationNotFound(location)
+    result = geo_data["results"][0]
+    return GeocodeResult(location=location, latitude=result["latitude"], longitude=result["longitude"], city=result["name"])
+
+
+class WeatherService:
+    """Weather payload cache with single-flight refresh and stale-while-revalidate.
+
+    Only the very first fetch for a location blocks the caller. After that an expired
+    payload is returned immediately while one background refresh replaces it.
+    """
+
+    def __init__(self, ttl: int = WEATHER_CACHE_TTL_SEC):
+        self.ttl = ttl
+        self.location = None
+        self.payload = None
+        self.fetched_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_location = None
+
+    async def get(self, location: str):
+        if self.payload is not None and self.location == location:
+            if time.time() - self.fetched_at >= self.ttl:
+                self._start_refresh(location)
+            return self.payload
+        return await asyncio.shield(self._start_refresh(location))
+
+    def _start_refresh(self, location: str) -> asyncio.Task:
+        task = self._refresh_task
+        if task is None or task.done() or self._refresh_location != location:
+            task = asyncio.get_running_loop().create_task(self._refresh(location))
+            task.add_done_callback(self._on_refresh_done)
+            self._refresh_task = task
+            self._refresh_location = location
+        return task
+
+    def _on_refresh_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None and self.payload is not None:
+            print(f"Weather refresh failed, serving stale data: {task.exception()}")
+
+    async def _refresh(self, location: str):
+        latitude, longitude, city = await self._geocode(location)
+        client = get_http_client()
+        res = await client.get(FORECAST_URL, params={"latitude": latitude, "longitude": longitude, **FORECAST_PARAMS})
+        weather_data = res.json()
+
+        payload = {
+            "city": city,
+            "current": weather_data["current"],
+            "hourly": weather_data["hourly"],
+            "daily": weather_data["daily"]
+        }
+        # A refresh for a previous location must not overwrite the current one
+        if self._refresh_location == location:
+            self.location = location
+            self.payload = payload
+            self.fetched_at = time.time()
+        return payload
+
+    async def _geocode(self, location: str):
+        async with AsyncSessionLocal() as db:
+            cached = (await db.execute(select(GeocodeResult).where(GeocodeResult.location == location))).scalars().first()
+            if cached:
+                return cached.latitude, cached.longitude, cached.city
+
+            client = get_http_client()
+            geo_res = await client.get(GEOCODE_URL, params=_geocode_params(location))
+            row = _geocode_row(location, geo_res.json())
+            coordinates = row.latitude, row.longitude, row.city
+            db.add(row)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another worker stored the same location first; its coordinates are the same
+                await db.rollback()
+            return coordinates
+
+    def current_temperature(self, location: str) -> Optional[float]:
+        """Outside temperature for the engine's housekeeping thread (blocking).
+
+        Reuses the API's cached payload while it is recent enough. Otherwise it makes one
+        small forecast request, with coordinates from the persisted geocode lookup.
+        """
+        payload, fetched_at = self.payload, self.fetched_at
+        if payload is not None and self.location == location and time.time() - fetched_at < WEATHER_CURRENT_MAX_AGE_SEC:
+            return payload["current"]["temperature_2m"]
+
+        latitude, longitude, _ = self._geocode_sync(location)
+        res = get_sync_http_client().get(FORECAST_URL, params={
+            "latitude": latitude,
+            "longitude": longitude,
+            "current": "temperature_2m",
+            "temperature_unit": "fahrenheit",
+            "timezone": "auto",
+        })
+        return res.json().get("current", {}).get("temperature_2m")
+
+    def _geocode_sync(self, location: str):
+        db = SessionLocal()
+        try:
+            cached = db.query(GeocodeResult).filter(GeocodeResult.location == location).first()
+            if cached:
+                return cached.latitude, cached.longitude, cached.city
+
+            geo_res = get_sync_http_client().get(GEOCODE_URL, params=_geocode_params(location))
+            row = _geocode_row(location, geo_res.json())
+            coordinates = row.latitude, row.longitude, row.city
+            db.add(row)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+            return coordinates
+        finally:
+            db.close()
+
+
+weather_service = WeatherService()
@@ -0,0 +1,74 @@
+"""Compare the stdlib/jsonable_encoder response path against FastJSONResponse.
+
+Payloads mirror what the dashboard polls: the status document (ORM desired state plus
+NumPy temperatures from the controller), a full 1440-point history, and heating stats.
+
+Run from backend/:  python -m benchmarks.bench_json [--rounds N]
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from app.core.json_response import HAS_ORJSON, render_json
+from app.db.models import SystemState, TemperatureLog
+
+
+def build_payloads():
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    state = SystemState(
+        id=1, circ_pump=True, heater=True, jet_pump=False, light=True, ozone=False,
+        manual_soak_active=True, manual_soak_expires=now + timedelta(minutes=45),
+        scheduled_session_active=False, scheduled_session_expires=None,
+    )
+    status = {
+        "current_temp": np.float64(101.2345),
+        "desired_state": state,
+        "actual_relay_state": {"circ_pump": True, "heater": True, "jet_pump": False, "light": True, "ozone": False},
+        "safety_status": "OK",
+        "system_locked": False,
+    }
+    history = [
+        TemperatureLog(id=i, timestamp=now - timedelta(minutes=i), value=float(np.float64(100.0 + (i % 40) * 0.1)))
+        for i in range(1440)
+    ]
+    heating_stats = {
+        "avg_heat_rate": 4.12,
+        "avg_cool_rate": -1.37,
+        "estimated_time_to_104": 0.7,
+        "hourly_loss_at_rest": 1.37,
+        "histogram": [
+            {"time": (now - timedelta(hours=i)).strftime("%m/%d %H:%M"), "rate": 3.9, "type": "heat", "outside": 31.4}
+            for i in range(15)
+        ],
+        "projected_monthly_cost": 58.21,
+    }
+    return {"status": status, "history": history, "heating-stats": heating_stats}
+
+
+def current_path(payload):
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    if not HAS_ORJSON:
+        print("orjson is not installed; FastJSONResponse falls back to the current path.")
+
+    print(f"{'payload':<14}{'bytes':>8}{'current ms':>13}{'fast ms':>10}{'speedup':>10}")
+    for name, payload in build_payloads().items():
+        assert json.loads(current_path(payload)) == json.loads(render_json(payload))
+        current = timeit.timeit(lambda: current_path(payload), number=args.rounds) / args.rounds * 1000
+        fast = timeit.timeit(lambda: render_json(payload), number=args.rounds) / args.rounds * 1000
+        size = len(render_json(payload))
+        print(f"{name:<14}{size:>8}{current:>13.3f}{fast:>10.3f}{current / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Control-loop throughput: replay a controller trace through HotTubEngine._tick.
+
+Without a trace file a synthetic day is generated: water cycling through the hysteresis
+band at the 1 s control period with a few short flow dropouts. Replay runs against its
+own in-memory database, so the real one is never touched.
+
+Run from backend/:  python -m benchmarks.bench_replay [--trace FILE] [--hours N]
+"""
+import argparse
+
+import numpy as np
+
+from app.hardware.trace import Trace, record_dtype, relay_mask
+from app.services.replay import replay_trace
+
+FIXTURE = {"settings": {"set_point": 102.0}, "state": {"heater": True}}
+
+
+def synthetic_trace(hours: float) -> Trace:
+    count = int(hours * 3600)
+    t = np.arange(count, dtype=np.float64)
+    records = np.zeros(count, dtype=record_dtype(2))
+    records["wall"] = 1_760_000_000.0 + t
+    records["monotonic"] = t
+    # 20-minute sawtooth between 100.5F and 102.8F, well under any rate-of-rise limit
+    water = 100.5 + 2.3 * np.abs(((t / 1200.0) % 2.0) - 1.0)
+    records["temps"][:, 0] = water
+    records["temps"][:, 1] = water + 0.5
+    records["flowing"] = 1
+    records["flowing"][(t % 7200) < 2] = 0 # 2 s blips, shorter than the lockout
+    records["relays"] = relay_mask({"circ_pump": True})
+    return Trace(("water", "hi_limit"), (0, 1), records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="trace recorded with ENGINE_TRACE_FILE")
+    parser.add_argument("--hours", type=float, default=1.0, help="length of the synthetic trace")
+    args = parser.parse_args()
+
+    trace = Trace.load(args.trace) if args.trace else synthetic_trace(args.hours)
+    report = replay_trace(trace, fixture=FIXTURE)
+    stats = report.stats()
+    print(f"{stats['ticks']} ticks at {stats['ticks_per_sec']:.0f} ticks/s "
+          f"(mean {stats['mean_tick'] * 1e3:.3f} ms, p99 {stats['p99_tick'] * 1e3:.3f} ms, max {stats['max_tick'] * 1e3:.3f} ms)")
+    print(f"safety: {stats['safety_status']}")
+    if args.trace:
+        print(f"relay mismatches vs recording: {stats['mismatches']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import pytest
+
+
+class FakeClock:
+    """Monotonic clock stand-in; tests advance it by assigning to ``now``."""
+
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
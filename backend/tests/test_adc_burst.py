@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.hardware import controller as controller_module
+from app.hardware.controller import HotTubController
+from app.hardware.sensor_quality import SensorQuality
+from app.hardware.sensors import DEFAULT_SENSORS, SensorTable, TemperatureFilter
+
+
+class FakeMCP3008:
+    """Answers MCP3008 single-ended conversions from a per-channel list of codes."""
+
+    def __init__(self, codes):
+        self.codes = {channel: list(values) for channel, values in codes.items()}
+        self.locks = 0
+        self.conversions = 0
+
+    def try_lock(self):
+        self.locks += 1
+        return True
+
+    def unlock(self):
+        pass
+
+    def configure(self, baudrate):
+        self.baudrate = baudrate
+
+    def write_readinto(self, out, reply):
+        assert out[0] == 0x01 and out[1] & 0x80  # start bit, single-ended
+        code = self.codes[(out[1] >> 4) & 0x07].pop(0)
+        reply[0], reply[1], reply[2] = 0, (code >> 8) & 0x03, code & 0xFF
+        self.conversions += 1
+
+
+class FakeCS:
+    def __init__(self):
+        self.pulses = 0
+        self._value = True
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, level):
+        if not level:
+            self.pulses += 1
+        self._value = level
+
+
+def _controller(monkeypatch, codes):
+    monkeypatch.setattr(controller_module, "HAS_HARDWARE", True)
+    controller = HotTubController.__new__(HotTubController)
+    controller._init_adc_stats()
+    controller.spi, controller.cs = FakeMCP3008(codes), FakeCS()
+    controller.sensors = SensorTable(DEFAULT_SENSORS)
+    controller.temp_filter = TemperatureFilter(len(controller.sensors))
+    controller.quality = SensorQuality(controller.sensors, stuck_scans=2)
+    return controller
+
+
+def _single_read_fahrenheit(code, sensor=DEFAULT_SENSORS[0]):
+    # The previous per-read AnalogIn path, for comparison
+    voltage = (code << 6) * 3.3 / 65535
+    ln_r = math.log(sensor.series_resistor * (3.3 - voltage) / voltage)
+    c = sensor.steinhart_coefficients()
+    kelvin = 1 / (c[0] + c[1] * ln_r + c[2] * ln_r ** 3)
+    return (kelvin - 273.15 + sensor.offset) * 9 / 5 + 32
+
+
+def test_burst_reads_all_channels_under_one_bus_lock(monkeypatch):
+    controller = _controller(monkeypatch, {0: [600, 601, 599, 900, 600], 1: [610] * 5})
+    codes = controller.read_adc_burst((0, 1), samples=5)
+
+    assert codes.shape == (5, 2)
+    assert codes[:, 0].tolist() == [600, 601, 599, 900, 600]
+    assert controller.spi.locks == 1
+    assert controller.cs.pulses == controller.spi.conversions == 10
+    stats = controller.adc_stats()
+    assert stats["bursts"] == 1 and stats["samples"] == 10
+
+
+def test_median_of_burst_rejects_spikes_and_rail_codes(monkeypatch):
+    controller = _controller(monkeypatch, {0: [600, 601, 599, 900, 600], 1: [0, 1023, 610, 610, 0]})
+    water, hi_limit = controller.read_temperatures(samples=5)
+
+    assert water == pytest.approx(_single_read_fahrenheit(600))
+    assert hi_limit == pytest.approx(_single_read_fahrenheit(610))
+    assert controller.adc_stats()["invalid_samples"] == 3
+
+
+def test_quality_tracks_rail_samples_outliers_and_stuck_probes(monkeypatch):
+    controller = _controller(monkeypatch, {0: [600, 601] + [700] * 2 + [600] * 6, 1: [0, 0] + [610] * 8})
+    for _ in range(5):
+        controller.read_temperatures(samples=2)
+
+    summary = controller.quality.summary()
+    water, hi_limit = summary["sensors"]["water"], summary["sensors"]["hi_limit"]
+    assert summary["scans"] == 5
+    assert hi_limit["invalid_reads"] == 1 and hi_limit["invalid_samples"] == 2
+    assert water["rejected_outliers"] == 1  # the 700 burst is a ~20F jump
+    assert water["mean_filter_delta"] > 0
+    # hi_limit returned the exact same code with no jitter for 3 scans in a row
+    assert hi_limit["stuck"] is True and water["stuck"] is True
+    assert summary["status"] == "degraded"
+
+
+def test_sensor_table_converts_every_channel_at_once():
+    table = SensorTable(DEFAULT_SENSORS)
+    temps = table.convert(np.array([[0, 500], [600, 1023]]))
+    assert np.isnan(temps[0, 0]) and np.isnan(temps[1, 1])
+    assert temps[0, 1] == pytest.approx(_single_read_fahrenheit(500, DEFAULT_SENSORS[1]))
+    assert temps[1, 0] == pytest.approx(_single_read_fahrenheit(600))
+
+
+def test_status_recovers_once_invalid_reads_leave_the_window():
+    quality = SensorQuality(SensorTable(DEFAULT_SENSORS), window=3)
+    good = np.array([100.0, 101.0])
+    quality.record_error()
+    quality.record_scan(0.001, np.array([100.0, np.nan]), good, np.zeros(2, dtype=np.int64))
+    assert quality.summary()["status"] == "degraded"
+
+    quality.record_scan(0.001, good, good, np.zeros(2, dtype=np.int64))
+    quality.record_scan(0.001, good, good, np.zeros(2, dtype=np.int64))
+    summary = quality.summary()
+    assert summary["sensors"]["hi_limit"]["recent_invalid_reads"] == 1
+    assert summary["status"] == "degraded"
+
+    quality.record_scan(0.001, good, good, np.zeros(2, dtype=np.int64))
+    summary = quality.summary()
+    assert summary["status"] == "ok"
+    assert summary["errors"] == 1 and summary["sensors"]["hi_limit"]["invalid_reads"] == 2
@@ -30,4 +30,353 @@ async def test_get_status():
     assert response.status_code == 200
     data = response.json()
     assert "current_temp" in data
-    assert "safety_status" in data
\ No newline at end of file
+    assert "safety_status" in data
+
+@pytest.mark.anyio
+async def test_history_since_cursor_returns_only_new_rows():
+    from app.db.models import TemperatureLog
+    db = SessionLocal()
+    try:
+        db.add_all([TemperatureLog(value=100.0 + i) for i in range(3)])
+        db.commit()
+    finally:
+        db.close()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = (await ac.get("/api/status/history", params={"since": "0"})).json()
+        assert [row["value"] for row in first["items"]] == [100.0, 101.0, 102.0]
+
+        db = SessionLocal()
+        try:
+            db.add(TemperatureLog(value=103.0))
+            db.commit()
+        finally:
+            db.close()
+
+        second = (await ac.get("/api/status/history", params={"since": first["next_cursor"]})).json()
+        assert [row["value"] for row in second["items"]] == [103.0]
+
+        third = (await ac.get("/api/status/history", params={"since": second["next_cursor"]})).json()
+        assert third["items"] == []
+        assert third["next_cursor"] == second["next_cursor"]
+
+
+@pytest.mark.anyio
+async def test_history_columnar_format():
+    from app.db.models import TemperatureLog
+    db = SessionLocal()
+    try:
+        db.add_all([TemperatureLog(value=v) for v in (98.456, 99.0)])
+        db.commit()
+    finally:
+        db.close()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/api/status/history", params={"format": "columnar"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["v"] == [98.46, 99.0]
+    assert len(data["t"]) == 2
+    assert all(isinstance(t, int) for t in data["t"])
+
+
+@pytest.mark.anyio
+async def test_history_served_from_response_cache_until_data_changes():
+    from app.core.response_cache import response_cache
+    from app.db.models import TemperatureLog
+    db = SessionLocal()
+    try:
+        db.add_all([TemperatureLog(value=90.0 + i) for i in range(50)])
+        db.commit()
+    finally:
+        db.close()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get("/api/status/history", headers={"Accept-Encoding": "gzip"})
+        hits = response_cache.stats()["hits"]
+        second = await ac.get("/api/status/history", headers={"Accept-Encoding": "gzip"})
+        assert second.headers["content-encoding"] == "gzip"
+        assert second.json() == first.json()
+        assert response_cache.stats()["hits"] == hits + 1
+
+        db = SessionLocal()
+        try:
+            db.add(TemperatureLog(value=150.0))
+            db.commit()
+        finally:
+            db.close()
+
+        third = await ac.get("/api/status/history", headers={"Accept-Encoding": "gzip"})
+        assert len(third.json()) == 51
+
+
+@pytest.mark.anyio
+async def test_bulk_core_and_async_writes_invalidate_cached_routes():
+    from sqlalchemy import insert
+    from app.core.response_cache import data_version
+    from app.db.models import TemperatureLog
+    from app.db.session import AsyncSessionLocal
+
+    def version():
+        return data_version(("temperature_logs",))
+
+    db = SessionLocal()
+    try:
+        before = version()
+        db.execute(insert(TemperatureLog), [{"value": 100.0}, {"value": 101.0}])
+        db.rollback()
+        assert version() == before
+
+        db.execute(insert(TemperatureLog), [{"value": 100.0}, {"value": 101.0}])
+        db.commit()
+        after_insert = version()
+        assert after_insert != before
+
+        db.query(TemperatureLog).filter(TemperatureLog.value > 100.5).delete(synchronize_session=False)
+        db.commit()
+        after_delete = version()
+        assert after_delete != after_insert
+    finally:
+        db.close()
+
+    async with AsyncSessionLocal() as adb:
+        adb.add(TemperatureLog(value=102.0))
+        await adb.commit()
+    assert version() != after_delete
+
+
+def test_fast_json_response_serializes_numpy_and_orm_rows():
+    import json
+    import numpy as np
+    from app.core.json_response import render_json
+    from app.db.models import TemperatureLog
+
+    body = render_json({"temp": np.float64(101.5), "rows": [TemperatureLog(id=1, value=np.float32(99.5))]})
+    assert json.loads(body) == {"temp": 101.5, "rows": [{"id": 1, "timestamp": None, "value": 99.5, "outside_temp": None, "heater_duty": None}]}
+
+
+@pytest.mark.anyio
+async def test_system_logs_are_filtered_from_buffer(monkeypatch):
+    import time
+    from app.api import support
+    from app.services.system_logs import LEVELS, SystemLogService
+    logs = SystemLogService()
+    logs.source = "test"
+    monkeypatch.setattr(support, "system_log_service", logs)
+    now = time.time()
+    logs.append(now, "opensoak.service", LEVELS["info"], 'INFO: "GET /api/status/ HTTP/1.1" 200 OK')
+    logs.append(now, "opensoak.service", LEVELS["info"], "Activating schedule: Evening")
+    logs.append(now, "opensoak.service", LEVELS["err"], "Engine Error: SPI timeout")
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        everything = (await ac.get("/api/support/logs")).json()
+        errors = (await ac.get("/api/support/logs", params={"level": "err"})).json()
+        matched = (await ac.get("/api/support/logs", params={"pattern": "sched"})).json()
+        bad = await ac.get("/api/support/logs", params={"pattern": "("})
+
+    assert "200 OK" not in everything["logs"]
+    assert errors["logs"].endswith("Engine Error: SPI timeout")
+    assert "Activating schedule" not in errors["logs"]
+    assert matched["logs"].endswith("Activating schedule: Evening")
+    assert bad.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_log_follow_stream_ends_when_the_client_disconnects(monkeypatch):
+    import asyncio
+    import time
+    from app.api import support
+    from app.services.system_logs import LEVELS, SystemLogService
+    logs = SystemLogService()
+    logs.source = "test"
+    monkeypatch.setattr(support, "system_log_service", logs)
+    monkeypatch.setattr(support, "LOG_FOLLOW_POLL_SEC", 0.01)
+    logs.append(time.time(), "opensoak.service", LEVELS["info"], "Activating schedule: Evening")
+
+    sent = []
+    requested = []
+    disconnected = asyncio.Event()
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message.get("body"):
+            disconnected.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/support/logs/follow", "raw_path": b"/api/support/logs/follow",
+        "query_string": b"", "headers": [(b"host", b"test")], "client": ("test", 1), "server": ("test", 80),
+        "root_path": "",
+    }
+    # Spec 2.4 servers leave disconnect detection to the app; without the check this never returns
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    assert sent[0]["status"] == 200
+    assert b"Activating schedule: Evening" in b"".join(m.get("body", b"") for m in sent)
+
+
+@pytest.mark.anyio
+async def test_control_batch_applies_all_or_nothing():
+    from app.db.models import Settings, SystemState
+    db = SessionLocal()
+    try:
+        db.add_all([Settings(set_point=80.0, default_rest_temp=80.0), SystemState()])
+        db.commit()
+    finally:
+        db.close()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        ok = await ac.post("/api/control/batch", json={"operations": [
+            {"op": "set_relays", "relays": {"light": True, "jet_pump": True}},
+            {"op": "start_soak", "soak": {"target_temp": 102.0, "duration_minutes": 30}},
+            {"op": "extend_soak", "minutes": 15},
+        ]})
+        assert ok.status_code == 200
+        data = ok.json()
+        assert [r["status"] for r in data["results"]] == ["relays updated", "soak started", "timer adjusted"]
+        assert data["set_point"] == 102.0
+        assert data["desired_state"]["light"] is True
+        assert data["desired_state"]["manual_soak_active"] is True
+
+        # The second step fails, so the first must not be applied either
+        failed = await ac.post("/api/control/batch", json={"operations": [
+            {"op": "set_relays", "relays": {"light": False}},
+            {"op": "trigger_schedule", "schedule_id": 999},
+        ]})
+        assert failed.status_code == 404
+        invalid = await ac.post("/api/control/batch", json={"operations": [{"op": "set_point", "set_point": 120}]})
+        assert invalid.status_code == 422
+
+        # Passes validation but the last step is rejected while applying: the engine
+        # rolls back the relay change and the cancelled soak with it
+        rejected = await ac.post("/api/control/batch", json={"operations": [
+            {"op": "set_relays", "relays": {"light": False}},
+            {"op": "cancel_soak"},
+            {"op": "extend_soak", "minutes": 15},
+        ]})
+        assert rejected.status_code == 400
+        assert rejected.json()["detail"] == "No active soak session to adjust"
+
+    db = SessionLocal()
+    try:
+        state = db.query(SystemState).first()
+        assert state.light is True
+        assert state.manual_soak_active is True
+        assert db.query(Settings).first().set_point == 102.0
+    finally:
+        db.close()
+
+
+@pytest.mark.anyio
+async def test_trigger_schedule_reports_vacation_skip():
+    from datetime import datetime, timedelta
+    from app.db.models import Schedule, Settings, SystemState, VacationEvent
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        db.add_all([
+            Settings(set_point=80.0, default_rest_temp=80.0), SystemState(),
+            Schedule(id=1, name="Evening", type="soak", start_time="19:00", end_time="20:00", days_of_week="0,1,2,3,4,5,6",
+                     target_temp=104.0, disable_during_vacations=True),
+            VacationEvent(name="Away", start_at=now - timedelta(days=1), end_at=now + timedelta(days=1)),
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/control/trigger-schedule/1")
+    assert response.status_code == 200
+    assert response.json()["status"] == "schedule skipped"
+
+    db = SessionLocal()
+    try:
+        assert db.query(Settings).first().set_point == 80.0
+    finally:
+        db.close()
+
+
+@pytest.mark.anyio
+async def test_month_to_date_cost_starts_at_local_midnight(monkeypatch):
+    import time
+    from datetime import datetime, timedelta, timezone
+    from app.db.models import EnergyLog, Settings, SystemState
+    monkeypatch.setenv("TZ", "Etc/GMT+10")  # UTC-10: the local month starts at 10:00 UTC
+    time.tzset()
+    try:
+        now = datetime.now()
+        month_start = datetime(now.year, now.month, 1).astimezone(timezone.utc).replace(tzinfo=None)
+        db = SessionLocal()
+        try:
+            db.add_all([
+                Settings(), SystemState(),
+                # Last local evening of the previous month, already "this month" in UTC
+                EnergyLog(component="heater", runtime_seconds=60, kwh_used=1.0, estimated_cost=5.0,
+                          timestamp=month_start - timedelta(minutes=1)),
+                EnergyLog(component="heater", runtime_seconds=60, kwh_used=1.0, estimated_cost=1.25,
+                          timestamp=month_start + timedelta(minutes=1)),
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get("/api/status/heating-stats")
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert response.status_code == 200
+    assert response.json()["cost_projection"]["month_to_date_cost"] == 1.25
+
+
+@pytest.mark.anyio
+async def test_settings_update_is_all_or_nothing_when_the_engine_is_unavailable(monkeypatch):
+    from app.api import settings as settings_api
+    from app.db.models import Settings
+    from app.services.engine_ipc import EngineUnavailable
+    db = SessionLocal()
+    try:
+        db.add(Settings(set_point=80.0, location="Denver"))
+        db.commit()
+    finally:
+        db.close()
+
+    class DownEngine:
+        def submit(self, command):
+            raise EngineUnavailable("Engine did not apply SetPoint within 5.0s")
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        monkeypatch.setattr(settings_api, "hottub_engine", DownEngine())
+        failed = await ac.post("/api/settings/", json={"set_point": 101.0, "location": "Boulder"})
+        assert failed.status_code == 503
+        monkeypatch.undo()
+        db = SessionLocal()
+        try:
+            assert db.query(Settings).first().location == "Denver"
+        finally:
+            db.close()
+
+        ok = await ac.post("/api/settings/", json={"set_point": 101.0, "location": "Boulder"})
+    assert ok.status_code == 200
+    assert ok.json()["set_point"] == 101.0 and ok.json()["location"] == "Boulder"
+
+    db = SessionLocal()
+    try:
+        assert db.query(Settings).count() == 1
+    finally:
+        db.close()
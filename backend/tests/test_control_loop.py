@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.control_loop import FixedRateLoop, Phase
+
+
+def test_phases_run_at_their_own_fixed_rates(fake_clock):
+    runs = []
+    loop = FixedRateLoop([
+        Phase("safety", 0.5, lambda: runs.append("safety")),
+        Phase("energy", 2.0, lambda: runs.append("energy")),
+    ], clock=fake_clock)
+    loop.reset()
+
+    for _ in range(8):
+        loop.run_due()
+        fake_clock.now += loop.time_until_next()
+
+    assert runs.count("safety") == 8
+    assert runs.count("energy") == 2
+    # Deadlines stay on the grid rather than drifting by each run's duration
+    assert loop.phase("safety").next_due == 104.0
+
+
+def test_overrun_skips_missed_deadlines_and_counts_budget(fake_clock):
+    def slow():
+        fake_clock.now += 1.3
+
+    loop = FixedRateLoop([Phase("control", 0.5, slow, budget=0.2)], clock=fake_clock)
+    loop.reset()
+    loop.run_due()
+
+    phase = loop.phase("control")
+    assert phase.overruns == 1
+    assert phase.skipped == 2
+    assert phase.next_due == 101.5
+    assert loop.time_until_next() == pytest.approx(0.2)
+
+
+def test_failing_phase_does_not_starve_later_phases(fake_clock):
+    errors, runs = [], []
+
+    def broken():
+        raise RuntimeError("SPI timeout")
+
+    loop = FixedRateLoop([
+        Phase("safety", 0.5, broken),
+        Phase("control", 1.0, lambda: runs.append("control")),
+    ], clock=fake_clock, on_error=lambda phase, e: errors.append((phase.name, str(e))))
+    loop.reset()
+
+    assert loop.run_due() == ["safety", "control"]
+    assert errors == [("safety", "SPI timeout")]
+    assert runs == ["control"]
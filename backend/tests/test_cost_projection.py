@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.cost_projection import (
+    CostProjector, compile_calendar, month_slots, outside_series, project_month,
+)
+from app.services.thermal_model import ThermalModel
+
+SETTINGS = SimpleNamespace(default_rest_temp=100.0, default_soak_temp=104.0, kwh_cost=0.15, heater_watts=5500.0,
+                           circ_pump_watts=250.0, jet_pump_watts=1500.0, light_watts=20.0, ozone_watts=50.0)
+MODEL = ThermalModel(loss_coeff=0.025, heat_rate=5.7)
+
+
+def _schedule(id, type="soak", start="19:30", end="21:15", days="0,1,2,3,4,5,6", target=104.0, vacations=False):
+    return SimpleNamespace(id=id, type=type, start_time=start, end_time=end, days_of_week=days, target_temp=target,
+                           light_on=True, jet_on=True, ozone_on=False, disable_during_vacations=vacations)
+
+
+def test_month_slots_use_the_real_month_length():
+    start, end = month_slots(datetime(2026, 10, 19, 10, 20))
+    assert len(start) == 12 * 24 + 14  # rest of the 19th, then Oct 20-31
+    assert end[0] - start[0] == 40
+    assert np.all(end[1:] - start[1:] == 60)
+    assert len(month_slots(datetime(2028, 2, 28, 23, 0))[0]) == 24 + 1  # leap year
+
+
+def test_calendar_uses_minutes_overnight_windows_and_vacations():
+    now = datetime(2026, 10, 19, 0, 0)  # a Monday
+    start, end = month_slots(now)
+    soak = _schedule(1)
+    clean = _schedule(2, type="clean", start="23:30", end="00:30", days="0")
+    plan = compile_calendar([soak, clean], [], start, end, 104.0)
+    assert plan["soak"][19:22].tolist() == [0.5, 1.0, 0.25]
+    assert plan["soak_target"][20] == 104.0 and np.isnan(plan["soak_target"][18])
+    # Monday's overnight clean spills into Tuesday 00:00-00:30
+    assert plan["jets"][23] == 0.5 and plan["jets"][24] == 0.5
+
+    paused = _schedule(3, vacations=True)
+    away = [(datetime(2026, 10, 20), datetime(2026, 10, 22))]
+    plan = compile_calendar([paused], away, start, end, 104.0)
+    assert plan["soak"][24 + 20] == 0.0 and plan["soak"][20] == 1.0 and plan["soak"][3 * 24 + 20] == 1.0
+
+
+def test_forecast_then_hour_of_day_profile():
+    now = datetime(2026, 10, 19, 0, 0)
+    start, _ = month_slots(now)
+    times = [(now + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(48)]
+    temps = [30.0 + (h % 24) for h in range(48)]
+    outside, covered = outside_series(start, {"time": times, "temperature_2m": temps}, 50.0)
+    assert covered == 48
+    assert outside[5] == 35.0 and outside[72 + 5] == 35.0  # day 4 repeats the profile
+    assert outside_series(start, None, 42.0)[0][100] == 42.0
+
+
+def test_projection_matches_steady_state_and_grows_with_soaks():
+    now = datetime(2026, 10, 1, 0, 0)
+    base = project_month(now, SETTINGS, [], (), MODEL, 100.0, None, 40.0)
+    hours = 31 * 24
+    assert base["hours"] == hours
+    # Holding 100F against 40F air: duty = k * 60 / r
+    assert base["heater_hours"] == pytest.approx(hours * 0.025 * 60 / 5.7, rel=0.01)
+    assert base["kwh"]["circ_pump"] == pytest.approx(hours * 0.25)
+    assert base["remaining_cost"] == pytest.approx(base["remaining_kwh"] * 0.15)
+
+    soaking = project_month(now, SETTINGS, [_schedule(1, start="19:00", end="21:00")], (), MODEL, 100.0, None, 40.0)
+    assert soaking["soak_hours"] == pytest.approx(31 * 2)
+    assert soaking["kwh"]["jet_pump"] == pytest.approx(31 * 2 * 1.5)
+    # Extra heat-up and the higher loss while at 104F, partly won back while cooling
+    assert base["heater_hours"] < soaking["heater_hours"] < base["heater_hours"] + 31 * 2
+
+
+def test_projection_is_cached_until_an_input_changes():
+    projector = CostProjector()
+    now = datetime(2026, 10, 19, 10, 5)
+    args = (SETTINGS, [_schedule(1)], (), MODEL, 101.2, None, None, 45.0)
+    first = projector.project(now, *args)
+    assert projector.project(now + timedelta(minutes=30), *args) is first
+    assert projector.builds == 1
+
+    projector.project(now, SETTINGS, [_schedule(1, end="22:00")], (), MODEL, 101.2, None, None, 45.0)
+    projector.project(now + timedelta(hours=1), SETTINGS, [_schedule(1, end="22:00")], (), MODEL, 101.2, None, None, 45.0)
+    assert projector.builds == 3
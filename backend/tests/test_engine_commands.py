@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from app.db.models import Base, Settings, SystemState
+from app.db.session import SessionLocal, engine as db_engine
+from app.services.engine import HotTubEngine
+from app.services.engine_commands import (
+    AdjustTimer, Batch, CommandRejected, SetRelays, StartSoak, command_from_dict,
+)
+from app.services.engine_ipc import EngineUnavailable
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(bind=db_engine)
+    db = SessionLocal()
+    db.add_all([Settings(set_point=80.0, default_rest_temp=80.0), SystemState()])
+    db.commit()
+    db.close()
+    yield
+    Base.metadata.drop_all(bind=db_engine)
+
+
+def _running_engine():
+    # Looks like a leader with a live loop, so submit() queues instead of applying inline
+    engine = HotTubEngine()
+    engine.running = True
+    engine.leading = True
+    return engine
+
+
+def _submit_in_thread(engine, command):
+    outcome = {}
+    def run():
+        try:
+            outcome["result"] = engine.submit(command)
+        except Exception as e:
+            outcome["error"] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    while not len(engine.commands) and thread.is_alive():
+        time.sleep(0.001)
+    return thread, outcome
+
+
+def test_commands_round_trip_through_dicts():
+    batch = Batch([SetRelays(light=True), StartSoak(102.0, 30), AdjustTimer(-5)])
+    assert command_from_dict(batch.to_dict()) == batch
+
+
+def test_queued_command_is_applied_when_the_engine_drains():
+    engine = _running_engine()
+    thread, outcome = _submit_in_thread(engine, SetRelays(light=True, jet_pump=True))
+    assert "result" not in outcome
+
+    engine._drain_commands()
+    thread.join(1)
+    assert outcome["result"] == {"status": "relays updated"}
+    db = SessionLocal()
+    try:
+        state = db.query(SystemState).first()
+        assert state.light is True and state.jet_pump is True
+    finally:
+        db.close()
+
+
+def test_rejected_batch_leaves_state_untouched():
+    engine = HotTubEngine()
+    with pytest.raises(CommandRejected):
+        engine.submit(Batch([SetRelays(light=True), AdjustTimer(15)]))
+    db = SessionLocal()
+    try:
+        assert db.query(SystemState).first().light is not True
+    finally:
+        db.close()
+
+
+def test_timed_out_command_is_not_applied_late():
+    engine = _running_engine()
+    engine.command_timeout = 0.05
+    with pytest.raises(EngineUnavailable):
+        engine.submit(SetRelays(light=True))
+
+    engine._drain_commands()
+    db = SessionLocal()
+    try:
+        assert db.query(SystemState).first().light is not True
+    finally:
+        db.close()
+
+
+def test_scheduler_queues_schedule_changes_for_the_engine(tmp_path, monkeypatch):
+    from datetime import datetime, timedelta
+    from app.db.models import Schedule
+    from app.services import engine as engine_module
+    from app.services.engine_commands import EndSchedule
+    from app.services.leader import LeaderLease
+    from app.services.scheduler import HotTubScheduler
+
+    now = datetime.now()
+    db = SessionLocal()
+    db.add(Schedule(id=1, name="Evening", type="soak", days_of_week="0,1,2,3,4,5,6", target_temp=104.0,
+                    start_time=(now - timedelta(hours=1)).strftime("%H:%M"),
+                    end_time=(now + timedelta(hours=1)).strftime("%H:%M")))
+    db.commit()
+    db.close()
+
+    engine = _running_engine()
+    monkeypatch.setattr(engine_module, "engine", engine)
+    scheduler = HotTubScheduler()
+    scheduler.lease = LeaderLease(str(tmp_path / "leader.lock"))
+    assert scheduler.lease.try_acquire()
+    try:
+        thread = threading.Thread(target=scheduler.check_schedules, kwargs={"is_startup": True})
+        thread.start()
+        while not len(engine.commands) and thread.is_alive():
+            time.sleep(0.001)
+
+        # Nothing is written until the engine drains its queue
+        db = SessionLocal()
+        assert db.query(SystemState).first().scheduled_session_active is False
+        db.close()
+        engine._drain_commands()
+        thread.join(1)
+    finally:
+        scheduler.lease.release()
+
+    db = SessionLocal()
+    try:
+        assert db.query(SystemState).first().scheduled_session_active is True
+        assert db.query(Settings).first().set_point == 104.0
+    finally:
+        db.close()
+
+    engine.running = False
+    assert engine.submit(EndSchedule(1)) == {"status": "schedule ended", "name": "Evening"}
+    db = SessionLocal()
+    try:
+        assert db.query(SystemState).first().scheduled_session_active is False
+        assert db.query(Settings).first().set_point == 80.0
+    finally:
+        db.close()
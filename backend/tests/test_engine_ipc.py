@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.engine_ipc import EngineServer, EngineUnavailable, RemoteEngine
+
+
+class FakeEngine:
+    def __init__(self):
+        self.system_locked = False
+        self.woken = 0
+
+    def snapshot(self):
+        return {"current_temp": 101.5, "system_locked": self.system_locked}
+
+    def wake(self):
+        self.woken += 1
+
+    def reset_faults(self):
+        self.system_locked = False
+
+    def master_shutdown(self):
+        self.system_locked = True
+
+
+@pytest.fixture
+def server(tmp_path):
+    engine = FakeEngine()
+    srv = EngineServer(engine, str(tmp_path / "engine.sock"))
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def test_remote_engine_round_trips_commands(server):
+    remote = RemoteEngine(server.path)
+    assert remote.snapshot() == {"current_temp": 101.5, "system_locked": False}
+
+    remote.master_shutdown()
+    assert server.engine.system_locked is True
+    remote.reset_faults()
+    remote.wake()
+    assert server.engine.system_locked is False
+    assert server.engine.woken == 1
+
+
+def test_remote_engine_reports_unreachable_engine(tmp_path):
+    with pytest.raises(EngineUnavailable):
+        RemoteEngine(str(tmp_path / "missing.sock"), timeout=0.5).snapshot()
@@ -0,0 +1,51 @@
+import time
+
+from app.hardware.flow_switch import FlowMonitor
+from app.hardware.mock_controller import MockHotTubController
+from app.services.engine import HotTubEngine
+
+
+def test_bounces_are_ignored_and_poll_reconciles_the_final_level(fake_clock):
+    level = {"value": True}
+    monitor = FlowMonitor(lambda: level["value"], debounce_ms=50, clock=fake_clock)
+    losses = []
+    monitor.on_loss(lambda: losses.append(fake_clock()))
+
+    # Switch opens with chatter: the first edge wins immediately, the rest are bounce
+    level["value"] = False
+    monitor.on_edge(False)
+    for bounce in (True, False, True):
+        fake_clock.now += 0.005
+        monitor.on_edge(bounce)
+    assert monitor.flowing is False
+    assert losses == [100.0]
+    assert monitor.bounces == 3
+
+    # The last bounce left the switch closed again, but its edge was dropped
+    level["value"] = True
+    fake_clock.now += 0.01
+    monitor.poll()
+    assert monitor.flowing is False  # still inside the debounce window
+    fake_clock.now += 0.1
+    monitor.poll()
+    assert monitor.flowing is True
+    assert [flowing for _, flowing in monitor.history] == [True, False, True]
+
+
+def test_loss_edge_cuts_heater_without_waiting_for_a_tick():
+    engine = HotTubEngine()
+    controller = MockHotTubController()
+    controller.flow.on_loss(engine._on_flow_lost)
+    engine.controller = controller
+    engine.leading = True
+    controller.set_relay(controller.CIRC_PUMP, True)
+    assert controller.set_relay(controller.HEATER, True)
+
+    controller.script_flow([(0.1, True)], bounce=3).join(1)
+    assert controller.is_flow_detected() is False
+    assert controller.get_relay_state(controller.HEATER) is False
+    assert controller.flow.stats()["bounces"] == 3
+
+    # A tick that checked flow before the edge cannot switch the heater back on
+    assert controller.set_relay(controller.HEATER, True) is False
+    assert controller.get_relay_state(controller.HEATER) is False
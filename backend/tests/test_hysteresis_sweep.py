@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.services.hysteresis_sweep import parse_range, sweep, synthetic_outside
+from app.services.thermal_model import ThermalModel
+
+STEP = 60.0
+
+
+def _reference(outside, set_point, upper, lower, model):
+    """One setting, simulated with the engine's if/elif rule."""
+    water, heater, cycles, on_steps = set_point, False, 0, 0
+    for air in outside:
+        if water >= set_point + upper:
+            heater = False
+        elif water <= set_point - lower and not heater:
+            heater = True
+            cycles += 1
+        on_steps += heater
+        water = float(model.step(water, air, heater, STEP / 3600))
+    return on_steps * STEP / 3600 * 5.5, cycles, water
+
+
+def test_vectorized_sweep_matches_scalar_simulation():
+    outside = synthetic_outside(2, STEP)
+    model = ThermalModel()
+    result = sweep(outside, STEP, [101.0, 103.0], [0.2, 1.0], [0.5, 1.5], comfort=(101.0, 104.0), model=model)
+    assert len(result) == 8
+
+    for row in result.rows():
+        kwh, cycles, _ = _reference(outside, row["set_point"], row["hysteresis_upper"], row["hysteresis_lower"], model)
+        assert row["heater_kwh"] == pytest.approx(kwh)
+        assert row["cycles"] == cycles
+        assert row["cost"] == pytest.approx(kwh * 0.12)
+
+
+def test_trade_offs_between_band_width_cost_and_comfort():
+    result = sweep(synthetic_outside(3, STEP), STEP, parse_range("100:104:1"), parse_range("0.2:1.0:0.4"),
+                   parse_range("0.2:1.0:0.4"), comfort=(101.5, 104.0))
+    rows = {(r["set_point"], r["hysteresis_upper"], r["hysteresis_lower"]): r for r in result.rows()}
+    # Wider bands cycle the relay less; warmer water costs more
+    assert rows[(102.0, 1.0, 1.0)]["cycles"] < rows[(102.0, 0.2, 0.2)]["cycles"]
+    assert rows[(104.0, 0.6, 0.6)]["heater_kwh"] > rows[(100.0, 0.6, 0.6)]["heater_kwh"]
+    # 100F sits below the comfort band the whole time
+    assert rows[(100.0, 0.2, 0.2)]["hours_outside_comfort"] == pytest.approx(72.0, abs=0.1)
+
+    best = result.best(limit=3, max_outside_hours=1.0)
+    assert all(r["hours_outside_comfort"] <= 1.0 for r in best)
+    assert [r["cost"] for r in best] == sorted(r["cost"] for r in best)
+
+
+def test_parse_range_is_inclusive():
+    assert parse_range("0.1:0.5:0.1").tolist() == [0.1, 0.2, 0.3, 0.4, 0.5]
+    assert parse_range("102").tolist() == [102.0]
+    with pytest.raises(ValueError):
+        parse_range("1:2")
@@ -0,0 +1,51 @@
+import time
+
+from app.services.engine import HotTubEngine
+from app.services.leader import LeaderLease
+
+
+def test_only_one_lease_holder_until_release(tmp_path):
+    path = str(tmp_path / "leader.lock")
+    first, second = LeaderLease(path), LeaderLease(path)
+    assert first.try_acquire()
+    assert first.try_acquire()  # re-entrant for the holder
+    assert not second.try_acquire()
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+def test_passive_engine_never_ticks(tmp_path, monkeypatch):
+    path = str(tmp_path / "leader.lock")
+    holder = LeaderLease(path)
+    assert holder.try_acquire()
+
+    engine = HotTubEngine()
+    engine.lease = LeaderLease(path)
+    engine.poll_interval = 0.01
+    ticks = []
+    monkeypatch.setattr(engine, "_tick", lambda: ticks.append(1))
+
+    engine.start()
+    time.sleep(0.1)
+    assert engine.passive
+    engine.stop()
+    assert ticks == []
+    holder.release()
+
+
+def test_scheduler_jobs_never_take_the_lease(tmp_path, monkeypatch):
+    from app.services import scheduler as scheduler_module
+    path = str(tmp_path / "leader.lock")
+    scheduler = scheduler_module.HotTubScheduler()
+    scheduler.lease = LeaderLease(path)
+    checks = []
+    monkeypatch.setattr(scheduler_module, "SessionLocal", lambda: checks.append(1))
+
+    scheduler.check_schedules()
+    scheduler.refit_thermal_model()
+    assert not scheduler.lease.is_leader
+    assert checks == []
+    other = LeaderLease(path)
+    assert other.try_acquire()
+    other.release()
@@ -0,0 +1,63 @@
+import numpy as np
+
+from app.services.rate_of_rise import RateOfRiseDetector
+
+RATE_HZ = 2.0  # safety phase cadence
+
+
+def _feed(detector, water_fn, hi_offset_fn=lambda t: 0.5, heater_fn=lambda t: True, seconds=600.0, seed=0):
+    """Feed samples until a fault trips; returns (time, fault, water) or None."""
+    rng = np.random.default_rng(seed)
+    for t in np.arange(0.0, seconds, 1 / RATE_HZ):
+        water = water_fn(t) + rng.normal(0, 0.05)
+        fault = detector.add(t, water, water + hi_offset_fn(t), heater_fn(t))
+        if fault:
+            return t, fault, water
+    return None
+
+
+def test_runaway_heating_trips_well_before_hi_limit():
+    onset = 60.0
+    detector = RateOfRiseDetector()
+    # Flat at 104F, then a 2F/min runaway (e.g. welded heater contactor with low flow)
+    tripped = _feed(detector, lambda t: 104.0 + max(0.0, t - onset) * 2 / 60)
+
+    assert tripped is not None
+    t, fault, water = tripped
+    assert fault.startswith("RUNAWAY HEATING")
+    assert t - onset < 35  # detection latency
+    assert water < 106  # the 110F absolute limit is still minutes away
+
+
+def test_normal_heating_does_not_trip():
+    detector = RateOfRiseDetector()
+    # 4F/hr for 30 minutes is a healthy heater
+    assert _feed(detector, lambda t: 96.0 + t * 4 / 3600, seconds=1800) is None
+    assert abs(detector.stats()["water_rate_f_per_min"] - 4 / 60) < 0.05
+
+
+def test_rise_with_heater_off_is_a_stuck_heater():
+    detector = RateOfRiseDetector()
+    tripped = _feed(detector, lambda t: 100.0 + t * 0.5 / 60, heater_fn=lambda t: False)
+    assert tripped is not None and tripped[1].startswith("HEATER STUCK ON")
+
+    # The same rise with the heater commanded on is within a healthy range
+    detector = RateOfRiseDetector()
+    assert _feed(detector, lambda t: 100.0 + t * 0.5 / 60, seconds=120) is None
+
+
+def test_hi_limit_pulling_away_from_water_trips():
+    detector = RateOfRiseDetector()
+    tripped = _feed(detector, lambda t: 102.0, hi_offset_fn=lambda t: 0.5 + t * 2 / 60)
+    assert tripped is not None
+    t, fault, _ = tripped
+    assert fault.startswith("HI-LIMIT DIVERGING")
+    assert 0.5 + t * 2 / 60 >= 3.0  # not before the delta itself is significant
+
+
+def test_reset_clears_window():
+    detector = RateOfRiseDetector()
+    _feed(detector, lambda t: 104.0, seconds=30)
+    assert detector.stats()["samples"] == 60
+    detector.reset()
+    assert detector.stats()["samples"] == 0
@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.hardware.mock_controller import MockHotTubController
+from app.hardware.sensors import TemperatureFilter, load_sensor_table
+
+EXTRA_PROBES = [
+    {"channel": 0, "role": "water", "offset": 3.0},
+    {"channel": 1, "role": "hi_limit", "offset": 3.0},
+    {"channel": 2, "role": "heater_outlet"},
+    {"channel": 5, "role": "ambient", "coefficients": [0.001129, 0.000234, 8.7e-8]},
+]
+
+
+def test_sensor_table_loads_extra_probes_from_env(monkeypatch):
+    monkeypatch.setenv("SENSOR_TABLE", json.dumps(EXTRA_PROBES))
+    table = load_sensor_table()
+    assert table.channels == (0, 1, 2, 5)
+    assert table.index["ambient"] == 3
+    assert table.a[3] == 0.001129
+    # Same probe model, different offset: water reads 3C (5.4F) warmer than heater_outlet
+    temps = table.convert([600, 600, 600, 600])
+    assert temps[0] - temps[2] == pytest.approx(5.4)
+
+    monkeypatch.setenv("SENSOR_TABLE", json.dumps(EXTRA_PROBES[1:]))
+    with pytest.raises(ValueError, match="water"):
+        load_sensor_table()
+
+
+def test_filter_rejects_jumps_per_channel_and_reports_invalid_as_zero():
+    filt = TemperatureFilter(3, size=3)
+    filt.update(np.array([100.0, 60.0, 80.0]))
+    out = filt.update(np.array([101.0, 70.0, np.nan]))
+    # Channel 1 jumped 10F and is ignored; channel 2 had no valid sample
+    assert out.tolist() == [100.5, 60.0, 0.0]
+    out = filt.update(np.array([102.0, 61.0, 82.0]))
+    assert out.tolist() == [101.0, 60.5, 81.0]
+
+
+def test_simulator_scans_every_configured_role(monkeypatch):
+    monkeypatch.setenv("SENSOR_TABLE", json.dumps(EXTRA_PROBES))
+    controller = MockHotTubController()
+    temps = controller.read_temperatures()
+    assert temps.shape == (4,)
+    assert temps[3] == pytest.approx(controller.ambient_temp, abs=0.2)
+
+
+def test_snapshot_serves_the_last_safety_scan_without_reading_the_adc(monkeypatch):
+    from app.services.engine import HotTubEngine
+    engine = HotTubEngine()
+    engine._check_safety()
+    scanned = engine.current_temp
+
+    reads = []
+    monkeypatch.setattr(engine.controller, "read_temperatures", lambda: reads.append(1))
+    monkeypatch.setattr(engine.controller, "get_temperature", lambda sensor=0: reads.append(1))
+    assert engine.snapshot()["current_temp"] == scanned
+    assert reads == []
+
+
+def test_locked_engine_keeps_scanning_but_skips_the_checks():
+    from app.services.engine import HotTubEngine
+    engine = HotTubEngine()
+    engine.watchdog_trip()
+    engine.controller.read_temperatures = lambda: np.array([111.0, 111.0])
+    engine._check_safety()
+    assert engine.current_temp == 111.0
+    assert engine.safety_status == "STOP: ENGINE WATCHDOG TIMEOUT"
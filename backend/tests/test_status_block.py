@@ -0,0 +1,53 @@
+import time
+from types import SimpleNamespace
+
+from app.services.status_block import StatusBlockReader, StatusBlockWriter, _SEQ
+
+
+def _fake_engine(**overrides):
+    controller = SimpleNamespace(get_all_states=lambda: {"circ_pump": True, "heater": True, "jet_pump": False, "light": False, "ozone": True})
+    engine = SimpleNamespace(
+        controller=controller,
+        current_temp=101.25,
+        hi_limit_temp=101.75,
+        safety_status="OK",
+        system_locked=False,
+        session_expires=None,
+        runtimes={"heater": 30.0, "circ_pump": 60.0},
+    )
+    for key, value in overrides.items():
+        setattr(engine, key, value)
+    return engine
+
+
+def test_reader_sees_latest_published_status(tmp_path):
+    path = str(tmp_path / "status")
+    writer = StatusBlockWriter(path)
+    reader = StatusBlockReader(path)
+    assert reader.read() is None  # nothing published yet
+
+    writer.publish(_fake_engine())
+    writer.publish(_fake_engine(safety_status="Error: SPI timeout", system_locked=True, session_expires=1234.5))
+    snapshot = reader.read()
+    assert snapshot["tick"] == 2
+    assert snapshot["current_temp"] == 101.25
+    assert snapshot["relay_states"] == {"circ_pump": True, "heater": True, "jet_pump": False, "light": False, "ozone": True}
+    assert snapshot["safety_status"] == "Error: SPI timeout"
+    assert snapshot["safety_code"] == 255
+    assert snapshot["system_locked"] is True
+    assert snapshot["session_expires"] == 1234.5
+    assert snapshot["runtimes"]["heater"] == 30.0
+
+
+def test_reader_rejects_torn_and_stale_blocks(tmp_path):
+    path = str(tmp_path / "status")
+    writer = StatusBlockWriter(path)
+    writer.publish(_fake_engine())
+
+    _SEQ.pack_into(writer.buf, 0, writer.seq + 1)  # writer mid-update
+    assert StatusBlockReader(path).read(retries=3) is None
+    _SEQ.pack_into(writer.buf, 0, writer.seq)
+
+    assert StatusBlockReader(path, max_age=60).read() is not None
+    time.sleep(0.05)
+    assert StatusBlockReader(path, max_age=0.01).read() is None
@@ -0,0 +1,35 @@
+import os
+import time
+from datetime import datetime
+
+from app.services.system_logs import SystemLogService
+
+
+def _wait_for(service, count, timeout=3.0):
+    deadline = time.time() + timeout
+    while len(service.entries) < count and time.time() < deadline:
+        time.sleep(0.02)
+    return [entry["message"] for entry in service.entries]
+
+
+def test_file_tail_keeps_history_timestamps_and_resumes_without_duplicates(tmp_path):
+    path = tmp_path / "opensoak.log"
+    path.write_text("2026-10-01 08:00:00 INFO engine started\nundated continuation\n")
+    written = datetime(2026, 10, 1, 9, 30).timestamp()
+    os.utime(path, (written, written))
+
+    service = SystemLogService(log_file=str(path))
+    service.start()
+    assert _wait_for(service, 2) == ["2026-10-01 08:00:00 INFO engine started", "undated continuation"]
+    service.stop()
+    first, second = service.entries
+    assert first["timestamp"] == datetime(2026, 10, 1, 8, 0).timestamp()
+    assert second["timestamp"] == first["timestamp"]  # history, not the time it was read
+
+    with open(path, "a") as f:
+        f.write("ERROR: SPI timeout\n")
+    service.start()
+    assert _wait_for(service, 3)[-1] == "ERROR: SPI timeout"
+    service.stop()
+    assert len(service.entries) == 3
+    assert time.time() - service.entries[-1]["timestamp"] < 60
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.db.models import Base, HeatingEvent, TemperatureLog
+from app.db.session import SessionLocal, engine as db_engine
+from app.services.thermal_events import derive_events, rebuild_heating_events
+from app.services.thermal_model import ThermalModel
+
+MODEL = ThermalModel(loss_coeff=0.03, heat_rate=6.0)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(bind=db_engine)
+    yield
+    Base.metadata.drop_all(bind=db_engine)
+
+
+def _cycles(minutes, outside=40.0):
+    """Per-minute water temperature cycling 101-103F, with the heater duty per interval."""
+    water, heater = [101.5], [np.nan]
+    on = False
+    for _ in range(minutes - 1):
+        if water[-1] >= 103.0:
+            on = False
+        elif water[-1] <= 101.0:
+            on = True
+        water.append(float(MODEL.step(water[-1], outside, on, 1 / 60)))
+        heater.append(1.0 if on else 0.0)
+    times = np.arange(minutes) * 60.0
+    return times, np.array(water), np.full(minutes, outside), np.array(heater)
+
+
+def test_segments_follow_heater_edges_with_fitted_slopes():
+    times, water, outside, duty = _cycles(24 * 60)
+    events = derive_events(times, water, outside, duty)
+    kinds = events["event_type"].tolist()
+    edges = np.count_nonzero(np.diff(duty[1:]) != 0)
+
+    assert set(kinds) == {"heat", "cool"}
+    assert all(a != b for a, b in zip(kinds, kinds[1:]))  # heat and cool alternate
+    assert len(kinds) >= edges - 1  # at most a short first/last segment is dropped
+    heat = events["efficiency_score"][events["event_type"] == "heat"]
+    cool = events["efficiency_score"][events["event_type"] == "cool"]
+    # 6F/hr heater minus ~1.9F/hr loss at 102F / 40F air
+    assert np.median(heat) == pytest.approx(6.0 - 0.03 * 62, abs=0.1)
+    assert np.median(cool) == pytest.approx(-0.03 * 62, abs=0.1)
+    assert np.all(events["outside_temp"] == 40.0)
+
+
+def test_gap_splits_segments_and_trend_stands_in_for_missing_duty():
+    times = np.arange(40) * 60.0
+    times[20:] += 3600  # service was down for an hour
+    water = np.concatenate([np.linspace(100, 101, 20), np.linspace(99, 98.5, 20)])
+    events = derive_events(times, water, np.full(40, np.nan), np.full(40, np.nan))
+    assert events["event_type"].tolist() == ["heat", "cool"]
+    assert events["duration_seconds"].tolist() == [19 * 60.0, 19 * 60.0]
+    assert np.isnan(events["outside_temp"]).all()
+
+
+def test_rebuild_replaces_events_in_one_pass():
+    times, water, outside, duty = _cycles(6 * 60)
+    start = datetime(2026, 1, 1)
+    db = SessionLocal()
+    db.add(HeatingEvent(event_type="heat", start_temp=50, target_temp=51, duration_seconds=60, efficiency_score=60.0))
+    db.add_all([TemperatureLog(timestamp=start + timedelta(seconds=t), value=v, outside_temp=o,
+                               heater_duty=None if np.isnan(d) else d)
+                for t, v, o, d in zip(times, water, outside, duty)])
+    db.commit()
+
+    count = rebuild_heating_events(db)
+    events = db.query(HeatingEvent).order_by(HeatingEvent.timestamp).all()
+    assert count == len(events) > 2
+    assert all(e.efficiency_score < 20 for e in events)  # the poisoned row is gone
+    assert events[-1].timestamp <= start + timedelta(hours=6)
+    assert rebuild_heating_events(db) == count  # idempotent
+    db.close()
@@ -0,0 +1,61 @@
+import sys
+import time
+
+import pytest
+
+from app.services.update_jobs import JobAlreadyRunning, UpdateJobManager
+
+
+def _wait_done(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while not job.done and time.time() < deadline:
+        time.sleep(0.02)
+    return job
+
+
+def test_job_output_is_streamed_by_offset():
+    manager = UpdateJobManager()
+    job = _wait_done(manager.start([sys.executable, "-c", "print('one'); print('two')"], timeout=5))
+    assert job.status == "succeeded"
+    first = job.to_dict()
+    assert first["output"] == ["one", "two"]
+    assert job.to_dict(first["next_offset"])["output"] == []
+
+
+def test_only_one_job_runs_and_cancel_and_timeout_stop_it():
+    manager = UpdateJobManager()
+    sleeper = [sys.executable, "-c", "import time; time.sleep(30)"]
+    job = manager.start(sleeper, timeout=30)
+    with pytest.raises(JobAlreadyRunning):
+        manager.start(sleeper, timeout=30)
+    manager.cancel(job.id)
+    assert _wait_done(job).status == "cancelled"
+
+    timed = _wait_done(manager.start(sleeper, timeout=0.2))
+    assert timed.status == "timed_out"
+
+
+def test_output_read_error_fails_the_job_and_frees_the_slot(monkeypatch):
+    import subprocess
+    from app.services import update_jobs
+
+    real_popen = subprocess.Popen
+
+    class BrokenStdout:
+        def __iter__(self):
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    def popen(*args, **kwargs):
+        process = real_popen([sys.executable, "-c", "import time; time.sleep(30)"], stdout=subprocess.PIPE)
+        process.stdout.close()
+        process.stdout = BrokenStdout()
+        return process
+
+    monkeypatch.setattr(update_jobs.subprocess, "Popen", popen)
+    manager = UpdateJobManager()
+    job = _wait_done(manager.start(["git", "pull"], timeout=30))
+    assert job.status == "failed"
+    assert "invalid start byte" in job.error
+    assert job.finished_at is not None
+    monkeypatch.setattr(update_jobs.subprocess, "Popen", real_popen)
+    assert _wait_done(manager.start([sys.executable, "-c", "pass"], timeout=5)).status == "succeeded"
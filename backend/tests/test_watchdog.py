@@ -0,0 +1,111 @@
+from app.services.engine import HotTubEngine
+from app.services.watchdog import EngineWatchdog
+
+
+def test_watchdog_trips_once_per_stall_and_records_duration(fake_clock):
+    engine = HotTubEngine()
+    watchdog = EngineWatchdog(engine, timeout=3.0, clock=fake_clock)
+    watchdog.reset()
+
+    fake_clock.now += 1.0
+    watchdog.beat()
+    fake_clock.now += 2.5
+    assert not watchdog.check()
+    assert not engine.system_locked
+
+    fake_clock.now += 1.0
+    assert watchdog.check()
+    assert engine.system_locked
+    assert engine.safety_status == "STOP: ENGINE WATCHDOG TIMEOUT"
+    assert not any(engine.controller.get_all_states().values())
+
+    fake_clock.now += 5.0
+    assert not watchdog.check()  # still the same stall
+    watchdog.beat()
+
+    stats = watchdog.stats()
+    assert stats["stalls"] == 1
+    assert stats["stalled"] is False
+    assert stats["last_stall_duration"] == 8.5
+    assert stats["max_interval"] == 8.5
+
+
+def test_blocked_control_tick_does_not_stall_the_safety_thread(tmp_path, monkeypatch):
+    import threading
+    import time
+    from app.services import engine as engine_module
+    from app.services.engine_ipc import EngineServer
+    from app.services.leader import LeaderLease
+    from app.services.status_block import StatusBlockWriter
+    monkeypatch.setattr(engine_module, "StatusBlockWriter", lambda: StatusBlockWriter(str(tmp_path / "status")))
+    monkeypatch.setattr(engine_module, "EngineServer", lambda engine: EngineServer(engine, str(tmp_path / "engine.sock")))
+
+    engine = HotTubEngine()
+    engine.lease = LeaderLease(str(tmp_path / "leader.lock"))
+    engine.loop.phase("safety").period = 0.05
+    engine.watchdog.timeout = 0.3
+    # A control tick stuck behind a locked SQLite database
+    release = threading.Event()
+    monkeypatch.setattr(engine, "_tick", lambda: release.wait(5))
+
+    engine.start()
+    try:
+        time.sleep(1.0)
+        scans = engine.loop.phase("safety").runs
+    finally:
+        release.set()
+        engine.stop()
+    assert scans >= 10
+    assert engine.watchdog.stats()["stalls"] == 0
+    assert not engine.system_locked
+
+
+def test_phase_errors_do_not_hide_a_lockout():
+    engine = HotTubEngine()
+    engine.watchdog_trip()
+    engine._phase_error(engine.control_loop.phase("control"), RuntimeError("database is locked"))
+    assert engine.system_locked
+    assert engine.safety_status == "STOP: ENGINE WATCHDOG TIMEOUT"
+
+    engine.reset_faults()
+    engine._phase_error(engine.control_loop.phase("control"), RuntimeError("database is locked"))
+    assert engine.safety_status == "Error: database is locked"
+
+
+def test_stuck_control_tick_cuts_the_heater_without_locking(tmp_path, monkeypatch):
+    import threading
+    import time
+    from app.services import engine as engine_module
+    from app.services.engine_ipc import EngineServer
+    from app.services.leader import LeaderLease
+    from app.services.status_block import StatusBlockWriter
+    monkeypatch.setattr(engine_module, "StatusBlockWriter", lambda: StatusBlockWriter(str(tmp_path / "status")))
+    monkeypatch.setattr(engine_module, "EngineServer", lambda engine: EngineServer(engine, str(tmp_path / "engine.sock")))
+
+    engine = HotTubEngine()
+    engine.lease = LeaderLease(str(tmp_path / "leader.lock"))
+    engine.poll_interval = 0.01 # control starts right after the first scan
+    engine.control_watchdog.timeout = 0.3
+    controller = engine.controller
+    release = threading.Event()
+
+    def stuck_tick():
+        # Heater left on, then a commit that never returns
+        controller.set_relay(controller.CIRC_PUMP, True)
+        controller.set_relay(controller.HEATER, True)
+        release.wait(5)
+
+    monkeypatch.setattr(engine, "_tick", stuck_tick)
+    engine.start()
+    try:
+        time.sleep(1.5)
+        heater = controller.get_relay_state(controller.HEATER)
+        stats = engine.loop_stats()
+    finally:
+        release.set()
+        engine.stop()
+    assert heater is False
+    assert stats["control_watchdog"]["stalls"] == 1
+    assert stats["control_watchdog"]["stalled"] is True
+    assert stats["watchdog"]["stalls"] == 0
+    assert not engine.system_locked
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.weather import WeatherService
+
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+
+class CountingWeatherService(WeatherService):
+    def __init__(self):
+        super().__init__(ttl=60)
+        self.refreshes = 0
+        self.release = asyncio.Event()
+
+    async def _geocode(self, location):
+        return 43.6, -70.3, "Portland"
+
+    async def _refresh(self, location):
+        self.refreshes += 1
+        await self.release.wait()
+        payload = {"city": "Portland", "current": {"temperature_2m": 30 + self.refreshes}}
+        self.location, self.payload, self.fetched_at = location, payload, time.time()
+        return payload
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_refresh_and_stale_data_is_served():
+    service = CountingWeatherService()
+    waiters = [asyncio.ensure_future(service.get("04086")) for _ in range(10)]
+    await asyncio.sleep(0)
+    service.release.set()
+    results = await asyncio.gather(*waiters)
+    assert service.refreshes == 1
+    assert all(r["current"]["temperature_2m"] == 31 for r in results)
+
+    # Expired: the stale payload comes back immediately while one refresh runs
+    service.fetched_at = 0.0
+    service.release.clear()
+    stale = await asyncio.gather(*(service.get("04086") for _ in range(5)))
+    assert all(r["current"]["temperature_2m"] == 31 for r in stale)
+    await asyncio.sleep(0)
+    assert service.refreshes == 2
+
+    service.release.set()
+    await service._refresh_task
+    assert (await service.get("04086"))["current"]["temperature_2m"] == 32
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+@pytest.mark.anyio
+async def test_geocode_survives_a_concurrent_insert_of_the_same_location(monkeypatch):
+    from app.db.models import Base, GeocodeResult
+    from app.db.session import SessionLocal, engine as db_engine
+    from app.services import weather
+
+    Base.metadata.create_all(bind=db_engine)
+    try:
+        class RacingClient:
+            async def get(self, url, params=None):
+                # Another worker finishes the same lookup while this one waits on the API
+                db = SessionLocal()
+                db.add(GeocodeResult(location="04086", latitude=43.9, longitude=-69.9, city="Topsham"))
+                db.commit()
+                db.close()
+                return _FakeResponse({"results": [{"latitude": 43.9, "longitude": -69.9, "name": "Topsham"}]})
+
+        monkeypatch.setattr(weather, "get_http_client", lambda: RacingClient())
+        assert await WeatherService()._geocode("04086") == (43.9, -69.9, "Topsham")
+    finally:
+        Base.metadata.drop_all(bind=db_engine)
+
+
+def test_engine_temperature_reuses_the_api_payload(monkeypatch):
+    from app.services import weather
+    service = WeatherService()
+    service.location, service.fetched_at = "04086", time.time()
+    service.payload = {"current": {"temperature_2m": 28.5}}
+    monkeypatch.setattr(weather, "get_sync_http_client", lambda: pytest.fail("no request expected"))
+    assert service.current_temperature("04086") == 28.5
@@ -79,6 +79,8 @@ function App() {
   const [lastValidTemp, setLastValidTemp] = useState("--");
   const [showBugReport, setShowBugReport] = useState(false);
   const [bugSubmitting, setBugSubmitting] = useState(false);
+  const [updateJob, setUpdateJob] = useState(null);
+  const [updateOutput, setUpdateOutput] = useState([]);
 
   // Load Host from Preferences
   useEffect(() => {
@@ -148,6 +150,7 @@ function App() {
   const optimisticControlsRef = useRef({});
   const fetchInFlightRef = useRef(false);
   const lastWeatherFetchRef = useRef(0);
+  const historyCursorRef = useRef(null);
 
   // Initialize Role
   const [role, setRole] = useState(() => {
@@ -207,10 +210,11 @@ function App() {
     console.log("fetchData: fetching from", apiBase);
     try {
       const shouldFetchWeather = !weather || (Date.now() - lastWeatherFetchRef.current >= 60000);
+      const historyCursor = historyCursorRef.current;
       const [statusRes, settingsRes, historyRes, schedulesRes, vacationsRes, logsRes, weatherRes, energyRes, heatStatsRes] = await Promise.all([
         axios.get(`${apiBase}/status/`).catch((e) => { console.log("status failed:", e.message); return { data: null }; }),
         axios.get(`${apiBase}/settings/`).catch((e) => { console.log("settings failed:", e.message); return { data: null }; }),
-        axios.get(`${apiBase}/status/history?limit=${historyLimit}`).catch(() => ({ data: [] })),
+        axios.get(`${apiBase}/status/history?limit=${historyLimit}&since=${historyCursor ?? 0}`).catch(() => ({ data: null })),
         axios.get(`${apiBase}/schedules/`).catch(() => ({ data: [] })),
         axios.get(`${apiBase}/vacations/`).catch(() => ({ data: [] })),
         axios.get(`${apiBase}/status/logs`).catch(() => ({ data: [] })),
@@ -281,15 +285,18 @@ function App() {
         if (sysLogsRes.data && sysLogsRes.data.logs) setSystemLogs(String(sysLogsRes.data.logs));
       }
       
-      if (Array.isArray(historyRes.data)) {
-        setHistory(historyRes.data.map(h => {
+      if (historyRes.data && Array.isArray(historyRes.data.items) && historyCursorRef.current === historyCursor) {
+        const newPoints = historyRes.data.items.map(h => {
           const timestamp = h.timestamp && !h.timestamp.endsWith('Z') ? `${h.timestamp}Z` : h.timestamp;
           return {
             ...h,
             time: timestamp ? new Date(timestamp).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit', hour12: true }) : "--:--",
             value: h.value
           };
-        }).reverse());
+        });
+        // Items arrive oldest-first and only contain rows newer than our cursor, so append and trim
+        setHistory(prev => (historyCursor === null ? newPoints : [...prev, ...newPoints]).slice(-historyLimit));
+        historyCursorRef.current = historyRes.data.next_cursor;
       }
       
       setError(null);
@@ -334,6 +341,28 @@ function App() {
     }
   }, [apiBase]);
 
+  useEffect(() => {
+    historyCursorRef.current = null;
+  }, [historyLimit, apiBase]);
+
+  // Follow a running update job until it reaches a final state
+  const updateJobId = updateJob?.job_id;
+  const updateJobActive = updateJob && (updateJob.status === 'pending' || updateJob.status === 'running');
+  useEffect(() => {
+    if (!updateJobId || !updateJobActive) return;
+    let offset = updateJob.next_offset || 0;
+    const poll = async () => {
+      try {
+        const res = await axios.get(`${apiBase}/control/update-system/${updateJobId}?offset=${offset}`, { headers: getAuthHeaders() });
+        offset = res.data.next_offset;
+        if (res.data.output.length) setUpdateOutput(prev => [...prev, ...res.data.output]);
+        setUpdateJob(res.data);
+      } catch (err) { console.error("Update poll failed:", err); }
+    };
+    const interval = setInterval(poll, 1000);
+    return () => clearInterval(interval);
+  }, [updateJobId, updateJobActive, apiBase]);
+
   useEffect(() => {
     fetchData();
     const interval = setInterval(fetchData, 2000);
@@ -469,6 +498,20 @@ function App() {
     try { await axios.post(`${apiBase}/settings/`, { location: loc }, { headers: getAuthHeaders() }); fetchData(); } catch (err) { alert(err.message); }
   };
 
+  const startUpdate = async () => {
+    if (!confirm("Update from GitHub?")) return;
+    try {
+      const res = await axios.post(`${apiBase}/control/update-system`, {}, { headers: getAuthHeaders() });
+      setUpdateOutput([]);
+      setUpdateJob({ job_id: res.data.job_id, status: 'pending', next_offset: 0 });
+    } catch (err) { alert("Failed: " + (err.response?.data?.detail || err.message)); }
+  };
+
+  const cancelUpdate = async () => {
+    if (!updateJob || !confirm("Cancel the running update?")) return;
+    try { await axios.post(`${apiBase}/control/update-system/${updateJob.job_id}/cancel`, {}, { headers: getAuthHeaders() }); } catch (err) { alert("Failed: " + (err.response?.data?.detail || err.message)); }
+  };
+
   const updateRestTemp = async (delta) => {
     if (!settings) return;
     const newTemp = Math.round((settings.default_rest_temp + delta) * 2) / 2;
@@ -1237,7 +1280,21 @@ function App() {
                   <div className="group relative"><label className="block text-[10px] text-slate-500 uppercase font-black ml-1 tracking-widest">Electric Cost ($/kWh)</label><input type="number" step="0.01" defaultValue={settings?.kwh_cost} onBlur={(e) => axios.post(`${apiBase}/settings/`, { kwh_cost: parseFloat(e.target.value) }, { headers: getAuthHeaders() })} className="w-full glass-inset text-sm p-3 rounded-xl outline-none font-black" title="Your local electricity rate for cost estimation" /></div>
                   <div className="grid grid-cols-2 gap-4">{[{l:"Heater Watts",k:"heater_watts",t:"Wattage rating of the heating element"},{l:"Circ Watts",k:"circ_pump_watts",t:"Wattage of the low-speed circulation pump"},{l:"Jet Watts",k:"jet_pump_watts",t:"Wattage of the high-speed jet pump"},{l:"Light Watts",k:"light_watts",t:"Wattage of the underwater lighting"},{l:"Ozone Watts",k:"ozone_watts",t:"Wattage of the ozone purification unit"}].map(p => (<div key={p.k} className="group relative"><label className="block text-[10px] text-slate-500 uppercase font-black ml-1 tracking-tighter truncate">{p.l}</label><input type="number" defaultValue={settings?.[p.k]} onBlur={(e) => axios.post(`${apiBase}/settings/`, { [p.k]: parseFloat(e.target.value) }, { headers: getAuthHeaders() })} className="w-full glass-inset text-sm p-3 rounded-xl outline-none font-bold" title={p.t} /></div>))}</div>
                 </div>
-                <button onClick={async () => { if (confirm("Update from GitHub?")) { try { await axios.post(`${apiBase}/control/update-system`, {}, { headers: getAuthHeaders() }); alert("Update triggered."); } catch (e) { alert("Failed: " + e.message); } } }} className="w-full py-5 glass-panel rounded-2xl text-xs font-black uppercase tracking-[0.2em] text-blue-400 hover:text-white hover:bg-blue-500/20 transition-all border border-blue-500/30 flex items-center justify-center shadow-2xl active:scale-95" title="Pull latest software updates from GitHub and restart services"><span className="mr-4 text-2xl">🔄</span> UPDATE SYSTEM</button>
+                <button onClick={startUpdate} disabled={updateJobActive} className={`w-full py-5 glass-panel rounded-2xl text-xs font-black uppercase tracking-[0.2em] text-blue-400 hover:text-white hover:bg-blue-500/20 transition-all border border-blue-500/30 flex items-center justify-center shadow-2xl active:scale-95 ${updateJobActive ? 'opacity-40 cursor-not-allowed animate-pulse' : ''}`} title="Pull latest software updates from GitHub and restart services"><span className="mr-4 text-2xl">🔄</span> {updateJobActive ? 'UPDATING...' : 'UPDATE SYSTEM'}</button>
+                {updateJob && (
+                  <div className="glass-inset rounded-2xl overflow-hidden shadow-xl">
+                    <div className="bg-white/5 px-4 py-3 border-b border-white/5 flex items-center justify-between">
+                      <span className={`text-[10px] font-black uppercase tracking-[0.2em] ${updateJob.status === 'succeeded' ? 'text-emerald-400' : updateJobActive ? 'text-blue-400 animate-pulse' : 'text-red-400'}`}>{updateJob.status.replace('_', ' ')}{updateJob.returncode != null ? ` (exit ${updateJob.returncode})` : ''}</span>
+                      {updateJobActive ? (
+                        <button onClick={cancelUpdate} className="px-3 py-1 rounded-lg text-[10px] font-black uppercase tracking-widest text-red-400 border border-red-500/30 hover:bg-red-500/20 hover:text-white transition-all" title="Stop the running update">Cancel</button>
+                      ) : (
+                        <button onClick={() => { setUpdateJob(null); setUpdateOutput([]); }} className="px-3 py-1 rounded-lg text-[10px] font-black uppercase tracking-widest text-slate-500 border border-white/10 hover:text-white transition-all" title="Hide the update output">Dismiss</button>
+                      )}
+                    </div>
+                    {updateJob.error && <div className="px-4 pt-3 text-[11px] font-bold text-red-400">{updateJob.error}</div>}
+                    <pre ref={el => { if (el) el.scrollTop = el.scrollHeight; }} className="p-4 max-h-64 overflow-y-auto font-mono text-[11px] leading-relaxed text-slate-400 whitespace-pre-wrap break-all custom-scrollbar">{updateOutput.length ? updateOutput.join('\n') : 'Waiting for output...'}</pre>
+                  </div>
+                )}
               </div>
             </div>
           )}